@@ -0,0 +1,149 @@
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path[:0] = [os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')]
+
+import data_analysis as da
+
+
+def synthetic_cars(rows, seed=0):
+    # Filas de CRautos con los textos de siempre: "$ 14,667", "$ND", años como texto
+    rng = np.random.default_rng(seed)
+    prices = rng.integers(5_000, 150_000, rows)
+    precio = pd.Series(prices).map('$ {:,}'.format)
+    precio[rng.random(rows) < 0.03] = '$ND'
+    versions = np.array([f"Modelo {i}" for i in range(400)], dtype=object)
+    return pd.DataFrame({
+        'Precio': precio.to_numpy(dtype=object),
+        'Año': rng.integers(1995, 2025, rows).astype(str).astype(object),
+        'Version': versions[rng.integers(0, len(versions), rows)],
+    })
+
+
+def synthetic_yuplon(rows, seed=0):
+    # Sub-ofertas de Yuplon con precios "₡12 500,00", descuentos "45%" y vendidas "1,200"
+    rng = np.random.default_rng(seed)
+    prices = rng.integers(1_000, 200_000, rows)
+
+    def colones(values):
+        return ('₡' + pd.Series(values).map('{:,}'.format).str.replace(',', ' ') + ',00').to_numpy(dtype=object)
+
+    offers = np.array([f"Oferta {i}" for i in range(2_000)], dtype=object)
+    return pd.DataFrame({
+        'Main Offer': offers[rng.integers(0, len(offers), rows)],
+        'Price': colones(prices),
+        'Original Price': colones(prices * 2),
+        'Discount': (pd.Series(rng.integers(5, 90, rows).astype(str)) + '%').to_numpy(dtype=object),
+        'Vendidas': pd.Series(rng.integers(0, 5_000, rows)).map('{:,}'.format).to_numpy(dtype=object),
+    })
+
+
+def legacy_clean_data(df):
+    # La versión anterior de data_analysis.clean_data, como punto de comparación
+    df = df[df['Precio'] != '$ND'].copy()
+    df['Precio'] = df['Precio'].replace(r'[\$,]', '', regex=True)
+    df = df[pd.to_numeric(df['Precio'], errors='coerce').notnull()]
+    df['Precio'] = df['Precio'].astype(float)
+    df['Año'] = df['Año'].astype(int)
+    return df
+
+
+def legacy_clean_data_yuplon(df):
+    # La versión anterior de data_analysis.clean_data_yuplon
+    df['Price'] = df['Price'].str.replace('₡', '').str.replace(' ', '').str.split(',', expand=True)[0]
+    df['Price'] = df['Price'].astype(float)
+    df['Original Price'] = \
+        df['Original Price'].str.replace('₡', '').str.replace(' ', '').str.split(',', expand=True)[0]
+    df['Original Price'] = df['Original Price'].astype(float)
+    df['Discount'] = df['Discount'].replace('%', '', regex=True).astype(float)
+    df['Vendidas'] = df['Vendidas'].replace('[,]', '', regex=True).astype(int)
+    return df
+
+
+def _current_rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+
+def _peak_child(func, df, results):
+    data = df.copy()
+    start = _current_rss()
+    func(data)
+    results.put(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - start)
+
+
+def peak_memory(func, df):
+    # Memoria pico extra de una corrida, medida en un proceso hijo para que cuente también
+    # lo que reservan numpy y Arrow por fuera del heap de Python (Linux)
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    child = context.Process(target=_peak_child, args=(func, df, results))
+    child.start()
+    peak = results.get()
+    child.join()
+    return peak
+
+
+def measure(func, df, repeat):
+    # Mejor tiempo de `repeat` corridas y memoria pico de una corrida aparte
+    best = float('inf')
+    for _ in range(repeat):
+        data = df.copy()
+        start = time.perf_counter()
+        result = func(data)
+        best = min(best, time.perf_counter() - start)
+    return best, peak_memory(func, df), result
+
+
+def compare(name, legacy, current, df, numeric_columns, repeat):
+    legacy_s, legacy_peak, legacy_result = measure(legacy, df, repeat)
+    current_s, current_peak, current_result = measure(current, df, repeat)
+    identical = len(legacy_result) == len(current_result) and all(
+        np.allclose(legacy_result[column].to_numpy(dtype=float),
+                    current_result[column].to_numpy(dtype=float))
+        for column in numeric_columns)
+    return {
+        'name': name,
+        'rows': len(df),
+        'legacy_s': round(legacy_s, 3),
+        'current_s': round(current_s, 3),
+        'speedup': round(legacy_s / current_s, 2),
+        'legacy_peak_mb': round(legacy_peak / 2 ** 20, 1),
+        'current_peak_mb': round(current_peak / 2 ** 20, 1),
+        'legacy_result_mb': round(legacy_result.memory_usage(deep=True).sum() / 2 ** 20, 1),
+        'current_result_mb': round(current_result.memory_usage(deep=True).sum() / 2 ** 20, 1),
+        'identical': identical,
+    }
+
+
+def run(rows, repeat=3):
+    return [
+        compare('clean_data', legacy_clean_data, da.clean_data, synthetic_cars(rows),
+                ['Precio', 'Año'], repeat),
+        compare('clean_data_yuplon', legacy_clean_data_yuplon, da.clean_data_yuplon,
+                synthetic_yuplon(rows), ['Price', 'Original Price', 'Discount', 'Vendidas'], repeat),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo y memoria de la limpieza de datos")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for row in run(args.rows, args.repeat):
+        print(f"{row['name']:<18} {row['rows']:>9} filas  "
+              f"{row['legacy_s']:>7.3f}s -> {row['current_s']:>7.3f}s (x{row['speedup']})  "
+              f"pico {row['legacy_peak_mb']} -> {row['current_peak_mb']} MB  "
+              f"resultado {row['legacy_result_mb']} -> {row['current_result_mb']} MB  "
+              f"{'idéntico' if row['identical'] else 'DIFERENTE'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path[:0] = [os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'),
+                os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'crautos')]
+
+import car_parsers
+from car_parsers import CarPageParser
+
+
+def load_pages(paths):
+    # Leer páginas de detalle guardadas (archivos .html o carpetas con ellos)
+    pages = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.html'))
+        else:
+            files = [path]
+        for file in files:
+            with open(file, encoding='utf-8') as f:
+                html_content = f.read()
+            # Las páginas de usados tienen el encabezado "carheader"
+            pages.append(('carheader' in html_content, html_content))
+    return pages
+
+
+def parse_all(pages, backend, partial):
+    return [CarPageParser.parse_used_car_details(html_content, backend, partial) if is_used
+            else CarPageParser.parse_new_car_details(html_content, backend, partial)
+            for is_used, html_content in pages]
+
+
+def time_backend(pages, backend, partial, repeat):
+    # Medir microsegundos por página, tomando la mejor de `repeat` corridas
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = parse_all(pages, backend, partial)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages) * 1e6, results
+
+
+def available_backends():
+    backends = [('html.parser', False), ('html.parser', True)]
+    if car_parsers.builder_registry.lookup('lxml'):
+        backends += [('lxml', False), ('lxml', True)]
+    if car_parsers.SelectolaxParser is not None:
+        backends.append(('selectolax', False))
+    return backends
+
+
+def run(pages, repeat=5):
+    # Comparar cada backend contra el parseo original (html.parser con el documento completo)
+    baseline_us, baseline = time_backend(pages, 'html.parser', False, repeat)
+    report = []
+    for backend, partial in available_backends():
+        us_per_page, results = time_backend(pages, backend, partial, repeat)
+        report.append({
+            'backend': backend,
+            'partial': partial,
+            'us_per_page': round(us_per_page, 1),
+            'speedup': round(baseline_us / us_per_page, 2),
+            'identical': results == baseline,
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de parseo por página de detalle de CRautos")
+    parser.add_argument('paths', nargs='+', help="Archivos .html o carpetas con páginas guardadas")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_pages(args.paths)
+    print(f"{len(pages)} páginas ({sum(is_used for is_used, _ in pages)} de usados)")
+    for row in run(pages, args.repeat):
+        name = f"{row['backend']}{' + strainer' if row['partial'] else ''}"
+        print(f"{name:<26} {row['us_per_page']:>10.1f} µs/página  x{row['speedup']:<6} "
+              f"{'idéntico' if row['identical'] else 'DIFERENTE'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import argparse
+import hashlib
+import html
+import os
+import sys
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path[:0] = [ROOT]
+
+# Las páginas de fixtures/ son sintéticas: build() las genera desde los exceles de data/ con la
+# estructura HTML que recorren los parsers, pero no son copias grabadas del sitio. Para medir
+# con páginas reales hay que grabarlas con `record` (necesita red).
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+DATA_DIR = os.path.join(ROOT, 'data')
+# Tipos de página del corpus: una carpeta por tipo con archivos .html
+KINDS = ('crautos_new', 'crautos_used', 'crautos_listing', 'yuplon_campaign')
+# Relleno sintético para acercar el tamaño al de las páginas reales (menú, scripts y tarjetas)
+PAGE_PADDING_KB = 40
+LISTING_CARS_PER_PAGE = 40
+
+
+def load_corpus(root=FIXTURES_DIR, kinds=KINDS):
+    # {tipo: [(nombre, html), ...]} con las páginas guardadas, ordenadas por nombre
+    corpus = {}
+    for kind in kinds:
+        folder = os.path.join(root, kind)
+        if not os.path.isdir(folder):
+            continue
+        pages = []
+        for name in sorted(os.listdir(folder)):
+            if name.endswith('.html'):
+                with open(os.path.join(folder, name), encoding='utf-8') as f:
+                    pages.append((name, f.read()))
+        if pages:
+            corpus[kind] = pages
+    return corpus
+
+
+def _save(root, kind, name, html_content):
+    folder = os.path.join(root, kind)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, f"{name}.html"), 'w', encoding='utf-8') as f:
+        f.write(html_content)
+
+
+def record(kind, urls, root=FIXTURES_DIR):
+    # Guardar páginas reales en el corpus (reemplazan a las generadas con el mismo tipo)
+    import http_client
+    session = http_client.get_session()
+    for url in urls:
+        response = session.get(url)
+        if response.status_code != 200:
+            print(f"Fallo al grabar {url}. Código de estado: {response.status_code}")
+            continue
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+        _save(root, kind, name, response.text)
+        print(f"Grabada {url} -> {kind}/{name}.html")
+
+
+def _present(value):
+    return value is not None and not (isinstance(value, float) and pd.isna(value))
+
+
+def _text(value):
+    return html.escape(str(value))
+
+
+def _page(body, seed):
+    # Envolver el contenido con un encabezado, menú y relleno parecidos a los del sitio
+    filler = []
+    size = 0
+    i = 0
+    while size < PAGE_PADDING_KB * 1024:
+        card = (f'<div class="card related"><a href="/autosusados/cardetail.cfm?c={seed + i}">'
+                f'<img data-src="/fotos/{seed + i}.jpg" alt=""><span class="title">Vehículo {seed + i}</span>'
+                f'<span class="price">$ {(seed * 7 + i * 131) % 90000:,}</span></a></div>')
+        filler.append(card)
+        size += len(card)
+        i += 1
+    return ('<!DOCTYPE html><html lang="es"><head><meta charset="utf-8"><title>Fixture</title>'
+            '<link rel="stylesheet" href="/css/site.css"><script src="/js/site.js"></script></head>'
+            '<body><nav class="navbar"><ul>' +
+            ''.join(f'<li><a href="/menu/{n}">Menú {n}</a></li>' for n in range(30)) +
+            f'</ul></nav><main>{body}</main><aside>{"".join(filler)}</aside>'
+            '<footer><p>Fixture de benchmark</p></footer></body></html>')
+
+
+def new_car_page(row, seed=0):
+    # Página de detalle de carro nuevo: banner con la versión y la ficha técnica en #fichatecnica
+    rows = ['<tr><td colspan="2">Ficha técnica</td></tr>']
+    for key, value in row.items():
+        if key in ('Version', 'Car ID') or key.startswith('Unnamed') or not _present(value):
+            continue
+        rows.append(f'<tr><td>{_text(key)}</td><td>{_text(value)}</td></tr>')
+    body = (f'<div class="header-text"><h2> {_text(row.get("Version", ""))} </h2></div>'
+            f'<table id="fichatecnica">{"".join(rows)}</table>')
+    return _page(body, seed)
+
+
+def used_car_page(row, seed=0):
+    # Página de detalle de carro usado: encabezado "carheader" y la tabla de #tab-1
+    rows = []
+    for key, value in row.items():
+        if key in ('Version', 'Año', 'Precio', 'Car ID') or not _present(value):
+            continue
+        rows.append(f'<tr><td>{_text(key)}</td><td>{_text(value)}</td></tr>')
+    body = (f'<div class="header-text"><div class="carheader"><h1>{_text(row["Version"])} {row["Año"]}</h1>'
+            f'<h3>({_text(row["Precio"])}*)</h3></div></div>'
+            f'<div class="tab-content"><div id="tab-1"><table>{"".join(rows)}</table></div>'
+            f'<div id="tab-2"><p>Equipamiento</p></div></div>')
+    return _page(body, seed)
+
+
+def search_page():
+    # Página del listado de usados con el formulario #searchform: los selects de año desde, orden
+    # y tipo están en las filas 1, 5 y 6 de la tabla y el botón en la fila 8, como los recorren
+    # ListingPageParser.used_car_search_fields y la búsqueda con Selenium
+    def select(name, options, selected=None):
+        return (f'<select name="{name}">' +
+                ''.join(f'<option value="{value}"{" selected" if value == selected else ""}>{text}</option>'
+                        for value, text in options) + '</select>')
+
+    years = [(str(year), str(year)) for year in range(1990, 2027)]
+    rows = [
+        ('Año desde', select('yearfrom', years, selected='1990')),
+        ('Marca', select('brand', [('00', 'Todas'), ('12', 'Toyota'), ('15', 'Hyundai')])),
+        ('Modelo', '<input type="text" name="modelstr" value="">'),
+        ('Precio hasta', select('priceto', [('0', 'Cualquiera'), ('20000', '$ 20,000'), ('40000', '$ 40,000')])),
+        ('Ordenar por', select('orderby', [('1', 'Precio'), ('2', 'Año'), ('3', 'Marca')])),
+        ('Mostrar', select('newused', [('0', 'Todos'), ('1', 'Solo nuevos'), ('2', 'Solo usados')])),
+        ('Con fotos', '<input type="checkbox" name="foto" value="1">'),
+    ]
+    table = ''.join(f'<tr><td>{label}</td><td>{field}</td></tr>' for label, field in rows)
+    table += '<tr><td colspan="2"><button type="submit" name="buscar" value="1">Buscar</button></td></tr>'
+    form = ('<form id="searchform" name="searchform" action="resultados.cfm" method="post">'
+            f'<div><div><h2>Buscar autos usados</h2></div><div><table><tbody>{table}</tbody></table></div></div>'
+            '<input type="hidden" name="p" value="1"></form>')
+    return _page(form, 0)
+
+
+def listing_page(car_ids, page_number, total_pages):
+    # Página de resultados: enlaces "brandtitle" a cada carro y la paginación
+    cars = ''.join(f'<div class="brandtitle"><a href="cardetail.cfm?c={car_id}&ref=list">Carro {car_id}</a></div>'
+                   for car_id in car_ids)
+    pagination = ''.join(f'<li class="page-item"><a class="page-link" href="#" onclick="goPage({n})">{n}</a></li>'
+                         for n in range(1, total_pages + 1))
+    if page_number < total_pages:
+        pagination += (f'<li class="page-item page-next"><a class="page-link" '
+                       f'href="javascript:goPage({page_number + 1})">&raquo;</a></li>')
+    return _page(f'{cars}<ul class="pagination">{pagination}</ul>', page_number)
+
+
+def campaign_page(offer_rows, seed=0):
+    # Página de campaña de Yuplon con la estructura que recorren los XPaths de yuplon.py
+    first = offer_rows[0]
+    sub_offers = ''.join(
+        f'<div class="pb-10"><span class="pb-2">{_text(row["Sub Offer Title"])}</span>'
+        f'<span class="font-medium text-2xl">{_text(row["Price"])}</span>'
+        f'<span class="line-through">{_text(row["Original Price"])}</span>'
+        f'<span class="font-medium text-2xl text-yuplon-black dark:text-dark-text-primary ml-auto w-[48px]">'
+        f'{_text(row["Discount"])}</span></div>'
+        for row in offer_rows)
+    body = ('<div id="root"><div>encabezado</div><div>navegación</div><div>buscador</div><div><section>'
+            '<div><div><div><div>imagen</div><div>'
+            f'<div><div><span>{_text(first["Calificación"])}</span></div></div>'
+            f'<div><div><span> {_text(first["Vendidas"])} </span></div></div>'
+            '</div></div></div><div>detalle</div>'
+            '<div><div>a</div><div>b</div><div><div><ol>'
+            f'<li>Válido para redimir del {_text(first["Start Date"])} al {_text(first["End Date"])}.</li>'
+            '<li>Restricciones</li></ol></div></div></div>'
+            f'<span class="text-3xl font-bold">{_text(first["Main Offer"])}</span>'
+            f'{sub_offers}</div></section></div></div>')
+    return _page(body, seed)
+
+
+def build(root=FIXTURES_DIR, data_dir=DATA_DIR, per_kind=8, listing_pages=3, campaigns=4):
+    # Reconstruir el corpus sintético desde los exceles de data/ (mismas claves y textos que
+    # muestran las páginas reales, con HTML y relleno generados)
+    new_cars = pd.read_excel(os.path.join(data_dir, 'new_car_details.xlsx'))
+    used_cars = pd.read_excel(os.path.join(data_dir, 'used_car_details.xlsx'))
+    offers = pd.read_excel(os.path.join(data_dir, 'campaign_data.xlsx'))
+
+    step = max(1, len(new_cars) // per_kind)
+    for i, row in enumerate(new_cars.iloc[::step].head(per_kind).to_dict('records')):
+        _save(root, 'crautos_new', f"{row['Car ID']}", new_car_page(row, seed=i * 100))
+    step = max(1, len(used_cars) // per_kind)
+    for i, row in enumerate(used_cars.iloc[::step].head(per_kind).to_dict('records')):
+        _save(root, 'crautos_used', f"{row['Car ID']}", used_car_page(row, seed=i * 100))
+
+    # Listado: el formulario de búsqueda (search.html) y las páginas de resultados pageN.html
+    _save(root, 'crautos_listing', 'search', search_page())
+    car_ids = used_cars['Car ID'].tolist()
+    for page_number in range(1, listing_pages + 1):
+        start = (page_number - 1) * LISTING_CARS_PER_PAGE
+        ids = [car_ids[(start + i) % len(car_ids)] for i in range(LISTING_CARS_PER_PAGE)]
+        _save(root, 'crautos_listing', f"page{page_number}", listing_page(ids, page_number, listing_pages))
+
+    # Las campañas con más sub-ofertas primero
+    groups = sorted(offers.groupby('Main Offer', sort=False), key=lambda group: -len(group[1]))
+    for i, (_, group) in enumerate(groups[:campaigns]):
+        _save(root, 'yuplon_campaign', f"campaign{i}", campaign_page(group.to_dict('records'), seed=i * 100))
+
+    corpus = load_corpus(root)
+    print(", ".join(f"{kind}: {len(pages)} páginas" for kind, pages in corpus.items()))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus de páginas para los benchmarks sin red")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help="Generar el corpus sintético desde los exceles de data/")
+    build_parser.add_argument('--root', default=FIXTURES_DIR)
+    record_parser = subparsers.add_parser('record', help="Grabar páginas reales en el corpus")
+    record_parser.add_argument('kind', choices=KINDS)
+    record_parser.add_argument('urls', nargs='+')
+    record_parser.add_argument('--root', default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build(args.root)
+    else:
+        record(args.kind, args.urls, args.root)
+
+
+if __name__ == "__main__":
+    main()
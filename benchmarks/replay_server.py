@@ -0,0 +1,116 @@
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# Parámetro (query o formulario) con el número de página de resultados, como PAGE_FIELD de car_parsers
+PAGE_PARAM = 'p'
+
+
+class ReplayServer:
+    def __init__(self, corpus, latency=0.0, not_found=(), host='127.0.0.1', port=0):
+        # Servidor HTTP local que responde con las páginas del corpus bajo /<tipo>/...:
+        # - /<tipo>/<nombre> devuelve la página <nombre>.html (p. ej. el formulario de búsqueda)
+        # - si el tipo tiene páginas pageN, el parámetro p (GET o POST) elige la página de resultados
+        # - cualquier otra ruta devuelve siempre la misma página de ese tipo para la misma URL
+        # `latency` (segundos) simula el tiempo de respuesta del sitio real y las rutas de
+        # `not_found` (último segmento, p. ej. un ID) responden 404 como una página dada de baja.
+        self.corpus = {kind: [(name.rsplit('.', 1)[0], html_content.encode('utf-8')) for name, html_content in pages]
+                       for kind, pages in corpus.items()}
+        self.latency = latency
+        self.not_found = set(not_found)
+        # (método, ruta, parámetros) de cada petición atendida
+        self.log = []
+        self.requests = 0
+        self.bytes_sent = 0
+        # Peticiones atendiéndose en este momento y el máximo visto a la vez
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def base_url(self, kind, path=''):
+        return f"{self.url}/{kind}/{path}"
+
+    def page_for(self, path, params=None):
+        # Elegir la página según la ruta y el número de página pedido
+        parts = urlsplit(path)
+        segments = parts.path.strip('/').split('/')
+        pages = self.corpus.get(segments[0])
+        if not pages or segments[-1] in self.not_found:
+            return None
+        by_name = dict(pages)
+        if len(segments) > 1 and segments[-1] in by_name:
+            return by_name[segments[-1]]
+        params = params if params is not None else dict(parse_qsl(parts.query))
+        if "page1" in by_name:
+            return by_name.get(f"page{params.get(PAGE_PARAM, '1')}")
+        return pages[zlib.crc32(path.encode('utf-8')) % len(pages)][1]
+
+    def _handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._reply(dict(parse_qsl(urlsplit(self.path).query)))
+
+            def do_POST(self):
+                # Envío de formulario: los campos vienen en el cuerpo
+                length = int(self.headers.get('Content-Length') or 0)
+                self._reply(dict(parse_qsl(self.rfile.read(length).decode('utf-8'))))
+
+            def _reply(self, params):
+                with replay.lock:
+                    replay.in_flight += 1
+                    replay.max_in_flight = max(replay.max_in_flight, replay.in_flight)
+                try:
+                    if replay.latency:
+                        time.sleep(replay.latency)
+                    body = replay.page_for(self.path, params)
+                finally:
+                    with replay.lock:
+                        replay.in_flight -= 1
+                        replay.log.append((self.command, urlsplit(self.path).path, params))
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with replay.lock:
+                    replay.requests += 1
+                    replay.bytes_sent += len(body)
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,264 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(BENCH_DIR, '..'), os.path.join(BENCH_DIR, '..', 'crautos'),
+                os.path.join(BENCH_DIR, '..', 'yuplon'), BENCH_DIR]
+
+import http_client
+import cr_autos
+from cr_autos import CarDetailsFetcher
+from car_parsers import ListingPageParser
+from campaign_parser import CampaignPageParser
+import data_analysis as da
+import bench_clean
+import bench_parse
+import corpus as fixture_corpus
+from replay_server import ReplayServer
+from synthetic import synthetic_car_details
+
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+DEFAULT_ROWS = (10_000, 100_000, 1_000_000)
+# Latencia simulada por respuesta del servidor local (segundos)
+DEFAULT_LATENCY = 0.02
+# Cambio relativo a partir del cual una métrica cuenta como regresión
+DEFAULT_TOLERANCE = 0.15
+
+
+def best_time(func, repeat):
+    # Mejor tiempo de `repeat` corridas y el resultado de la última
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_fetch(corpus, pages, latency):
+    # Páginas por segundo de CarDetailsFetcher contra el servidor local (descarga + parseo),
+    # con los mismos hilos y procesos de parseo que usa cr_autos.main, sin límite de tasa ni caché
+    http_client.configure_session(pool_size=cr_autos.DETAIL_WORKERS)
+    report = []
+    with ReplayServer(corpus, latency=latency) as server:
+        for kind, is_used in (('crautos_new', False), ('crautos_used', True)):
+            if kind not in corpus:
+                continue
+            base_url = server.base_url(kind, 'cardetail.cfm?c=')
+            requests_before, bytes_before = server.requests, server.bytes_sent
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                rows = list(CarDetailsFetcher.stream_car_details(
+                    range(pages), base_url, is_used, max_workers=cr_autos.DETAIL_WORKERS,
+                    parse_processes=cr_autos.PARSE_PROCESSES))
+            elapsed = time.perf_counter() - start
+            report.append({
+                'name': f'fetch_{kind}',
+                'pages': pages,
+                'rows': len(rows),
+                'latency_ms': latency * 1000,
+                'workers': cr_autos.DETAIL_WORKERS,
+                'requests': server.requests - requests_before,
+                'mb_received': round((server.bytes_sent - bytes_before) / 2 ** 20, 1),
+                'elapsed_s': round(elapsed, 3),
+                'pages_per_s': round(len(rows) / elapsed, 1),
+            })
+    return report
+
+
+def bench_listing(corpus, latency):
+    # IDs por segundo del listado de usados por HTTP (formulario + páginas de resultados),
+    # siguiendo "siguiente" página por página y con las páginas descargadas en paralelo
+    if 'crautos_listing' not in corpus:
+        return []
+    report = []
+    with ReplayServer(corpus, latency=latency) as server:
+        for name, workers in (('listing_http_sequential', 1), ('listing_http_parallel', cr_autos.LISTING_WORKERS)):
+            scraper = cr_autos.UsedCarScraper(driver_path=None, listing_url=server.base_url('crautos_listing', 'search'),
+                                              listing_workers=workers)
+            requests_before = server.requests
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                car_ids = scraper.fetch_car_ids_http()
+            elapsed = time.perf_counter() - start
+            report.append({
+                'name': name,
+                'workers': workers,
+                'latency_ms': latency * 1000,
+                'requests': server.requests - requests_before,
+                'car_ids': len(car_ids),
+                'elapsed_s': round(elapsed, 3),
+            })
+    return report
+
+
+def bench_parsers(corpus, repeat):
+    # µs por página de cada backend de parseo de detalle, del listado y de las campañas
+    detail_pages = [(kind == 'crautos_used', html_content)
+                    for kind in ('crautos_new', 'crautos_used') for _, html_content in corpus.get(kind, [])]
+    report = []
+    if detail_pages:
+        for row in bench_parse.run(detail_pages, repeat):
+            name = f"parse_detail_{row['backend']}{'_strainer' if row['partial'] else ''}"
+            report.append({'name': name, 'pages': len(detail_pages), 'us_per_page': row['us_per_page'],
+                           'speedup': row['speedup'], 'identical': row['identical']})
+
+    for kind, parse in (('crautos_listing', lambda html_content: ListingPageParser.parse_results_page(
+                            html_content, 'https://crautos.com/autosusados/resultados.cfm')),
+                        ('yuplon_campaign', CampaignPageParser.parse)):
+        # El formulario de búsqueda no es una página de resultados
+        pages = [html_content for name, html_content in corpus.get(kind, []) if name != 'search.html']
+        if not pages:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed, _ = best_time(lambda: [parse(html_content) for html_content in pages], repeat)
+        report.append({'name': f'parse_{kind}', 'pages': len(pages),
+                       'us_per_page': round(elapsed / len(pages) * 1e6, 1)})
+    return report
+
+
+def aggregate_cars(df):
+    # Todos los agregados que usan los gráficos de CRautos, calculados desde cero
+    aggregates = da.CarAggregates(df)
+    aggregates.by_year
+    return (aggregates.most_common_models(), aggregates.most_expensive_models(),
+            aggregates.cheapest_models())
+
+
+def aggregate_offers(df):
+    aggregates = da.OfferAggregates(df)
+    return (aggregates.most_discount_offers(), aggregates.least_discount_offers(),
+            aggregates.most_expensive_offers(), aggregates.least_expensive_offers())
+
+
+def bench_data(rows, repeat):
+    # Tiempo de limpieza y de agregación y memoria pico extra a cada tamaño
+    report = []
+    for name, frame, clean, aggregate in (
+            ('cars', synthetic_car_details(rows), da.clean_data, aggregate_cars),
+            ('offers', bench_clean.synthetic_yuplon(rows), da.clean_data_yuplon, aggregate_offers)):
+        clean_s, cleaned = best_time(lambda: clean(frame.copy()), repeat)
+        aggregate_s, _ = best_time(lambda: aggregate(cleaned), repeat)
+        report.append({
+            'name': f'data_{name}_{rows}',
+            'rows': rows,
+            'input_mb': round(float(frame.memory_usage(deep=True).sum()) / 2 ** 20, 1),
+            'clean_s': round(clean_s, 3),
+            'aggregate_s': round(aggregate_s, 4),
+            'clean_peak_mb': round(bench_clean.peak_memory(clean, frame) / 2 ** 20, 1),
+            'aggregate_peak_mb': round(bench_clean.peak_memory(aggregate, cleaned) / 2 ** 20, 1),
+        })
+    return report
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(rows=DEFAULT_ROWS, pages=400, latency=DEFAULT_LATENCY, repeat=3, fixtures=fixture_corpus.FIXTURES_DIR):
+    corpus = fixture_corpus.load_corpus(fixtures)
+    if not corpus:
+        print("No hay corpus, generándolo desde data/")
+        corpus = fixture_corpus.build(fixtures)
+
+    results = []
+    results += bench_fetch(corpus, pages, latency)
+    results += bench_listing(corpus, latency)
+    results += bench_parsers(corpus, repeat)
+    for size in rows:
+        results += bench_data(size, repeat)
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'rows': list(rows), 'pages': pages, 'latency_s': latency, 'repeat': repeat,
+                   'detail_workers': cr_autos.DETAIL_WORKERS, 'parse_processes': cr_autos.PARSE_PROCESSES,
+                   'parser_backend': cr_autos.PARSER_BACKEND},
+        'results': results,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _higher_is_better(metric):
+    return metric.endswith('_per_s') or metric == 'speedup'
+
+
+def _compared_metric(metric):
+    return metric.endswith(('_s', '_us', '_per_page', '_mb')) and metric not in ('input_mb', 'mb_received')
+
+
+def regressions(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    # Métricas que empeoraron más de `tolerance` respecto a un reporte anterior
+    previous = {row['name']: row for row in baseline['results']}
+    found = []
+    for row in report['results']:
+        before = previous.get(row['name'])
+        if before is None:
+            continue
+        for metric, value in row.items():
+            if not _compared_metric(metric) or not isinstance(before.get(metric), (int, float)) \
+                    or not before[metric]:
+                continue
+            change = (value - before[metric]) / before[metric]
+            if _higher_is_better(metric):
+                change = -change
+            if change > tolerance:
+                found.append((row['name'], metric, before[metric], value, change))
+    return found
+
+
+def print_report(report):
+    for row in report['results']:
+        metrics = "  ".join(f"{key}={value}" for key, value in row.items() if key != 'name')
+        print(f"{row['name']:<34} {metrics}")
+    print(f"Memoria pico del proceso: {report['peak_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks sin red: descarga, listado, parseo, limpieza y agregación")
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_ROWS))
+    parser.add_argument('--pages', type=int, default=400, help="Páginas de detalle a descargar por tipo")
+    parser.add_argument('--latency-ms', type=float, default=DEFAULT_LATENCY * 1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--fixtures', default=fixture_corpus.FIXTURES_DIR)
+    parser.add_argument('--output', help="Archivo JSON de resultados (por defecto benchmarks/results/<fecha>.json)")
+    parser.add_argument('--baseline', help="Reporte anterior para detectar regresiones")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    report = run(args.rows, args.pages, args.latency_ms / 1000, args.repeat, args.fixtures)
+    print_report(report)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        found = regressions(report, baseline, args.tolerance)
+        for name, metric, before, after, change in found:
+            print(f"REGRESIÓN {name} {metric}: {before} -> {after} ({change:+.0%})")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import os
+import numpy as np
+import pandas as pd
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'combined_car_details.xlsx')
+
+_template_cache = {}
+
+
+def _template(path):
+    if path not in _template_cache:
+        _template_cache[path] = pd.read_excel(path)
+    return _template_cache[path]
+
+
+def synthetic_car_details(rows, seed=0, template_path=TEMPLATE_PATH):
+    # DataFrame con las mismas columnas que data/combined_car_details.xlsx: cada columna se
+    # muestrea de los valores reales (con su misma proporción de faltantes) y Car ID, Precio
+    # y Año se generan para que haya variedad a cualquier tamaño
+    template = _template(template_path)
+    rng = np.random.default_rng(seed)
+    data = {}
+    for column in template.columns:
+        values = template[column].to_numpy(dtype=object)
+        data[column] = values[rng.integers(0, len(values), rows)]
+
+    prices = rng.integers(5_000, 150_000, rows)
+    precio = pd.Series(prices).map('$ {:,}'.format).to_numpy(dtype=object)
+    nd_share = (template['Precio'] == '$ND').mean()
+    precio[rng.random(rows) < nd_share] = '$ND'
+    data['Precio'] = precio
+    data['Año'] = rng.integers(1995, 2026, rows)
+    data['Car ID'] = rng.permutation(rows) + 1_000_000
+    return pd.DataFrame(data, columns=template.columns)
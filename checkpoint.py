@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+
+# Cada cuántas entradas se fuerza el journal a disco con fsync
+SYNC_EVERY = 50
+
+
+class RunJournal:
+    def __init__(self, path, resume=False, sync_every=SYNC_EVERY):
+        # Journal JSON lines de una corrida: los elementos descubiertos (IDs o enlaces), los que
+        # ya terminaron y sus filas. Con resume=True se continúa el journal existente si la
+        # corrida anterior no terminó; si no, se empieza uno nuevo.
+        self.path = path
+        self.sync_every = sync_every
+        self.lock = threading.Lock()
+        self.started_at = None
+        self.discovered = []
+        self.discovery_complete = False
+        self.completed = set()
+        self.previous_rows = []
+        self.finished = False
+        self.resumed = False
+        self.pending_sync = 0
+
+        if resume and os.path.exists(path):
+            self._load()
+            if self.finished:
+                print(f"La corrida de {path} ya había terminado, empezando de nuevo")
+            else:
+                self.resumed = True
+                print(f"Reanudando {path}: {len(self.discovered)} descubiertos, "
+                      f"{len(self.completed)} terminados, {len(self.previous_rows)} filas")
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if self.resumed:
+            self.file = open(path, 'a', encoding='utf-8')
+        else:
+            self.started_at = time.time()
+            self.discovered, self.discovery_complete = [], False
+            self.completed, self.previous_rows, self.finished = set(), [], False
+            self.file = open(path, 'w', encoding='utf-8')
+            self._write({'event': 'start', 'started_at': self.started_at})
+        if self.started_at is None:
+            self.started_at = time.time()
+        self._discovered_set = set(self.discovered)
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # La última línea puede haber quedado a medias si el proceso murió escribiéndola
+                    break
+                event = entry['event']
+                if event == 'start':
+                    self.started_at = entry['started_at']
+                elif event == 'discovered':
+                    self.discovered.append(entry['key'])
+                elif event == 'discovery_complete':
+                    self.discovery_complete = True
+                elif event == 'completed':
+                    self.completed.add(entry['key'])
+                    self.previous_rows.extend(entry['rows'])
+                elif event == 'finished':
+                    self.finished = True
+
+    def _write(self, entry, sync=False):
+        self.file.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+        self.file.flush()
+        self.pending_sync += 1
+        if sync or self.pending_sync >= self.sync_every:
+            os.fsync(self.file.fileno())
+            self.pending_sync = 0
+
+    def discover(self, discover_items):
+        # Generar los elementos a procesar. Si la corrida anterior terminó de descubrirlos se
+        # reutiliza la lista guardada; si no, se llama a discover_items() y se anota cada uno.
+        if self.discovery_complete:
+            yield from self.discovered
+            return
+        for key in discover_items():
+            key = str(key)
+            with self.lock:
+                if key not in self._discovered_set:
+                    self._discovered_set.add(key)
+                    self.discovered.append(key)
+                    self._write({'event': 'discovered', 'key': key})
+            yield key
+        with self.lock:
+            self.discovery_complete = True
+            self._write({'event': 'discovery_complete'}, sync=True)
+
+    def pending(self, keys):
+        # Saltar los elementos que ya terminaron en la corrida anterior
+        for key in keys:
+            if str(key) not in self.completed:
+                yield key
+
+    def complete(self, key, rows):
+        # Anotar un elemento terminado junto con sus filas
+        key = str(key)
+        with self.lock:
+            self.completed.add(key)
+            self._write({'event': 'completed', 'key': key, 'rows': rows})
+
+    def record(self, rows, key_field):
+        # Anotar cada fila (un elemento por fila) a medida que pasa hacia el siguiente paso
+        for row in rows:
+            self.complete(row[key_field], [row])
+            yield row
+
+    def finish(self):
+        # Marcar la corrida como terminada; un --resume posterior empieza de cero
+        with self.lock:
+            self.finished = True
+            self._write({'event': 'finished'}, sync=True)
+            self.file.close()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.finish()
+        else:
+            self.close()
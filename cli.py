@@ -0,0 +1,253 @@
+import argparse
+import datetime
+import gzip
+import hashlib
+import importlib
+import json
+import os
+import sys
+import threading
+
+# Cada comando importa solo lo que usa: selenium se carga únicamente en discover y fetch, y bs4,
+# pandas y matplotlib dentro de los comandos que los necesitan (sinks carga pyarrow y pandas
+# recién al usarlos), así "parse" y "analyze" desde cron no pagan el costo de los scrapers ni
+# necesitan Chrome.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOURCES = ('crautos_new', 'crautos_used', 'yuplon')
+# Artefactos intermedios de cada fuente: <ARTIFACTS_DIR>/<fuente>/ids.txt y pages/
+ARTIFACTS_DIR = 'artifacts'
+# Salida particionada que escribe "parse" y leen "export" y "analyze" (la misma de los scrapers)
+OUTPUT_FORMAT = 'parquet'
+OUTPUT_DIR = 'output'
+METRICS_PATH = 'metrics/cli_metrics.jsonl'
+# Excel por defecto de cada grupo de fuentes, con los mismos nombres que usan los scrapers
+EXCEL_FILES = {
+    ('crautos_new',): 'new_car_details.xlsx',
+    ('crautos_used',): 'used_car_details.xlsx',
+    ('crautos_new', 'crautos_used'): 'combined_car_details.xlsx',
+    ('yuplon',): 'campaign_data.xlsx',
+}
+# Carpeta de cada módulo de los sitios
+SITE_MODULES = {'cr_autos': 'crautos', 'car_parsers': 'crautos', 'yuplon': 'yuplon', 'campaign_parser': 'yuplon'}
+
+
+def _site_module(name):
+    # Los scrapers y sus parsers viven en crautos/ y yuplon/ y se importan solo en los comandos que los usan
+    folder = os.path.join(ROOT, SITE_MODULES[name])
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    return importlib.import_module(name)
+
+
+def _source_dir(source):
+    return os.path.join(ARTIFACTS_DIR, source)
+
+
+def read_ids(source):
+    with open(os.path.join(_source_dir(source), 'ids.txt'), encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def write_ids(source, ids):
+    # Se escribe a un temporal y se reemplaza para no dejar una lista a medias
+    os.makedirs(_source_dir(source), exist_ok=True)
+    path = os.path.join(_source_dir(source), 'ids.txt')
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        for key in ids:
+            f.write(f"{key}\n")
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+class PageStore:
+    def __init__(self, source):
+        # Páginas descargadas de una fuente: pages/<hash>.html.gz y un índice JSON lines
+        # clave -> archivo. Lo que ya está en el índice no se vuelve a descargar.
+        self.dir = os.path.join(_source_dir(source), 'pages')
+        self.index_path = os.path.join(self.dir, 'index.jsonl')
+        self.lock = threading.Lock()
+        self.files = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Última línea a medias si el proceso murió escribiéndola
+                        break
+                    self.files[entry['key']] = entry['file']
+
+    def __contains__(self, key):
+        return str(key) in self.files
+
+    def __len__(self):
+        return len(self.files)
+
+    def save(self, key, html_content):
+        key = str(key)
+        name = f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.html.gz"
+        os.makedirs(self.dir, exist_ok=True)
+        with gzip.open(os.path.join(self.dir, name), 'wt', encoding='utf-8') as f:
+            f.write(html_content)
+        with self.lock:
+            self.files[key] = name
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, 'file': name}, ensure_ascii=False) + '\n')
+
+    def items(self):
+        # Generar (clave, html) de todas las páginas guardadas
+        for key, name in list(self.files.items()):
+            with gzip.open(os.path.join(self.dir, name), 'rt', encoding='utf-8') as f:
+                yield key, f.read()
+
+
+def discover(args):
+    # Buscar los IDs de carros o los enlaces de campañas y guardarlos en ids.txt
+    import drivers
+    driver_path = drivers.default_driver_path()
+    if args.source == 'yuplon':
+        ids = _site_module('yuplon').discover_campaign_links(driver_path)
+    else:
+        cr_autos = _site_module('cr_autos')
+        scraper_class = cr_autos.NewCarScraper if args.source == 'crautos_new' else cr_autos.UsedCarScraper
+        manager = drivers.get_manager(driver_path=driver_path, config=cr_autos.DRIVER_CONFIG,
+                                      pool_size=cr_autos.DRIVER_POOL_SIZE, max_pages=cr_autos.MAX_PAGES_PER_DRIVER)
+        ids = list(dict.fromkeys(scraper_class(driver_path=driver_path, driver_manager=manager).iter_car_ids()))
+    print(f"{len(ids)} elementos descubiertos en {write_ids(args.source, ids)}")
+
+
+def _fetch_crautos(source, pending, store, workers):
+    import http_cache
+    import http_client
+    from pipeline import stream_map
+    cr_autos = _site_module('cr_autos')
+    is_used = source == 'crautos_used'
+    base_url = cr_autos.USED_CAR_DETAIL_URL if is_used else cr_autos.NEW_CAR_DETAIL_URL
+    http_client.configure_session(pool_size=workers, rate=cr_autos.REQUESTS_PER_SECOND)
+    cache = http_cache.configure_cache(cr_autos.HTTP_CACHE_DIR, ttl_seconds=cr_autos.HTTP_CACHE_TTL_HOURS * 3600,
+                                       max_bytes=cr_autos.HTTP_CACHE_MAX_MB * 1024 * 1024,
+                                       offline=cr_autos.HTTP_CACHE_OFFLINE)
+    pages = stream_map(lambda car_id: (car_id, cr_autos.CarDetailsFetcher.fetch_car_page(
+        car_id, base_url, is_used, cr_autos.MAX_REQUESTS_PER_HOST)), pending, max_workers=workers)
+    for car_id, html_content in pages:
+        if html_content:
+            store.save(car_id, html_content)
+    cache.print_summary()
+
+
+def _fetch_yuplon(pending, store, workers):
+    import drivers
+    yuplon = _site_module('yuplon')
+    pool = yuplon.CampaignScraperPool(driver_path=drivers.default_driver_path(), workers=workers,
+                                      extract=lambda scraper: scraper.capture_page())
+    pool.scrape(pending, on_complete=lambda link, rows: store.save(link, rows[0]['HTML']))
+
+
+def fetch(args):
+    # Descargar las páginas de ids.txt que todavía no están en el almacén de páginas
+    store = PageStore(args.source)
+    pending = [key for key in read_ids(args.source) if key not in store]
+    print(f"{len(pending)} páginas por descargar ({len(store)} ya guardadas)")
+    if args.source == 'yuplon':
+        _fetch_yuplon(pending, store, args.workers or _site_module('yuplon').CAMPAIGN_WORKERS)
+    else:
+        _fetch_crautos(args.source, pending, store, args.workers or _site_module('cr_autos').DETAIL_WORKERS)
+    print(f"{len(store)} páginas guardadas en {store.dir}")
+
+
+def _parse_rows(source, store):
+    if source == 'yuplon':
+        parser = _site_module('campaign_parser').CampaignPageParser
+        for link, html_content in store.items():
+            try:
+                rows = parser.parse(html_content)
+            except Exception as e:
+                print(f"No se pudo parsear la campaña {link}: {e}")
+                continue
+            for row in rows:
+                row['Campaign URL'] = link
+                yield row
+        return
+
+    # parse_car_page anota las páginas que no se pueden parsear y devuelve None
+    parser = _site_module('car_parsers').CarPageParser
+    for car_id, html_content in store.items():
+        car_record = parser.parse_car_page(car_id, html_content, is_used=(source == 'crautos_used'))
+        if car_record is not None:
+            yield car_record.to_row()
+
+
+def parse(args):
+    # Parsear las páginas guardadas y escribir las filas en la salida particionada
+    import sinks
+    store = PageStore(args.source)
+    scrape_date = args.date or datetime.date.today().isoformat()
+    with sinks.open_sink(args.format, args.output_dir, args.source, scrape_date) as sink:
+        sink.write_rows(_parse_rows(args.source, store))
+
+
+def export(args):
+    # Exportar a Excel la última fecha de las fuentes pedidas
+    import sinks
+    sources = tuple(args.sources)
+    filename = args.output or EXCEL_FILES.get(sources) or f"{'_'.join(sources)}.xlsx"
+    sinks.export_excel(args.output_dir, list(sources), filename)
+
+
+def analyze(args):
+    # Limpiar los datos y dibujar los gráficos (solo los que cambiaron)
+    import data_analysis as da
+    if args.site == 'yuplon':
+        df = da.clean_data_yuplon(da.load_data(args.output_dir, source='yuplon'))
+        rendered = da.plot_offer_trends(df)
+    else:
+        df = da.clean_data(da.load_data(args.output_dir, source=['crautos_new', 'crautos_used']))
+        rendered = da.plot_car_trends(df)
+    print(f"{len(rendered)} gráficos actualizados")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scrapers de CRautos y Yuplon por etapas")
+    parser.add_argument('--metrics', default=METRICS_PATH, help="Archivo de métricas de la corrida")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    command = subparsers.add_parser('discover', help="Buscar IDs/enlaces y guardarlos en ids.txt")
+    command.add_argument('source', choices=SOURCES)
+    command.set_defaults(func=discover)
+
+    command = subparsers.add_parser('fetch', help="Descargar las páginas que faltan de ids.txt")
+    command.add_argument('source', choices=SOURCES)
+    command.add_argument('--workers', type=int)
+    command.set_defaults(func=fetch)
+
+    command = subparsers.add_parser('parse', help="Parsear las páginas guardadas a la salida particionada")
+    command.add_argument('source', choices=SOURCES)
+    command.add_argument('--date', help="Fecha de la partición (por defecto hoy)")
+    command.add_argument('--format', choices=('parquet', 'csv'), default=OUTPUT_FORMAT)
+    command.add_argument('--output-dir', default=OUTPUT_DIR)
+    command.set_defaults(func=parse)
+
+    command = subparsers.add_parser('export', help="Exportar la última fecha a Excel")
+    command.add_argument('sources', nargs='+', choices=SOURCES)
+    command.add_argument('--output', help="Archivo .xlsx")
+    command.add_argument('--output-dir', default=OUTPUT_DIR)
+    command.set_defaults(func=export)
+
+    command = subparsers.add_parser('analyze', help="Limpiar y graficar desde la salida particionada")
+    command.add_argument('site', choices=('crautos', 'yuplon'))
+    command.add_argument('--output-dir', default=OUTPUT_DIR)
+    command.set_defaults(func=analyze)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    import metrics
+    with metrics.timer('stage_seconds', stage=args.command):
+        args.func(args)
+    metrics.registry.export(args.metrics, run=f"cli_{args.command}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+import re
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+import metrics
+from records import NewCarRecord, UsedCarRecord
+
+# Parseo de las páginas de CRautos sin Selenium ni pandas: lo usan cr_autos.py, los procesos
+# de parseo y "cli.py parse", que así no cargan el navegador.
+
+# Parser de las páginas de detalle: 'lxml', 'html.parser' o 'selectolax'
+PARSER_BACKEND = 'lxml' if builder_registry.lookup('lxml') else 'html.parser'
+# Construir solo #fichatecnica, div.header-text y div.tab-content en vez del documento completo.
+# Es el valor por defecto de `partial`; los procesos de parseo lo reciben como argumento.
+PARTIAL_PARSE = True
+# Campo del formulario de búsqueda que indica la página de resultados
+PAGE_FIELD = "p"
+
+
+class ListingParseError(ValueError):
+    # La página del listado no tiene la estructura esperada (el sitio cambió o llegó otra página)
+    pass
+
+
+@dataclass
+class ResultsPage:
+    # Lo que se lee de una página de resultados: sus IDs, el total de páginas y la siguiente
+    # (una URL real, o el número de página para reenviar el formulario)
+    __slots__ = ('car_ids', 'total_pages', 'next_url', 'next_page_number')
+    car_ids: list
+    total_pages: int
+    next_url: str
+    next_page_number: int
+
+
+class ListingPageParser:
+    @staticmethod
+    def _soup(html_content):
+        # Las páginas del listado se leen con BeautifulSoup; con 'selectolax' se usa lxml si está
+        backend = PARSER_BACKEND
+        if backend == 'selectolax':
+            backend = 'lxml' if builder_registry.lookup('lxml') else 'html.parser'
+        return BeautifulSoup(html_content, backend)
+
+    @staticmethod
+    def parse_search_form(html_content, page_url):
+        # Leer el formulario #searchform: URL de envío, método y valores por defecto
+        soup = ListingPageParser._soup(html_content)
+        form = soup.find(id="searchform")
+        if form is None:
+            raise ListingParseError("No se encontró el formulario de búsqueda")
+
+        fields = {}
+        for element in form.find_all(['input', 'select']):
+            name = element.get('name')
+            if not name:
+                continue
+            if element.name == 'select':
+                options = element.find_all('option')
+                selected = element.find('option', selected=True) or (options[0] if options else None)
+                fields[name] = selected.get('value', selected.text.strip()) if selected else ""
+            elif element.get('type', 'text').lower() in ('checkbox', 'radio'):
+                if element.has_attr('checked'):
+                    fields[name] = element.get('value', 'on')
+            elif element.get('type', 'text').lower() not in ('submit', 'button', 'image', 'reset'):
+                fields[name] = element.get('value', "")
+
+        action = urljoin(page_url, form.get('action') or page_url)
+        method = (form.get('method') or 'get').upper()
+        return form, action, method, fields
+
+    @staticmethod
+    def select_option(select, value=None, text=None):
+        # Devolver (nombre, valor) de la opción elegida de un <select>, por valor o por texto visible
+        for option in select.find_all('option'):
+            option_value = option.get('value', option.text.strip())
+            if (value is not None and option_value == value) or \
+                    (text is not None and option.text.strip() == text):
+                return select.get('name'), option_value
+        raise ListingParseError(f"Opción no encontrada en el campo {select.get('name')}: {value or text}")
+
+    @staticmethod
+    def used_car_search_fields(html_content, page_url, from_year):
+        # Llenar el formulario igual que la búsqueda en Selenium: año desde, orden por "Año" y "Solo usados"
+        form, action, method, fields = ListingPageParser.parse_search_form(html_content, page_url)
+        try:
+            table = form.find('div', recursive=False).find_all('div', recursive=False)[1].find('table')
+            rows = table.find_all('tr')
+            for row_index, value, text in ((0, from_year, None), (4, None, "Año"), (5, None, "Solo usados")):
+                select = rows[row_index].find_all('td')[1].find('select')
+                name, option_value = ListingPageParser.select_option(select, value=value, text=text)
+                fields[name] = option_value
+            button = rows[7].find('button')
+        except (AttributeError, IndexError) as e:
+            # Falta alguna fila, celda o <select> donde la búsqueda con Selenium los espera
+            raise ListingParseError(f"El formulario de búsqueda cambió de estructura: {e!r}") from e
+
+        # El botón de buscar puede enviar su propio nombre/valor
+        if button is not None and button.get('name'):
+            fields[button['name']] = button.get('value', "")
+        return action, method, fields
+
+    @staticmethod
+    def parse_results_page(html_content, page_url):
+        # Leer una página de resultados con un solo parseo: los IDs de los enlaces dentro de
+        # "brandtitle", el total de páginas (el mayor número de la paginación) y el enlace "siguiente"
+        soup = ListingPageParser._soup(html_content)
+        car_ids = []
+        for car in soup.find_all(class_='brandtitle'):
+            link = car.find('a')
+            if link is not None and '=' in link.get('href', ''):
+                car_ids.append(link['href'].split('=')[1].split('&')[0])
+
+        page_numbers = [int(link.text.strip()) for link in soup.select('li.page-item a')
+                        if link.text.strip().isdigit()]
+        next_url, next_page_number = ListingPageParser._next_page(soup.select_one('li.page-item.page-next a'),
+                                                                  page_url)
+        return ResultsPage(car_ids, max(page_numbers, default=1), next_url, next_page_number)
+
+    @staticmethod
+    def _next_page(next_link, page_url):
+        if next_link is None:
+            return None, None
+        href = next_link.get('href', '').strip()
+        if href and not href.startswith(('#', 'javascript:')):
+            return urljoin(page_url, href), None
+        match = re.search(r'(\d+)', f"{href} {next_link.get('onclick', '')}")
+        if match:
+            return None, int(match.group(1))
+        return None, None
+
+    @staticmethod
+    def page_url(url, page_number):
+        # Construir la URL de una página cambiando el parámetro de página
+        parts = urlsplit(url)
+        query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                 if key != PAGE_FIELD]
+        query.append((PAGE_FIELD, str(page_number)))
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class CarPageParser:
+    @staticmethod
+    def _strainer(*class_names, element_id=None):
+        # Parseo parcial: solo se construyen los elementos con ese id o esas clases (y su contenido)
+        def matches(name, attrs):
+            if element_id is not None and attrs.get('id') == element_id:
+                return True
+            classes = attrs.get('class') or ''
+            if not isinstance(classes, str):
+                classes = ' '.join(classes)
+            return name == 'div' and any(c in classes.split() for c in class_names)
+        return SoupStrainer(matches)
+
+    @staticmethod
+    def _used_car_price(price_text):
+        # Normalizar el precio del encabezado a dólares ("¢" se convierte con tipo de cambio 530)
+        price_text = price_text.replace("(", "").replace(")", "").replace("*", "").replace("$", "").strip()
+        price_text = price_text.replace(",", "")
+        if "¢" in price_text:
+            price_in_colones = int(price_text.replace("¢", "").strip())
+            price_in_dollars = price_in_colones // 530
+            return f"$ {price_in_dollars:,}"
+        return f"$ {int(price_text):,}"
+
+    @staticmethod
+    def _add_version_and_year(car_details, version_text):
+        parts = version_text.split()
+        if len(parts) >= 3:
+            car_details["Año"] = parts[-1]
+            car_details["Version"] = " ".join(parts[:-1])
+
+    @staticmethod
+    def parse_new_car_details(html_content, backend=None, partial=None):
+        # Parsear detalles de un carro nuevo
+        backend = backend or PARSER_BACKEND
+        if backend == 'selectolax':
+            return CarPageParser._parse_new_car_details_selectolax(html_content)
+
+        strainer = CarPageParser._strainer("header-text", element_id="fichatecnica")
+        partial = PARTIAL_PARSE if partial is None else partial
+        soup = BeautifulSoup(html_content, backend, parse_only=strainer if partial else None)
+        fichatecnica = soup.find(id="fichatecnica")
+        car_details = {}
+
+        if fichatecnica:
+            rows = fichatecnica.find_all('tr')
+            for row in rows:
+                columns = row.find_all('td')
+                if len(columns) == 2:
+                    key = columns[0].text.strip()
+                    value = columns[1].text.strip()
+                    car_details[key] = value
+
+        banner = soup.find("div", class_="header-text")
+        if banner:
+            version = banner.find("h2").text.strip()
+            car_details["Version"] = version
+
+        return car_details
+
+    @staticmethod
+    def parse_used_car_details(html_content, backend=None, partial=None):
+        # Parsear detalles de un carro usado
+        backend = backend or PARSER_BACKEND
+        if backend == 'selectolax':
+            return CarPageParser._parse_used_car_details_selectolax(html_content)
+
+        strainer = CarPageParser._strainer("header-text", "tab-content")
+        partial = PARTIAL_PARSE if partial is None else partial
+        soup = BeautifulSoup(html_content, backend, parse_only=strainer if partial else None)
+        car_details = {}
+
+        header_text = soup.find("div", class_="header-text")
+        if header_text:
+            car_header = header_text.find("div", class_="carheader")
+            if car_header:
+                CarPageParser._add_version_and_year(car_details, car_header.find("h1").text.strip())
+
+                price_in_dollars_element = car_header.find("h3")
+                if price_in_dollars_element:
+                    car_details["Precio"] = CarPageParser._used_car_price(
+                        price_in_dollars_element.text.strip())
+
+        tab_content = soup.find("div", class_="tab-content")
+        if tab_content:
+            general_info_table = tab_content.find("div", id="tab-1").find("table")
+            for row in general_info_table.find_all("tr"):
+                cells = row.find_all("td")
+                if len(cells) == 2:
+                    car_details[cells[0].text.strip()] = cells[1].text.strip()
+
+        return car_details
+
+    @staticmethod
+    def _selectolax_tree(html_content):
+        if SelectolaxParser is None:
+            raise ValueError("El backend 'selectolax' requiere instalar selectolax")
+        return SelectolaxParser(html_content)
+
+    @staticmethod
+    def _parse_new_car_details_selectolax(html_content):
+        # Misma lógica que parse_new_car_details sobre el árbol de selectolax
+        tree = CarPageParser._selectolax_tree(html_content)
+        car_details = {}
+
+        fichatecnica = tree.css_first("#fichatecnica")
+        if fichatecnica:
+            for row in fichatecnica.css('tr'):
+                columns = row.css('td')
+                if len(columns) == 2:
+                    car_details[columns[0].text().strip()] = columns[1].text().strip()
+
+        banner = tree.css_first("div.header-text")
+        if banner:
+            car_details["Version"] = banner.css_first("h2").text().strip()
+
+        return car_details
+
+    @staticmethod
+    def _parse_used_car_details_selectolax(html_content):
+        # Misma lógica que parse_used_car_details sobre el árbol de selectolax
+        tree = CarPageParser._selectolax_tree(html_content)
+        car_details = {}
+
+        header_text = tree.css_first("div.header-text")
+        if header_text:
+            car_header = header_text.css_first("div.carheader")
+            if car_header:
+                CarPageParser._add_version_and_year(car_details, car_header.css_first("h1").text().strip())
+
+                price_in_dollars_element = car_header.css_first("h3")
+                if price_in_dollars_element:
+                    car_details["Precio"] = CarPageParser._used_car_price(
+                        price_in_dollars_element.text().strip())
+
+        tab_content = tree.css_first("div.tab-content")
+        if tab_content:
+            general_info_table = tab_content.css_first("div#tab-1").css_first("table")
+            for row in general_info_table.css("tr"):
+                cells = row.css("td")
+                if len(cells) == 2:
+                    car_details[cells[0].text().strip()] = cells[1].text().strip()
+
+        return car_details
+
+    @staticmethod
+    def parse_car_page(car_id, html_content, is_used=False, backend=None, partial=None):
+        # Parsear una página de detalle y normalizar sus valores en un registro tipado.
+        # Una página que no se puede parsear se anota y devuelve None para no cortar la corrida.
+        page = 'car_used' if is_used else 'car_new'
+        try:
+            with metrics.timer('parse_seconds', page=page):
+                if is_used:
+                    car_details = CarPageParser.parse_used_car_details(html_content, backend, partial)
+                    return UsedCarRecord.from_details(car_id, car_details)
+                car_details = CarPageParser.parse_new_car_details(html_content, backend, partial)
+                return NewCarRecord.from_details(car_id, car_details)
+        except Exception as e:
+            metrics.inc('parse_failures_total', page=page)
+            print(f"No se pudo parsear la página del carro {car_id} ({page}): {type(e).__name__}: {e}")
+            return None
+
+    @staticmethod
+    def parse_car_pages(pages, is_used=False, backend=None, partial=None):
+        # Parsear un lote de (car_id, html); se ejecuta en los procesos de parseo y
+        # devuelve registros compactos (sin las páginas que fallaron)
+        car_records = (CarPageParser.parse_car_page(car_id, html_content, is_used, backend, partial)
+                       for car_id, html_content in pages)
+        return [car_record for car_record in car_records if car_record is not None]
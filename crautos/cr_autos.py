@@ -1,165 +1,261 @@
+import argparse
+import datetime
 import os
-import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.select import Select
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import data_analysis as da
+from checkpoint import RunJournal
+import drivers
+import http_cache
+import http_client
+import metrics
+from history_store import HistoryStore
+import sinks
+from car_parsers import (PAGE_FIELD, PARSER_BACKEND, PARTIAL_PARSE, CarPageParser, ListingPageParser,
+                         ListingParseError)
+from waits import Waiter, wait_metrics
+from pipeline import batched, iter_in_thread, stream_map
+from state_store import CarStateStore
 
 FROM_YEAR = "2024"
+# Concurrencia para la descarga de detalles
+DETAIL_WORKERS = 8
+MAX_REQUESTS_PER_HOST = 4
+# Procesos para parsear el HTML (0 = parsear en los mismos hilos de descarga)
+PARSE_PROCESSES = 0
+PARSE_BATCH_SIZE = 20
+# Límite de peticiones por segundo hacia crautos.com
+REQUESTS_PER_SECOND = 10
+# Caché en disco de las páginas de detalle: vigencia, tamaño máximo y modo solo-caché (sin red)
+HTTP_CACHE_DIR = 'http_cache'
+HTTP_CACHE_TTL_HOURS = 24
+HTTP_CACHE_MAX_MB = 500
+HTTP_CACHE_OFFLINE = False
+# Journal de cada corrida para poder reanudarla con --resume
+CHECKPOINT_DIR = 'checkpoints'
+# Historial con una foto de los carros de cada corrida (precios entre corridas)
+HISTORY_DB_PATH = 'history.db'
+# Métricas de la corrida (tiempos por etapa, peticiones, bytes, fallas): JSON lines, o el
+# formato de texto de Prometheus si el archivo termina en .prom
+METRICS_PATH = 'metrics/crautos_metrics.jsonl'
+# Estado incremental: solo se descargan IDs nuevos o con más de STATE_TTL_HOURS
+STATE_DB_PATH = 'car_state.db'
+STATE_TTL_HOURS = 24
+# Salida principal: 'parquet' o 'csv', particionada por fuente y fecha dentro de OUTPUT_DIR
+OUTPUT_FORMAT = 'parquet'
+OUTPUT_DIR = 'output'
+# Exportar también los archivos Excel de siempre
+EXPORT_EXCEL = True
+# Listado de carros usados (se puede apuntar a un servidor local con HTML guardado)
+USED_LISTING_URL = "https://crautos.com/autosusados/"
+# Páginas de detalle: se les agrega el ID del carro
+NEW_CAR_DETAIL_URL = "https://crautos.com/autosnuevos/cardetail.cfm?c="
+USED_CAR_DETAIL_URL = "https://crautos.com/autosusados/cardetail.cfm?c="
+# Páginas de resultados descargadas en paralelo al buscar IDs de carros usados
+LISTING_WORKERS = 4
+# Chrome sin ventana, sin imágenes/fuentes/anuncios y con un perfil reutilizable entre corridas
+DRIVER_CONFIG = drivers.DriverConfig(headless=True, profile_dir='chrome_profile/crautos')
+# Navegadores compartidos entre scrapers y páginas que carga cada uno antes de reemplazarlo
+DRIVER_POOL_SIZE = 1
+MAX_PAGES_PER_DRIVER = drivers.MAX_PAGES_PER_DRIVER
 
 class WebScraper:
-    def __init__(self, driver_path):
+    def __init__(self, driver_path, driver_config=None, driver_manager=None):
         self.driver_path = driver_path
-        self.driver = self._initialize_driver()
+        self.driver_config = driver_config or DRIVER_CONFIG
+        # Con driver_manager el navegador se toma prestado de un pool compartido
+        self.driver_manager = driver_manager
+        self._driver = None
+        self._waiter = None
+        self.pages_loaded = 0
+
+    @property
+    def driver(self):
+        # Iniciar (o tomar del pool) Chrome solo cuando realmente se necesita
+        if self._driver is None:
+            self._driver = self._initialize_driver()
+            self.pages_loaded = 0
+        return self._driver
+
+    @property
+    def waiter(self):
+        # Esperas por condiciones explícitas sobre el driver actual
+        if self._waiter is None or self._waiter.driver is not self.driver:
+            self._waiter = Waiter(self.driver)
+        return self._waiter
 
     def _initialize_driver(self):
         # Inicializar el WebDriver con el binario de Chrome personalizado
-        service = ChromeService(executable_path=self.driver_path)
-        driver = webdriver.Chrome(service=service)
-        return driver
+        if self.driver_manager is not None:
+            return self.driver_manager.acquire()
+        return drivers.create_driver(self.driver_path, self.driver_config)
 
     def open_website(self, url):
         # Abrir el sitio web
-        self.driver.get(url)
+        with metrics.timer('browser_navigation_seconds', scraper=type(self).__name__):
+            self.driver.get(url)
+        self.pages_loaded += 1
 
-    def wait_for_element(self, by, value, timeout=10):
+    def wait_for_element(self, by, value, timeout=None):
         # Esperar a que un elemento esté presente en la página
-        WebDriverWait(self.driver, timeout).until(
-            EC.presence_of_element_located((by, value))
-        )
+        return self.waiter.for_element(by, value, timeout)
+
+    def iter_car_ids(self):
+        # Generar IDs de carros; por defecto a partir de la lista completa
+        try:
+            yield from self.fetch_car_ids()
+        finally:
+            self.close_driver()
 
     def close_driver(self):
-        # Cerrar el WebDriver
-        self.driver.quit()
+        # Cerrar el WebDriver si se llegó a iniciar, o devolverlo al pool para el siguiente scraper
+        if self._driver is None:
+            return
+        if self.driver_manager is not None:
+            self.driver_manager.release(self._driver, pages=self.pages_loaded)
+        else:
+            self._driver.quit()
+        self._driver = None
 
-class CarDetailsFetcher:
+class CarDetailsFetcher(CarPageParser):
+    # Descarga de las páginas de detalle; el parseo se hereda de CarPageParser
     @staticmethod
     def fetch_html_content(url):
-        # Obtener el contenido HTML de una URL
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.text
+        # Obtener el contenido HTML de una URL usando la sesión HTTP compartida
+        # (y la caché en disco si está configurada)
+        cache = http_cache.get_cache()
+        try:
+            if cache is not None:
+                status_code, text = cache.fetch(url, http_client.get_session())
+            else:
+                response = http_client.get_session().get(url)
+                status_code, text = response.status_code, response.text
+        except (requests.RequestException, http_cache.CacheMiss) as e:
+            metrics.inc('fetch_failures_total', reason=type(e).__name__)
+            print(f"Fallo al obtener la página {url}. Excepción: {e}")
+            return None
+        if status_code == 200:
+            return text
         else:
-            print(f"Fallo al obtener la página. Código de estado: {response.status_code}")
+            metrics.inc('fetch_failures_total', reason=status_code)
+            print(f"Fallo al obtener la página. Código de estado: {status_code}")
             return None
 
+    _host_semaphores = {}
+    _host_semaphores_lock = threading.Lock()
+
     @staticmethod
-    def parse_new_car_details(html_content):
-        # Parsear detalles de un carro nuevo
-        soup = BeautifulSoup(html_content, 'html.parser')
-        fichatecnica = soup.find(id="fichatecnica")
-        car_details = {}
-
-        if fichatecnica:
-            rows = fichatecnica.find_all('tr')
-            for row in rows:
-                columns = row.find_all('td')
-                if len(columns) == 2:
-                    key = columns[0].text.strip()
-                    value = columns[1].text.strip()
-                    car_details[key] = value
-
-        banner = soup.find("div", class_="header-text")
-        if banner:
-            version = banner.find("h2").text.strip()
-            car_details["Version"] = version
-
-        return car_details
+    def _host_semaphore(url, max_per_host):
+        # Obtener el semáforo que limita las peticiones simultáneas a un mismo host
+        key = (urlsplit(url).netloc, max_per_host)
+        with CarDetailsFetcher._host_semaphores_lock:
+            semaphore = CarDetailsFetcher._host_semaphores.get(key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(max_per_host)
+                CarDetailsFetcher._host_semaphores[key] = semaphore
+        return semaphore
 
     @staticmethod
-    def parse_used_car_details(html_content):
-        # Parsear detalles de un carro usado
-        soup = BeautifulSoup(html_content, 'html.parser')
-        car_details = {}
-
-        header_text = soup.find("div", class_="header-text")
-        if header_text:
-            car_header = header_text.find("div", class_="carheader")
-            if car_header:
-                version_text = car_header.find("h1").text.strip()
-                parts = version_text.split()
-                if len(parts) >= 3:
-                    year = parts[-1]
-                    version = " ".join(parts[:-1])
-                    car_details["Año"] = year
-                    car_details["Version"] = version
-
-                price_in_dollars_element = car_header.find("h3")
-                if price_in_dollars_element:
-                    price_text = price_in_dollars_element.text.strip()
-                    price_text = price_text.replace("(", "").replace(")", "").replace("*", "").replace("$", "").strip()
-                    price_text = price_text.replace(",", "")
-                    if "¢" in price_text:
-                        price_in_colones = int(price_text.replace("¢", "").strip())
-                        price_in_dollars = price_in_colones // 530
-                        car_details["Precio"] = f"$ {price_in_dollars:,}"
-                    else:
-                        car_details["Precio"] = f"$ {int(price_text):,}"
-
-        tab_content = soup.find("div", class_="tab-content")
-        if tab_content:
-            general_info_table = tab_content.find("div", id="tab-1").find("table")
-            for row in general_info_table.find_all("tr"):
-                cells = row.find_all("td")
-                if len(cells) == 2:
-                    car_details[cells[0].text.strip()] = cells[1].text.strip()
-
-        return car_details
+    def fetch_car_page(car_id, base_url, is_used=False, max_per_host=None):
+        # Descargar el HTML de la página de detalle de un carro
+        url = f"{base_url}{car_id}"
+        if max_per_host:
+            with CarDetailsFetcher._host_semaphore(url, max_per_host):
+                html_content = CarDetailsFetcher.fetch_html_content(url)
+        else:
+            html_content = CarDetailsFetcher.fetch_html_content(url)
+        if html_content:
+            print(f"Obteniendo detalles para el carro {'USADO' if is_used else 'NUEVO'} con ID {car_id}")
+        return html_content
 
     @staticmethod
-    def fetch_car_details(car_ids, base_url, is_used=False):
-        # Obtener detalles de los carros
-        car_details_list = []
+    def fetch_car_detail(car_id, base_url, is_used=False, max_per_host=None):
+        # Obtener y parsear los detalles de un solo carro; None si no se pudo descargar o parsear
+        html_content = CarDetailsFetcher.fetch_car_page(car_id, base_url, is_used, max_per_host)
+        if not html_content:
+            return None
+        return CarDetailsFetcher.parse_car_page(car_id, html_content, is_used)
 
-        for car_id in car_ids:
-            url = f"{base_url}{car_id}"
-            html_content = CarDetailsFetcher.fetch_html_content(url)
-            if html_content:
-                print(f"Obteniendo detalles para el carro {'USADO' if is_used else 'NUEVO'} con ID {car_id}")
-                if is_used:
-                    car_details = CarDetailsFetcher.parse_used_car_details(html_content)
-                else:
-                    car_details = CarDetailsFetcher.parse_new_car_details(html_content)
-                car_details['Car ID'] = car_id
-                car_details_list.append(car_details)
+    @staticmethod
+    def stream_car_details(car_ids, base_url, is_used=False, max_workers=1,
+                           max_per_host=MAX_REQUESTS_PER_HOST, parse_processes=0,
+                           parse_batch_size=PARSE_BATCH_SIZE):
+        # Generar las filas tipadas de los carros a medida que se descargan, en paralelo si
+        # max_workers > 1. car_ids puede ser un generador; los resultados conservan su orden.
+        # Con parse_processes > 0 los hilos solo descargan y el HTML se parsea por lotes
+        # en un pool de procesos.
+        if parse_processes > 0:
+            yield from CarDetailsFetcher._stream_with_parse_processes(
+                car_ids, base_url, is_used, max_workers, max_per_host, parse_processes,
+                parse_batch_size)
+            return
+
+        if max_workers <= 1:
+            results = (CarDetailsFetcher.fetch_car_detail(car_id, base_url, is_used)
+                       for car_id in car_ids)
+        else:
+            results = stream_map(
+                lambda car_id: CarDetailsFetcher.fetch_car_detail(car_id, base_url, is_used,
+                                                                  max_per_host),
+                car_ids, max_workers=max_workers)
 
-        return car_details_list
+        for car_record in results:
+            if car_record is not None:
+                yield car_record.to_row()
 
-class DataManager:
     @staticmethod
-    def save_to_excel(data, filename):
-        # Guardar los datos en un archivo Excel
-        df = pd.DataFrame(data)
-        df.to_excel(filename, index=False)
-        print(f"Datos guardados exitosamente en {filename}")
+    def _stream_with_parse_processes(car_ids, base_url, is_used, max_workers, max_per_host,
+                                     parse_processes, parse_batch_size):
+        pages = stream_map(
+            lambda car_id: (car_id, CarDetailsFetcher.fetch_car_page(car_id, base_url, is_used,
+                                                                     max_per_host)),
+            car_ids, max_workers=max(1, max_workers))
+        pages = ((car_id, html_content) for car_id, html_content in pages if html_content)
+
+        # El backend y el parseo parcial se pasan explícitos porque los procesos hijos (spawn) no
+        # heredan la configuración. Cada lote devuelve también las métricas del proceso hijo para
+        # sumarlas a las de aquí; las páginas que no se pudieron parsear ya vienen descartadas.
+        parse_batch = partial(metrics.call_collecting, CarDetailsFetcher.parse_car_pages, is_used=is_used,
+                              backend=PARSER_BACKEND, partial=PARTIAL_PARSE)
+        with ProcessPoolExecutor(max_workers=parse_processes) as executor:
+            for car_record_batch, batch_metrics in stream_map(parse_batch, batched(pages, parse_batch_size),
+                                                              max_pending=parse_processes * 2,
+                                                              executor=executor):
+                metrics.registry.merge(batch_metrics)
+                for car_record in car_record_batch:
+                    yield car_record.to_row()
 
     @staticmethod
-    def merge_dataframes(new_car_details, used_car_details, filename):
-        # Fusionar DataFrames y guardar en un archivo Excel
-        new_cars_df = pd.DataFrame(new_car_details)
-        used_cars_df = pd.DataFrame(used_car_details)
-        combined_df = pd.concat([new_cars_df, used_cars_df], ignore_index=True, sort=False)
-        combined_df.to_excel(filename, index=False)
-        print(f"Datos combinados guardados exitosamente en {filename}")
+    def fetch_car_details(car_ids, base_url, is_used=False, max_workers=1,
+                          max_per_host=MAX_REQUESTS_PER_HOST, parse_processes=0):
+        # Obtener detalles de los carros como lista
+        return list(CarDetailsFetcher.stream_car_details(car_ids, base_url, is_used, max_workers,
+                                                         max_per_host, parse_processes))
+
+class DataManager:
+    @staticmethod
+    def export_excel(dataset_root, sources, filename):
+        # Exportar a Excel la última fecha de las fuentes dadas desde la salida particionada
+        sinks.export_excel(dataset_root, sources, filename)
 
 class NewCarScraper(WebScraper):
     def fetch_car_ids(self):
         # Obtener IDs de carros nuevos
         self.open_website("https://crautos.com/autosnuevos/")
-        time.sleep(5)
-        buscar_button = WebDriverWait(self.driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "/html/body/section[3]/div/div/div/div/form/table/tbody/tr[8]/td/input"))
-        )
+        self.waiter.for_document_ready()
+        buscar_xpath = "/html/body/section[3]/div/div/div/div/form/table/tbody/tr[8]/td/input"
+        buscar_button = self.waiter.for_element(By.XPATH, buscar_xpath, clickable=True)
         self.driver.execute_script("arguments[0].scrollIntoView();", buscar_button)
-        time.sleep(1)
+        buscar_button = self.waiter.for_element(By.XPATH, buscar_xpath, clickable=True)
         buscar_button.click()
-        time.sleep(3)
+        # Esperar a que la lista de resultados deje de crecer; si no aparece ningún resultado
+        # la búsqueda no trajo carros y se devuelve la lista vacía
+        if self.waiter.for_element(By.CLASS_NAME, 'dealerhlcar', raise_on_timeout=False):
+            self.waiter.for_count_stable(By.CLASS_NAME, 'dealerhlcar')
         print(self.driver.title)
 
         car_elements = self.driver.find_elements(By.CLASS_NAME, 'dealerhlcar')
@@ -172,12 +268,122 @@ class NewCarScraper(WebScraper):
         return car_ids
 
 class UsedCarScraper(WebScraper):
+    def __init__(self, driver_path, listing_url=USED_LISTING_URL, use_http=True,
+                 listing_workers=LISTING_WORKERS, driver_config=None, driver_manager=None):
+        super().__init__(driver_path, driver_config, driver_manager)
+        self.listing_url = listing_url
+        self.use_http = use_http
+        self.listing_workers = listing_workers
+
     def fetch_car_ids(self):
+        # Obtener la lista completa de IDs de carros usados
+        car_ids = list(self.iter_car_ids())
+        print(f"Total de IDs de carros extraídos: {len(car_ids)}")
+        print(car_ids)
+        return car_ids
+
+    def iter_car_ids(self):
+        # Generar IDs de carros usados a medida que se descubren, sin repetidos:
+        # primero por HTTP y con Selenium como respaldo
+        seen = set()
+        if self.use_http:
+            try:
+                for car_id in self.iter_car_ids_http():
+                    if car_id not in seen:
+                        seen.add(car_id)
+                        yield car_id
+                if seen:
+                    self.close_driver()
+                    return
+                print("El listado por HTTP no devolvió IDs, usando Selenium")
+            except (requests.RequestException, ListingParseError) as e:
+                # Solo la red o un listado con otra estructura pasan a Selenium; cualquier otro
+                # error es un bug y se deja subir
+                print(f"Fallo el listado por HTTP, usando Selenium. Excepción: {e}")
+
+        try:
+            for car_id in self.fetch_car_ids_selenium():
+                if car_id not in seen:
+                    seen.add(car_id)
+                    yield car_id
+        finally:
+            self.close_driver()
+
+    def iter_car_ids_http(self):
+        # Enviar el formulario de búsqueda y recorrer las páginas de resultados sin navegador,
+        # generando los IDs de cada página en orden
+        session = http_client.get_session()
+        response = session.get(self.listing_url)
+        response.raise_for_status()
+        action, method, fields = ListingPageParser.used_car_search_fields(response.text, response.url,
+                                                                          FROM_YEAR)
+
+        response = self._submit_search(session, method, action, fields)
+        first_page = ListingPageParser.parse_results_page(response.text, response.url)
+        if self.listing_workers > 1 and first_page.total_pages > 1:
+            pages = self._fetch_listing_pages_parallel(session, method, action, fields, first_page)
+        else:
+            pages = self._fetch_listing_pages_sequential(session, method, action, fields, response.url,
+                                                         first_page)
+
+        for page_ids in pages:
+            yield from page_ids
+
+    def fetch_car_ids_http(self):
+        # Obtener todos los IDs por HTTP, en el orden de las páginas y sin repetidos
+        return list(dict.fromkeys(self.iter_car_ids_http()))
+
+    def _fetch_listing_pages_sequential(self, session, method, action, fields, page_url, page):
+        # Seguir el enlace "siguiente" página por página; cada página se parsea una sola vez
+        while True:
+            print(f"Página de resultados {page_url}: {len(page.car_ids)} IDs")
+            yield page.car_ids
+
+            if page.next_url:
+                response = session.get(page.next_url)
+            elif page.next_page_number:
+                response = self._submit_search(session, method, action,
+                                               dict(fields, **{PAGE_FIELD: str(page.next_page_number)}))
+            else:
+                break
+            response.raise_for_status()
+            page_url = response.url
+            page = ListingPageParser.parse_results_page(response.text, page_url)
+
+    def _fetch_listing_pages_parallel(self, session, method, action, fields, first_page):
+        # Descargar todas las páginas de resultados a la vez a partir del total de la primera
+        next_url, total_pages = first_page.next_url, first_page.total_pages
+        print(f"Descargando {total_pages} páginas de resultados con {self.listing_workers} hilos")
+
+        def fetch_page(page_number):
+            if next_url:
+                response = session.get(ListingPageParser.page_url(next_url, page_number))
+                response.raise_for_status()
+            else:
+                response = self._submit_search(session, method, action,
+                                               dict(fields, **{PAGE_FIELD: str(page_number)}))
+            page_ids = ListingPageParser.parse_results_page(response.text, response.url).car_ids
+            print(f"Página de resultados {page_number}/{total_pages}: {len(page_ids)} IDs")
+            return page_ids
+
+        yield first_page.car_ids
+        with ThreadPoolExecutor(max_workers=self.listing_workers) as executor:
+            yield from executor.map(fetch_page, range(2, total_pages + 1))
+
+    @staticmethod
+    def _submit_search(session, method, action, fields):
+        # Enviar el formulario de búsqueda como lo haría el navegador
+        if method == 'POST':
+            response = session.post(action, data=fields)
+        else:
+            response = session.get(action, params=fields)
+        response.raise_for_status()
+        return response
+
+    def fetch_car_ids_selenium(self):
         # Obtener IDs de carros usados
-        self.open_website("https://crautos.com/autosusados/")
-        WebDriverWait(self.driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, '//*[@id="searchform"]/div/div[2]/table/tbody/tr[1]/td[2]/select'))
-        )
+        self.open_website(self.listing_url)
+        self.waiter.for_element(By.XPATH, '//*[@id="searchform"]/div/div[2]/table/tbody/tr[1]/td[2]/select')
 
         from_year_dropdown = Select(self.driver.find_element(By.XPATH, '//*[@id="searchform"]/div/div[2]/table/tbody/tr[1]/td[2]/select'))
         from_year_dropdown.select_by_value(FROM_YEAR)
@@ -185,15 +391,12 @@ class UsedCarScraper(WebScraper):
         sort_dropdown.select_by_visible_text("Año")
         solo_usados_dropdown = Select(self.driver.find_element(By.XPATH, '//*[@id="searchform"]/div/div[2]/table/tbody/tr[6]/td[2]/select'))
         solo_usados_dropdown.select_by_visible_text("Solo usados")
-        buscar_button = WebDriverWait(self.driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, '//*[@id="searchform"]/div/div[2]/table/tbody/tr[8]/td/button'))
-        )
+        buscar_xpath = '//*[@id="searchform"]/div/div[2]/table/tbody/tr[8]/td/button'
+        buscar_button = self.waiter.for_element(By.XPATH, buscar_xpath, clickable=True)
         self.driver.execute_script("arguments[0].scrollIntoView();", buscar_button)
-        time.sleep(1)
+        buscar_button = self.waiter.for_element(By.XPATH, buscar_xpath, clickable=True)
         buscar_button.click()
-        WebDriverWait(self.driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, 'brandtitle'))
-        )
+        self.waiter.for_element(By.CLASS_NAME, 'brandtitle')
         print(self.driver.title)
 
         car_ids = []
@@ -205,18 +408,13 @@ class UsedCarScraper(WebScraper):
                 car_ids.append(car_id)
 
             try:
-                next_button = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, 'li.page-item.page-next a'))
-                )
+                next_button = self.waiter.for_element(By.CSS_SELECTOR, 'li.page-item.page-next a',
+                                                      clickable=True)
                 self.driver.execute_script("arguments[0].scrollIntoView();", next_button)
-                time.sleep(1)
                 self.driver.execute_script("arguments[0].click();", next_button)
-                WebDriverWait(self.driver, 10).until(
-                    EC.staleness_of(car_elements[0])
-                )
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, 'brandtitle'))
-                )
+                self.pages_loaded += 1
+                self.waiter.for_staleness(car_elements[0])
+                self.waiter.for_element(By.CLASS_NAME, 'brandtitle')
             except Exception as e:
                 print(f"No hay más páginas. Excepción: {e}")
                 break
@@ -227,38 +425,86 @@ class UsedCarScraper(WebScraper):
         self.close_driver()
         return car_ids
 
-def main():
-    # Obtener el directorio actual del script
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    # Construir la ruta relativa al ejecutable de ChromeDriver
-    chromedriver_path = os.path.join(current_dir, "../chromedriver-mac-arm64/chromedriver")
-    print(f"Usando la ruta de ChromeDriver: {chromedriver_path}")
-
-    # Obtener y guardar detalles de carros nuevos
-    new_car_scraper = NewCarScraper(driver_path=chromedriver_path)
-    new_car_ids = new_car_scraper.fetch_car_ids()
-    new_car_details_list = CarDetailsFetcher.fetch_car_details(new_car_ids, "https://crautos.com/autosnuevos/cardetail.cfm?c=")
-    DataManager.save_to_excel(new_car_details_list, 'new_car_details.xlsx')
-
-    # Obtener y guardar detalles de carros usados
-    used_car_scraper = UsedCarScraper(driver_path=chromedriver_path)
-    used_car_ids = used_car_scraper.fetch_car_ids()
-    used_car_details_list = CarDetailsFetcher.fetch_car_details(used_car_ids, "https://crautos.com/autosusados/cardetail.cfm?c=", is_used=True)
-    DataManager.save_to_excel(used_car_details_list, 'used_car_details.xlsx')
-
-    # Fusionar DataFrames y guardar en un archivo Excel combinado
-    DataManager.merge_dataframes(new_car_details_list, used_car_details_list,
-                                 'combined_car_details.xlsx')
-
-    # Cargar y limpiar los datos combinados
-    combined_df = da.load_data('combined_car_details.xlsx')
-    combined_df = da.clean_data(combined_df)
-
-    # Graficar tendencias
-    da.plot_average_price_by_year(combined_df)
-    da.plot_most_common_models(combined_df, top_n=10)
-    da.plot_most_expensive_models(combined_df, top_n=10)
-    da.plot_cheapest_models(combined_df, top_n=10)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scraper de carros nuevos y usados de CRautos")
+    parser.add_argument('--resume', action='store_true',
+                        help="continuar la última corrida desde su checkpoint sin repetir lo terminado")
+    args = parser.parse_args(argv)
+
+    # ChromeDriver del proyecto para este sistema operativo (o el que resuelva Selenium)
+    chromedriver_path = drivers.default_driver_path()
+    print(f"Usando la ruta de ChromeDriver: {chromedriver_path or 'Selenium Manager'}")
+    # Un solo navegador compartido por los scrapers de nuevos y usados; si el proceso
+    # corre main() varias veces lo sigue reutilizando
+    driver_manager = drivers.get_manager(driver_path=chromedriver_path, config=DRIVER_CONFIG,
+                                         pool_size=DRIVER_POOL_SIZE, max_pages=MAX_PAGES_PER_DRIVER)
+
+    # Sesión HTTP compartida con pool de conexiones, reintentos y límite de peticiones
+    http_client.configure_session(pool_size=DETAIL_WORKERS, rate=REQUESTS_PER_SECOND)
+    cache = http_cache.configure_cache(HTTP_CACHE_DIR, ttl_seconds=HTTP_CACHE_TTL_HOURS * 3600,
+                                       max_bytes=HTTP_CACHE_MAX_MB * 1024 * 1024,
+                                       offline=HTTP_CACHE_OFFLINE)
+
+    state_store = CarStateStore(STATE_DB_PATH, ttl_hours=STATE_TTL_HOURS)
+    history = HistoryStore(HISTORY_DB_PATH)
+
+    # Los IDs fluyen hacia las descargas mientras se descubren y cada fila se escribe
+    # apenas se parsea; después se agregan los carros activos que no cambiaron.
+    # El journal guarda los IDs descubiertos y las filas terminadas: con --resume se
+    # reutilizan y solo se descarga lo que faltaba.
+    scrape_date = datetime.date.today().isoformat()
+    for kind, scraper, base_url in (
+            ('new', NewCarScraper(driver_path=chromedriver_path, driver_manager=driver_manager),
+             NEW_CAR_DETAIL_URL),
+            ('used', UsedCarScraper(driver_path=chromedriver_path, driver_manager=driver_manager),
+             USED_CAR_DETAIL_URL)):
+        with RunJournal(os.path.join(CHECKPOINT_DIR, f'crautos_{kind}.jsonl'), resume=args.resume) as journal, \
+                metrics.timer('stage_seconds', stage=f'scrape_{kind}'):
+            state_store.begin_run(journal.started_at)
+            run_id = history.begin_run(f'crautos_{kind}', journal.started_at)
+            if HTTP_CACHE_OFFLINE:
+                # Sin red: se vuelven a parsear todas las páginas de detalle guardadas en la caché
+                discover_ids = lambda: [url[len(base_url):] for url in cache.urls(base_url)]
+            else:
+                discover_ids = lambda: iter_in_thread(scraper.iter_car_ids())
+            car_ids = journal.pending(state_store.filter_ids(kind, journal.discover(discover_ids)))
+            car_details = CarDetailsFetcher.stream_car_details(car_ids, base_url, is_used=(kind == 'used'),
+                                                               max_workers=DETAIL_WORKERS,
+                                                               parse_processes=PARSE_PROCESSES)
+            with sinks.open_sink(OUTPUT_FORMAT, OUTPUT_DIR, f'crautos_{kind}', scrape_date) as sink:
+                sink.write_rows(history.record_car_stream(run_id, journal.previous_rows))
+                sink.write_rows(history.record_car_stream(
+                    run_id, journal.record(state_store.record_stream(kind, car_details), 'Car ID')))
+                if journal.previous_rows:
+                    # Lo descargado antes de la falla puede no haber llegado a la base de estado
+                    state_store.record_details(kind, journal.previous_rows)
+                state_store.delist_missing(kind)
+                sink.write_rows(history.record_car_stream(
+                    run_id, state_store.iter_active_details(kind, fetched_before=state_store.run_started_at)))
+    state_store.close()
+    history.close()
+    cache.print_summary()
+    wait_metrics.print_summary()
+
+    if EXPORT_EXCEL:
+        with metrics.timer('stage_seconds', stage='export_excel'):
+            DataManager.export_excel(OUTPUT_DIR, 'crautos_new', 'new_car_details.xlsx')
+            DataManager.export_excel(OUTPUT_DIR, 'crautos_used', 'used_car_details.xlsx')
+            DataManager.export_excel(OUTPUT_DIR, ['crautos_new', 'crautos_used'], 'combined_car_details.xlsx')
+
+    with metrics.timer('stage_seconds', stage='analyze'):
+        # pandas/pyarrow para el análisis se cargan recién aquí
+        import data_analysis as da
+
+        # Cargar y limpiar los datos combinados
+        combined_df = da.load_data(OUTPUT_DIR, source=['crautos_new', 'crautos_used'])
+        combined_df = da.clean_data(combined_df)
+
+        # Graficar tendencias (en paralelo; los gráficos sin cambios no se vuelven a dibujar)
+        da.plot_car_trends(combined_df, top_n=10)
+
+    metrics.registry.print_summary()
+    metrics.registry.export(METRICS_PATH, run='crautos')
 
 
 if __name__ == "__main__":
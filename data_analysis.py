@@ -1,280 +1,507 @@
+import hashlib
+import json
+import os
+import types
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property, partial
+from typing import Callable
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib
-
-matplotlib.use('Agg')
-
-
-def load_data(file_path):
-    # Cargar datos desde un archivo Excel
+import pyarrow as pa
+import pyarrow.compute as pc
+import metrics
+import sinks
+from records import COLONES_PER_DOLLAR
+
+# Carpeta de los gráficos y procesos para dibujarlos en paralelo (1 = en este proceso)
+PLOT_DIR = '.'
+PLOT_PROCESSES = min(4, os.cpu_count() or 1)
+# Hash de los datos de cada gráfico en la última corrida, para no volver a dibujar los que no cambiaron
+PLOT_CACHE_FILE = '.plot_cache.json'
+
+# Patrones para limpiar los textos heredados. Arrow los compila una vez por columna (RE2)
+# y los aplica en una sola pasada vectorizada, sin pasar por objetos de Python.
+_USD_JUNK = r'[^0-9.]'
+# "₡12 500,00" -> "12500": se quitan los decimales tras la coma y todo lo que no sea dígito
+_COLONES_JUNK = r',[0-9]*\s*$|[^0-9]'
+_PERCENT_JUNK = r'[^0-9.\-]'
+_DIGITS_JUNK = r'[^0-9]'
+
+
+@metrics.timed('analysis_seconds')
+def load_data(file_path, source=None):
+    # Cargar datos desde la salida particionada (carpeta), un archivo Parquet/CSV o un Excel
+    if os.path.isdir(file_path):
+        return sinks.read_dataset(file_path, source=source)
+    if file_path.endswith('.parquet'):
+        return pd.read_parquet(file_path)
+    if file_path.endswith('.csv'):
+        return pd.read_csv(file_path)
     return pd.read_excel(file_path)
 
 
+def _to_arrow_text(series):
+    try:
+        return pa.array(series.to_numpy(), type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columna con textos y números mezclados (p. ej. leída de Excel)
+        return pa.array(series.astype('string'), type=pa.string())
+
+
+def _cast_float(text):
+    try:
+        return pc.cast(text, pa.float64())
+    except pa.ArrowInvalid:
+        return None
+
+
+def _to_number(series, junk_pattern):
+    # Columnas ya numéricas pasan directo. Los textos se convierten a números con Arrow: si
+    # ya son números ("2024") basta un cast; si no, un solo replace con junk_pattern y el cast.
+    # Lo que no se puede convertir queda como NaN.
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype('float64')
+    text = _to_arrow_text(series)
+    # Probar el cast directo con una muestra: un cast fallido sobre toda la columna es caro
+    numbers = _cast_float(text) if _cast_float(text.slice(0, 1000)) is not None else None
+    if numbers is None:
+        text = pc.replace_substring_regex(text, junk_pattern, '')
+        text = pc.if_else(pc.equal(text, ''), pa.scalar(None, pa.string()), text)
+        numbers = _cast_float(text)
+        if numbers is None:
+            # Quedó algo como "1.2.3": convertir valor por valor
+            return pd.to_numeric(pd.Series(text.to_pandas(), index=series.index), errors='coerce')
+    return pd.Series(numbers.to_numpy(zero_copy_only=False), index=series.index, dtype='float64')
+
+
+def _to_int32(series):
+    # int32 si no hay faltantes; si los hay float32 para poder representarlos
+    if series.isna().any():
+        return series.astype('float32')
+    return series.astype('int32')
+
+
+@metrics.timed('analysis_seconds')
 def clean_data(df):
-    # Eliminar filas donde "Precio" es "ND"
-    df = df[df['Precio'] != '$ND'].copy()
-    # Convertir el precio a float después de eliminar caracteres no deseados
-    df.loc[:, 'Precio'] = df['Precio'].replace('[\$,]', '', regex=True).astype(float)
-    # Convertir el año a entero
-    df.loc[:, 'Año'] = df['Año'].astype(int)
+    # Limpiar los datos de CRautos: Precio y Año numéricos (float32 / int32) y Version como
+    # categoría. Se descartan las filas sin precio ("$ND") o sin año.
+    precio = _to_number(df['Precio'], _USD_JUNK)
+    if not pd.api.types.is_numeric_dtype(df['Precio']):
+        # Los precios en colones ("¢ 7,950,000") se pasan a dólares como en records.parse_price_usd
+        text = _to_arrow_text(df['Precio'])
+        in_colones = pc.fill_null(pc.match_substring(text, '¢'), False).to_numpy(zero_copy_only=False)
+        precio = precio.mask(in_colones, precio // COLONES_PER_DOLLAR)
+    año = _to_number(df['Año'], _DIGITS_JUNK)
+    keep = (precio.notna() & año.notna()).to_numpy()
+
+    df = df.loc[keep].copy()
+    df['Precio'] = precio[keep].astype('float32')
+    df['Año'] = año[keep].astype('int32')
+    if 'Kilometraje' in df:
+        df['Kilometraje'] = _to_number(df['Kilometraje'], _DIGITS_JUNK).astype('float32')
+    if 'Version' in df:
+        df['Version'] = df['Version'].astype('category')
     return df
 
+class CarAggregates:
+    def __init__(self, df):
+        # Estadísticas de precio calculadas una sola vez por clave y compartidas por los gráficos
+        self.df = df
+
+    @cached_property
+    def by_version(self):
+        # count/min/max/mean de Precio por Version en un solo groupby
+        return self.df.groupby('Version', observed=True)['Precio'].agg(['count', 'min', 'max', 'mean'])
+
+    @cached_property
+    def by_year(self):
+        return self.df.groupby('Año')['Precio'].agg(['count', 'min', 'max', 'mean'])
+
+    def most_common_models(self, top_n=10):
+        return self.by_version['count'].nlargest(top_n)
+
+    def most_expensive_models(self, top_n=10):
+        return self.by_version['max'].nlargest(top_n)
+
+    def cheapest_models(self, top_n=10):
+        return self.by_version['min'].nsmallest(top_n)
+
+
+class OfferAggregates:
+    def __init__(self, df):
+        # Igual que CarAggregates pero para las sub-ofertas de Yuplon
+        self.df = df
+
+    @cached_property
+    def by_main_offer(self):
+        # Totales por Main Offer en un solo groupby
+        return self.df.groupby('Main Offer', observed=True).agg(
+            Price=('Price', 'sum'),
+            count=('Price', 'size'),
+            min_price=('Price', 'min'),
+            max_price=('Price', 'max'),
+            mean_discount=('Discount', 'mean'),
+            Vendidas=('Vendidas', 'sum'),
+        )
+
+    def most_discount_offers(self, top_n=10):
+        return self.df.nlargest(top_n, 'Discount')
+
+    def least_discount_offers(self, top_n=10):
+        return self.df.nsmallest(top_n, 'Discount')
+
+    def most_expensive_offers(self, top_n=10):
+        # Main Offer con la mayor suma de precios de sus sub-ofertas
+        return self.by_main_offer['Price'].nlargest(top_n).reset_index()
+
+    def least_expensive_offers(self, top_n=10):
+        return self.by_main_offer['Price'].nsmallest(top_n).reset_index()
+
+
+# Agregados por DataFrame: los gráficos que reciben el mismo df reutilizan los mismos cálculos
+_aggregates_cache = {}
+
+
+def _cached_aggregates(df, aggregates_class):
+    key = (id(df), aggregates_class)
+    cached = _aggregates_cache.get(key)
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+    # Con un proxy la caché no mantiene vivo al DataFrame: al liberarlo se borra su entrada
+    aggregates = aggregates_class(weakref.proxy(df))
+    _aggregates_cache[key] = (weakref.ref(df, lambda _: _aggregates_cache.pop(key, None)), aggregates)
+    return aggregates
+
+
+def car_aggregates(df):
+    return _cached_aggregates(df, CarAggregates)
+
+
+def offer_aggregates(df):
+    return _cached_aggregates(df, OfferAggregates)
+
+
 def get_average_price_by_year(df):
     # Obtener el precio promedio por año
-    return df.groupby('Año')['Precio'].mean()
+    return car_aggregates(df).by_year['mean']
 
 
 def get_most_common_models(df, top_n=10):
     # Obtener los modelos de carros más comunes
-    return df['Version'].value_counts().head(top_n)
+    return car_aggregates(df).most_common_models(top_n)
 
 
 def get_most_expensive_models(df, top_n=10):
     # Obtener los modelos de carros más caros
-    return df.groupby('Version')['Precio'].max().nlargest(top_n)
+    return car_aggregates(df).most_expensive_models(top_n)
 
 
 def get_cheapest_models(df, top_n=10):
     # Obtener los modelos de carros más baratos
-    return df.groupby('Version')['Precio'].min().nsmallest(top_n)
-
-
-def plot_average_price_by_year(df):
-    # Graficar el precio promedio por año
-    avg_price_by_year = get_average_price_by_year(df)
-    avg_price_by_year.plot(kind='line')
-    plt.title('Precio Promedio de carros por Año')
-    plt.xlabel('Año')
-    plt.ylabel('Precio Promedio')
-    plt.grid(True)
-    plt.savefig('precio_promedio_por_año.png')
-
-
-def plot_most_common_models(df, top_n=10):
-    # Obtener los modelos de coches más comunes
-    most_common_models = get_most_common_models(df, top_n)
+    return car_aggregates(df).cheapest_models(top_n)
+
+
+def _code_digest(digest, code):
+    # Huella del código de una función de dibujo (incluye sus funciones anidadas, sin direcciones)
+    digest.update(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _code_digest(digest, const)
+        else:
+            digest.update(repr(const).encode('utf-8'))
+
+
+@dataclass
+class PlotJob:
+    # Un gráfico: el archivo de salida, la función que dibuja la Figure y sus datos ya agregados
+    filename: str
+    render: Callable
+    data: object
+    options: dict = field(default_factory=dict)
+
+    def input_hash(self):
+        # Cambia si cambian los datos agregados, las opciones o el código que dibuja
+        digest = hashlib.sha256(self.filename.encode('utf-8'))
+        _code_digest(digest, self.render.__code__)
+        digest.update(repr(sorted(self.options.items())).encode('utf-8'))
+        data = self.data
+        if isinstance(data, pd.Series):
+            data = data.to_frame()
+        digest.update(repr([(str(column), str(dtype)) for column, dtype in data.dtypes.items()]).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        return digest.hexdigest()
+
+
+def _render_job(job, path):
+    # Dibujar y guardar un gráfico; la Figure no pasa por pyplot y se libera apenas se guarda
+    with metrics.timer('plot_render_seconds', plot=job.filename):
+        figure = job.render(job.data, **job.options)
+        figure.savefig(path)
+        figure.clear()
+    return path
+
+
+def _load_plot_cache(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_plot_cache(path, cache):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+@metrics.timed('analysis_seconds')
+def render_plots(jobs, output_dir=None, processes=None):
+    # Dibujar los gráficos en paralelo en un pool de procesos. Se saltan los que ya existen y
+    # cuyos datos agregados tienen el mismo hash que en la corrida anterior.
+    output_dir = output_dir if output_dir is not None else PLOT_DIR
+    processes = processes if processes is not None else PLOT_PROCESSES
+    os.makedirs(output_dir, exist_ok=True)
+    cache_path = os.path.join(output_dir, PLOT_CACHE_FILE)
+    cache = _load_plot_cache(cache_path)
+
+    pending = []
+    for job in jobs:
+        path = os.path.join(output_dir, job.filename)
+        input_hash = job.input_hash()
+        if cache.get(job.filename) == input_hash and os.path.exists(path):
+            metrics.inc('plots_total', result='unchanged')
+            continue
+        pending.append((job, path, input_hash))
+
+    if len(pending) > 1 and processes > 1:
+        with ProcessPoolExecutor(max_workers=min(processes, len(pending))) as executor:
+            for _, plot_metrics in executor.map(partial(metrics.call_collecting, _render_job),
+                                                [job for job, _, _ in pending],
+                                                [path for _, path, _ in pending]):
+                metrics.registry.merge(plot_metrics)
+    else:
+        for job, path, _ in pending:
+            _render_job(job, path)
+
+    for job, _, input_hash in pending:
+        cache[job.filename] = input_hash
+        metrics.inc('plots_total', result='rendered')
+    if pending:
+        _save_plot_cache(cache_path, cache)
+    return [path for _, path, _ in pending]
+
+
+def _figure(**kwargs):
+    # matplotlib se importa recién al dibujar: si ningún gráfico cambió ni siquiera se carga
+    from matplotlib.figure import Figure
+    return Figure(**kwargs)
+
+
+def _annotate_bars(ax, bars, label):
+    # Etiqueta encima de cada barra vertical
+    for bar in bars:
+        ax.annotate(label(bar.get_height()),
+                    (bar.get_x() + bar.get_width() / 2, bar.get_height()),
+                    ha='center', va='center',
+                    size=10, xytext=(0, 8),
+                    textcoords='offset points')
+
+
+def _render_line(series, title, xlabel, ylabel):
+    figure = _figure()
+    ax = figure.subplots()
+    ax.plot(series.index, series.to_numpy())
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.grid(True)
+    return figure
+
+
+def _render_model_bars(series, title, ylabel, margin, label_format):
+    # Barras por modelo como las de pandas (una por categoría, etiquetas rotadas)
+    figure = _figure(figsize=(10, 6))
+    ax = figure.subplots()
+    positions = range(len(series))
+    bars = ax.bar(positions, series.to_numpy(), width=0.5)
+    ax.set_xticks(positions, [str(label) for label in series.index], rotation=45, ha="right")
+
+    # Un poco más alto que el valor máximo para mejor visualización
+    ax.set_ylim(0, series.max() + margin)
+    ax.set_title(title)
+    ax.set_xlabel('Modelo de Carro')
+    ax.set_ylabel(ylabel)
 
-    # Crear la gráfica de barras
-    plt.figure(figsize=(10, 6))
-    bars = most_common_models.plot(kind='bar')
+    # Ajustar el margen inferior para evitar que las etiquetas se corten
+    figure.subplots_adjust(bottom=0.25)
+    _annotate_bars(ax, bars, label_format.format)
+    ax.grid(True, axis='y')
+    return figure
+
+
+def _render_offer_bars(offers, value_column, title, xlabel, color, price_labels=False):
+    # Barras horizontales por Main Offer
+    figure = _figure(figsize=(14, 10))
+    ax = figure.subplots()
+    bars = ax.barh(offers['Main Offer'].astype(str), offers[value_column], color=color)
+    ax.set_xlabel(xlabel)
+    ax.set_title(title)
+    if not price_labels:
+        figure.tight_layout(pad=3)
+        return figure
+
+    ax.tick_params(axis='x', rotation=45)
+    figure.tight_layout(pad=5)
+    # Precio a la derecha de cada barra
+    for bar in bars:
+        ax.annotate(f"₡{int(bar.get_width()):,}",
+                    xy=(bar.get_width(), bar.get_y() + bar.get_height() / 2),
+                    xytext=(10, 0), textcoords="offset points",
+                    ha='left', va='center')
+    figure.subplots_adjust(left=0.35)
+    return figure
 
-    # Ajustar los valores del eje y
-    max_y = most_common_models.max() + 10  # Un poco más alto que el valor máximo para mejor visualización
-    plt.ylim(0, max_y)
 
-    # Título y etiquetas
-    plt.title(f'Top {top_n} Modelos de carros Más Comunes')
-    plt.xlabel('Modelo de Carro')
-    plt.ylabel('Cantidad')
+def _render_price_vendidas_discount(offers):
+    figure = _figure(figsize=(14, 10))
+    ax = figure.subplots()
+    points = ax.scatter(offers['Price'], offers['Vendidas'], c=offers['Discount'], cmap='viridis', alpha=0.6)
+    figure.colorbar(points, ax=ax, label='Porcentaje de Descuento')
+    ax.set_xlabel('Precio')
+    ax.set_ylabel('Vendidas')
+    ax.set_title('Relación entre Vendidas, Precio y Descuento')
+    figure.tight_layout(pad=3)
+    return figure
 
-    # Rotar las etiquetas del eje x para mejor visualización
-    plt.xticks(rotation=45, ha="right")
 
-    # Ajustar el margen inferior para evitar que las etiquetas se corten
-    plt.subplots_adjust(bottom=0.25)
+def average_price_by_year_plot(df):
+    return PlotJob('precio_promedio_por_año.png', _render_line, get_average_price_by_year(df),
+                   {'title': 'Precio Promedio de carros por Año', 'xlabel': 'Año', 'ylabel': 'Precio Promedio'})
 
-    # Añadir etiquetas de conteo encima de cada barra
-    for bar in bars.patches:
-        plt.annotate(format(bar.get_height(), ',d'),
-                     (bar.get_x() + bar.get_width() / 2, bar.get_height()),
-                     ha='center', va='center',
-                     size=10, xytext=(0, 8),
-                     textcoords='offset points')
 
-    # Añadir cuadrícula para facilitar la lectura de valores
-    plt.grid(True, axis='y')
+def most_common_models_plot(df, top_n=10):
+    return PlotJob('modelos_mas_comunes.png', _render_model_bars, get_most_common_models(df, top_n),
+                   {'title': f'Top {top_n} Modelos de carros Más Comunes', 'ylabel': 'Cantidad',
+                    'margin': 10, 'label_format': '{:,.0f}'})
 
-    # Guardar la gráfica
-    plt.savefig('modelos_mas_comunes.png')
 
+def most_expensive_models_plot(df, top_n=10):
+    return PlotJob('modelos_mas_caros.png', _render_model_bars, get_most_expensive_models(df, top_n),
+                   {'title': f'Top {top_n} Modelos de carros Más Caros', 'ylabel': 'Precio',
+                    'margin': 1000, 'label_format': '${:,}'})
 
-def plot_most_expensive_models(df, top_n=10):
-    # Obtener los modelos de coches más caros
-    most_expensive_models = get_most_expensive_models(df, top_n)
 
-    # Crear la gráfica de barras
-    plt.figure(figsize=(10, 6))
-    bars = most_expensive_models.plot(kind='bar')
+def cheapest_models_plot(df, top_n=10):
+    return PlotJob('modelos_mas_baratos.png', _render_model_bars, get_cheapest_models(df, top_n),
+                   {'title': f'Top {top_n} Modelos de carros Más Baratos', 'ylabel': 'Precio',
+                    'margin': 1000, 'label_format': '${:,}'})
 
-    # Ajustar los valores del eje y
-    max_y = most_expensive_models.max() + 1000  # Un poco más alto que el valor máximo para mejor visualización
-    plt.ylim(0, max_y)
 
-    # Título y etiquetas
-    plt.title(f'Top {top_n} Modelos de carros Más Caros')
-    plt.xlabel('Modelo de Carro')
-    plt.ylabel('Precio')
+def most_discount_offers_plot(df):
+    offers = offer_aggregates(df).most_discount_offers(10)[['Main Offer', 'Discount']]
+    return PlotJob('top_10_ofertas_mayor_descuento.png', _render_offer_bars, offers,
+                   {'value_column': 'Discount', 'title': 'Top 10 Ofertas con Mayor Descuento',
+                    'xlabel': 'Porcentaje de Descuento', 'color': 'skyblue'})
 
-    # Rotar las etiquetas del eje x para mejor visualización
-    plt.xticks(rotation=45, ha="right")
 
-    # Ajustar el margen inferior para evitar que las etiquetas se corten
-    plt.subplots_adjust(bottom=0.25)
+def least_discount_offers_plot(df):
+    offers = offer_aggregates(df).least_discount_offers(10)[['Main Offer', 'Discount']]
+    return PlotJob('top_10_ofertas_menor_descuento.png', _render_offer_bars, offers,
+                   {'value_column': 'Discount', 'title': 'Top 10 Ofertas con Menor Descuento',
+                    'xlabel': 'Porcentaje de Descuento', 'color': 'salmon'})
 
-    # Añadir etiquetas de precio encima de cada barra
-    for bar in bars.patches:
-        plt.annotate(f"${bar.get_height():,}",
-                     (bar.get_x() + bar.get_width() / 2, bar.get_height()),
-                     ha='center', va='center',
-                     size=10, xytext=(0, 8),
-                     textcoords='offset points')
 
-    # Añadir cuadrícula para facilitar la lectura de valores
-    plt.grid(True, axis='y')
+def most_expensive_offers_plot(df):
+    return PlotJob('top_10_ofertas_mas_caras.png', _render_offer_bars, offer_aggregates(df).most_expensive_offers(10),
+                   {'value_column': 'Price', 'title': 'Top 10 Ofertas Más Caras', 'xlabel': 'Precio',
+                    'color': 'orange', 'price_labels': True})
 
-    # Guardar la gráfica
-    plt.savefig('modelos_mas_caros.png')
 
+def least_expensive_offers_plot(df):
+    return PlotJob('top_10_ofertas_mas_baratas.png', _render_offer_bars,
+                   offer_aggregates(df).least_expensive_offers(10),
+                   {'value_column': 'Price', 'title': 'Top 10 Ofertas Más Baratas', 'xlabel': 'Precio',
+                    'color': 'lightgreen', 'price_labels': True})
 
-def plot_cheapest_models(df, top_n=10):
-    # Obtener los modelos de coches más baratos
-    cheapest_models = get_cheapest_models(df, top_n)
 
-    # Crear la gráfica de barras
-    plt.figure(figsize=(10, 6))
-    bars = cheapest_models.plot(kind='bar')
+def relation_price_vendidas_discount_plot(df):
+    return PlotJob('relacion_vendidas_precio_descuento.png', _render_price_vendidas_discount,
+                   df[['Price', 'Vendidas', 'Discount']].reset_index(drop=True))
 
-    # Ajustar los valores del eje y
-    max_y = cheapest_models.max() + 1000  # Un poco más alto que el valor máximo para mejor visualización
-    plt.ylim(0, max_y)
 
-    # Título y etiquetas
-    plt.title(f'Top {top_n} Modelos de carros Más Baratos')
-    plt.xlabel('Modelo de Carro')
-    plt.ylabel('Precio')
+@metrics.timed('analysis_seconds')
+def plot_car_trends(df, top_n=10):
+    # Todos los gráficos de CRautos de una vez, en paralelo
+    return render_plots([average_price_by_year_plot(df), most_common_models_plot(df, top_n),
+                         most_expensive_models_plot(df, top_n), cheapest_models_plot(df, top_n)])
 
-    # Rotar las etiquetas del eje x para mejor visualización
-    plt.xticks(rotation=45, ha="right")
 
-    # Ajustar el margen inferior para evitar que las etiquetas se corten
-    plt.subplots_adjust(bottom=0.25)
+@metrics.timed('analysis_seconds')
+def plot_offer_trends(df):
+    # Todos los gráficos de Yuplon de una vez, en paralelo
+    return render_plots([most_discount_offers_plot(df), relation_price_vendidas_discount_plot(df),
+                         least_discount_offers_plot(df), most_expensive_offers_plot(df),
+                         least_expensive_offers_plot(df)])
 
-    # Añadir etiquetas de precio encima de cada barra
-    for bar in bars.patches:
-        plt.annotate(f"${bar.get_height():,}",
-                     (bar.get_x() + bar.get_width() / 2, bar.get_height()),
-                     ha='center', va='center',
-                     size=10, xytext=(0, 8),
-                     textcoords='offset points')
 
-    # Añadir cuadrícula para facilitar la lectura de valores
-    plt.grid(True, axis='y')
+# Cada gráfico por separado (se dibuja en este proceso)
 
-    # Guardar la gráfica
-    plt.savefig('modelos_mas_baratos.png')
+@metrics.timed('analysis_seconds')
+def plot_average_price_by_year(df):
+    return render_plots([average_price_by_year_plot(df)], processes=1)
 
 
-def clean_data(df):
-    # Remove rows where "Precio" is "ND"
-    df = df[df['Precio'] != '$ND'].copy()
+@metrics.timed('analysis_seconds')
+def plot_most_common_models(df, top_n=10):
+    return render_plots([most_common_models_plot(df, top_n)], processes=1)
 
-    # Convert the "Precio" column to float after removing unwanted characters
-    df['Precio'] = df['Precio'].replace('[\$,]', '', regex=True)
 
-    # Identify and remove rows where "Precio" is not numeric
-    df = df[pd.to_numeric(df['Precio'], errors='coerce').notnull()]
-    df['Precio'] = df['Precio'].astype(float)
+@metrics.timed('analysis_seconds')
+def plot_most_expensive_models(df, top_n=10):
+    return render_plots([most_expensive_models_plot(df, top_n)], processes=1)
 
-    # Convert the "Año" column to integer
-    df['Año'] = df['Año'].astype(int)
 
-    return df
+@metrics.timed('analysis_seconds')
+def plot_cheapest_models(df, top_n=10):
+    return render_plots([cheapest_models_plot(df, top_n)], processes=1)
 
 
+@metrics.timed('analysis_seconds')
 def clean_data_yuplon(df):
-    # Clean the Price and Discount columns
-    df['Price'] = df['Price'].str.replace('₡', '').str.replace(' ', '').str.split(',', expand=True)[
-        0]
-    df['Price'] = df['Price'].astype(float)
-    df['Original Price'] = \
-    df['Original Price'].str.replace('₡', '').str.replace(' ', '').str.split(',', expand=True)[0]
-    df['Original Price'] = df['Original Price'].astype(float)
-    df['Discount'] = df['Discount'].replace('%', '', regex=True).astype(float)
-    df['Vendidas'] = df['Vendidas'].replace('[,]', '', regex=True).astype(int)
+    # Limpiar los datos de Yuplon: precios y descuento como float32, vendidas como int32
+    # y Main Offer como categoría
+    df = df.copy()
+    df['Price'] = _to_number(df['Price'], _COLONES_JUNK).astype('float32')
+    df['Original Price'] = _to_number(df['Original Price'], _COLONES_JUNK).astype('float32')
+    df['Discount'] = _to_number(df['Discount'], _PERCENT_JUNK).astype('float32')
+    df['Vendidas'] = _to_int32(_to_number(df['Vendidas'], _DIGITS_JUNK))
+    df['Main Offer'] = df['Main Offer'].astype('category')
     return df
 
 
+@metrics.timed('analysis_seconds')
 def plot_most_discount_offers(df):
-    # Offers with most discount
-    most_discount_offers = df.sort_values(by='Discount', ascending=False).head(10)
-    plt.figure(figsize=(14, 10))
-    plt.barh(most_discount_offers['Main Offer'], most_discount_offers['Discount'], color='skyblue')
-    plt.xlabel('Porcentaje de Descuento')
-    plt.title('Top 10 Ofertas con Mayor Descuento')
-    plt.tight_layout(pad=3)
-    plt.savefig('top_10_ofertas_mayor_descuento.png')
+    return render_plots([most_discount_offers_plot(df)], processes=1)
 
 
+@metrics.timed('analysis_seconds')
 def plot_relation_price_vendidas_discount(df):
-    # Relation between Vendidas, Price, and Discount
-    plt.figure(figsize=(14, 10))
-    plt.scatter(df['Price'], df['Vendidas'], c=df['Discount'], cmap='viridis', alpha=0.6)
-    plt.colorbar(label='Porcentaje de Descuento')
-    plt.xlabel('Precio')
-    plt.ylabel('Vendidas')
-    plt.title('Relación entre Vendidas, Precio y Descuento')
-    plt.tight_layout(pad=3)
-    plt.savefig('relacion_vendidas_precio_descuento.png')
+    return render_plots([relation_price_vendidas_discount_plot(df)], processes=1)
 
 
+@metrics.timed('analysis_seconds')
 def plot_least_discount_offers(df):
-    # Offers with least discount
-    worse_discount_offers = df.sort_values(by='Discount', ascending=True).head(10)
-    plt.figure(figsize=(14, 10))
-    plt.barh(worse_discount_offers['Main Offer'], worse_discount_offers['Discount'], color='salmon')
-    plt.xlabel('Porcentaje de Descuento')
-    plt.title('Top 10 Ofertas con Menor Descuento')
-    plt.tight_layout(pad=3)
-    plt.savefig('top_10_ofertas_menor_descuento.png')
+    return render_plots([least_discount_offers_plot(df)], processes=1)
 
 
+@metrics.timed('analysis_seconds')
 def plot_most_expensive_offers(df):
-    # Aggregate by Main Offer to ensure uniqueness and sum the prices if there are multiple entries
-    most_expensive_offers = df.groupby('Main Offer').agg({'Price': 'sum'}).sort_values(by='Price',
-                                                                                       ascending=False).head(
-        10).reset_index()
-
-    plt.figure(figsize=(14, 10))
-    bars = plt.barh(most_expensive_offers['Main Offer'], most_expensive_offers['Price'],
-                    color='orange')
-    plt.xlabel('Precio')
-    plt.title('Top 10 Ofertas Más Caras')
-    plt.xticks(rotation=45)
-    plt.tight_layout(pad=5)
-
-    # Format price labels with additional margin to the left
-    for bar in bars:
-        plt.annotate(f"₡{int(bar.get_width()):,}",
-                     xy=(bar.get_width(), bar.get_y() + bar.get_height() / 2),
-                     xytext=(10, 0), textcoords="offset points",
-                     ha='left', va='center')
-
-    plt.subplots_adjust(left=0.35)  # Adjust left margin
-    plt.savefig('top_10_ofertas_mas_caras.png')
+    return render_plots([most_expensive_offers_plot(df)], processes=1)
 
 
+@metrics.timed('analysis_seconds')
 def plot_least_expensive_offers(df):
-    # Aggregate by Main Offer to ensure uniqueness and sum the prices if there are multiple entries
-    least_expensive_offers = df.groupby('Main Offer').agg({'Price': 'sum'}).sort_values(by='Price',
-                                                                                        ascending=True).head(
-        10).reset_index()
-
-    plt.figure(figsize=(14, 10))
-    bars = plt.barh(least_expensive_offers['Main Offer'], least_expensive_offers['Price'],
-                    color='lightgreen')
-    plt.xlabel('Precio')
-    plt.title('Top 10 Ofertas Más Baratas')
-    plt.xticks(rotation=45)
-    plt.tight_layout(pad=5)
-
-    # Format price labels with additional margin to the left
-    for bar in bars:
-        plt.annotate(f"₡{int(bar.get_width()):,}",
-                     xy=(bar.get_width(), bar.get_y() + bar.get_height() / 2),
-                     xytext=(10, 0), textcoords="offset points",
-                     ha='left', va='center')
-
-    plt.subplots_adjust(left=0.35)  # Adjust left margin
-    plt.savefig('top_10_ofertas_mas_baratas.png')
-
-
+    return render_plots([least_expensive_offers_plot(df)], processes=1)
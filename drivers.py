@@ -0,0 +1,262 @@
+import atexit
+import os
+import platform
+import threading
+from dataclasses import dataclass, field, replace
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.chrome.service import Service as ChromeService
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Páginas que carga un navegador antes de reemplazarlo, para que la memoria no crezca sin límite
+MAX_PAGES_PER_DRIVER = 200
+
+# Carpeta del ChromeDriver por sistema operativo dentro del proyecto. Los sistemas que no están
+# aquí (p. ej. Linux ARM, que no tiene build oficial) usan el que resuelva Selenium Manager.
+DRIVER_DIRS = {
+    ('Linux', 'x86_64'): 'chromedriver-linux64/chromedriver',
+    ('Darwin', 'arm64'): 'chromedriver-mac-arm64/chromedriver',
+    ('Darwin', 'x86_64'): 'chromedriver-mac-x64/chromedriver',
+    ('Windows', 'AMD64'): 'chromedriver-win64/chromedriver.exe',
+}
+
+IMAGE_PATTERNS = ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.avif']
+FONT_PATTERNS = ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot']
+CSS_PATTERNS = ['*.css']
+# Anuncios y analítica que no aportan datos
+THIRD_PARTY_HOSTS = [
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*adservice.google.com*', '*facebook.net*',
+    '*connect.facebook.com*', '*hotjar.com*', '*clarity.ms*', '*tiktok.com*',
+]
+
+
+@dataclass
+class DriverConfig:
+    headless: bool = True
+    block_images: bool = True
+    block_fonts: bool = True
+    # El CSS se deja pasar por defecto: Yuplon depende del layout para el scroll infinito
+    block_css: bool = False
+    blocked_hosts: list = field(default_factory=lambda: list(THIRD_PARTY_HOSTS))
+    # 'eager' devuelve el control al tener el DOM, sin esperar imágenes ni iframes
+    page_load_strategy: str = 'eager'
+    # Carpeta de perfil reutilizable (caché, cookies) entre corridas
+    profile_dir: str = None
+    window_size: str = '1920,1080'
+    capture_network: bool = False
+    # Desactivar el sandbox de Chrome (apagado por defecto). Sin esta opción solo se desactiva
+    # cuando Chrome no puede usarlo: como root o dentro de un contenedor
+    no_sandbox: bool = False
+
+    def blocked_url_patterns(self):
+        patterns = list(self.blocked_hosts)
+        if self.block_images:
+            patterns += IMAGE_PATTERNS
+        if self.block_fonts:
+            patterns += FONT_PATTERNS
+        if self.block_css:
+            patterns += CSS_PATTERNS
+        return patterns
+
+    def for_worker(self, index):
+        # Chrome no permite que dos instancias compartan perfil: una carpeta por trabajador
+        if not self.profile_dir:
+            return self
+        return replace(self, profile_dir=f"{self.profile_dir}-{index}")
+
+
+def default_driver_path():
+    # Ruta al ChromeDriver del proyecto para este sistema; None deja que Selenium Manager lo resuelva
+    relative_path = DRIVER_DIRS.get((platform.system(), platform.machine()))
+    if relative_path:
+        path = os.path.join(PROJECT_DIR, relative_path)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def sandbox_unavailable():
+    # Chrome no arranca con sandbox si corre como root, y en Docker/Podman no suele haber
+    # espacios de nombres de usuario disponibles
+    if platform.system() != 'Linux':
+        return False
+    return (os.geteuid() == 0 or os.path.exists('/.dockerenv')
+            or os.path.exists('/run/.containerenv'))
+
+
+def build_options(config):
+    options = ChromeOptions()
+    if config.headless:
+        options.add_argument('--headless=new')
+    options.add_argument(f'--window-size={config.window_size}')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-extensions')
+    if config.no_sandbox or sandbox_unavailable():
+        options.add_argument('--no-sandbox')
+    if config.profile_dir:
+        options.add_argument(f'--user-data-dir={os.path.abspath(config.profile_dir)}')
+    if config.block_images:
+        options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    options.page_load_strategy = config.page_load_strategy
+    if config.capture_network:
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+def create_driver(driver_path=None, config=None):
+    # Crear un Chrome con la configuración dada y bloquear por CDP los recursos que no se leen
+    config = config or DriverConfig()
+    service = ChromeService(executable_path=driver_path) if driver_path else ChromeService()
+    driver = webdriver.Chrome(service=service, options=build_options(config))
+
+    patterns = config.blocked_url_patterns()
+    if patterns:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    return driver
+
+
+def is_alive(driver):
+    # Verificar que el navegador sigue respondiendo
+    try:
+        driver.execute_script("return 1")
+        return True
+    except WebDriverException:
+        return False
+
+
+def quit_quietly(driver):
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
+
+
+class DriverManager:
+    def __init__(self, driver_path=None, config=None, pool_size=1, max_pages=MAX_PAGES_PER_DRIVER,
+                 driver_factory=None):
+        # Pool de navegadores tibios que los scrapers toman con acquire() y devuelven con release().
+        # Cada navegador ocupa un lugar del pool (y su carpeta de perfil) mientras está vivo.
+        self.driver_path = driver_path
+        self.config = config or DriverConfig()
+        self.pool_size = pool_size
+        self.max_pages = max_pages
+        self.driver_factory = driver_factory or self._create_driver
+        self.condition = threading.Condition()
+        self.idle = []
+        self.leased = {}
+        self.free_slots = list(range(pool_size))
+        self.closed = False
+
+    def _create_driver(self, slot):
+        config = self.config.for_worker(slot) if self.pool_size > 1 else self.config
+        return create_driver(self.driver_path, config)
+
+    def acquire(self):
+        # Tomar un navegador libre (reiniciándolo si dejó de responder) o iniciar uno nuevo;
+        # si todos los lugares del pool están ocupados se espera a que alguien libere uno
+        with self.condition:
+            while not self.idle and not self.free_slots:
+                if self.closed:
+                    raise RuntimeError("El DriverManager está cerrado")
+                self.condition.wait()
+            if self.closed:
+                raise RuntimeError("El DriverManager está cerrado")
+            if self.idle:
+                driver, slot, pages = self.idle.pop()
+            else:
+                driver, slot, pages = None, self.free_slots.pop(0), 0
+
+        if driver is not None and not is_alive(driver):
+            print("El navegador dejó de responder, reiniciándolo")
+            quit_quietly(driver)
+            driver = None
+        if driver is None:
+            try:
+                driver, pages = self.driver_factory(slot), 0
+            except Exception:
+                self._free_slot(slot)
+                raise
+
+        with self.condition:
+            self.leased[driver] = (slot, pages)
+        return driver
+
+    def release(self, driver, pages=0):
+        # Devolver un navegador al pool sumando las páginas que cargó; se reemplaza
+        # si llegó a max_pages, si dejó de responder o si el pool ya se cerró
+        with self.condition:
+            slot, total_pages = self.leased.pop(driver)
+            total_pages += pages
+            keep = not self.closed and total_pages < self.max_pages
+        if keep and is_alive(driver):
+            with self.condition:
+                self.idle.append((driver, slot, total_pages))
+                self.condition.notify()
+            return
+        quit_quietly(driver)
+        self._free_slot(slot)
+
+    def discard(self, driver):
+        # Cerrar un navegador prestado que no se debe reutilizar
+        with self.condition:
+            slot, _ = self.leased.pop(driver)
+        quit_quietly(driver)
+        self._free_slot(slot)
+
+    def _free_slot(self, slot):
+        with self.condition:
+            self.free_slots.append(slot)
+            self.condition.notify()
+
+    def close(self):
+        # Cerrar los navegadores libres; los prestados se cierran al devolverlos
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.condition.notify_all()
+        for driver, _, _ in idle:
+            quit_quietly(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# Pool compartido: en un proceso que corre varias veces el scraper, el navegador sigue tibio
+_shared_manager = None
+_shared_manager_lock = threading.Lock()
+
+
+def configure_manager(**kwargs):
+    # Reemplazar el pool compartido por uno con la configuración dada
+    global _shared_manager
+    with _shared_manager_lock:
+        if _shared_manager is not None:
+            _shared_manager.close()
+        _shared_manager = DriverManager(**kwargs)
+    return _shared_manager
+
+
+def get_manager(**kwargs):
+    # Pool compartido; los argumentos solo se usan si todavía no existe
+    global _shared_manager
+    with _shared_manager_lock:
+        if _shared_manager is None or _shared_manager.closed:
+            _shared_manager = DriverManager(**kwargs)
+        return _shared_manager
+
+
+def close_manager():
+    global _shared_manager
+    with _shared_manager_lock:
+        if _shared_manager is not None:
+            _shared_manager.close()
+            _shared_manager = None
+
+
+atexit.register(close_manager)
@@ -0,0 +1,301 @@
+import json
+import sqlite3
+import time
+from pipeline import batched
+
+# Filas por INSERT al guardar una foto de ofertas
+INSERT_BATCH_SIZE = 500
+# Filas de carros por transacción: cada fila se guarda y sigue de inmediato hacia el sink
+COMMIT_INTERVAL = 500
+DAY_SECONDS = 86400
+
+CAR_COLUMNS = {'Car ID', 'Version', 'Año', 'Precio', 'Kilometraje'}
+OFFER_COLUMNS = {'Campaign URL', 'Main Offer', 'Sub Offer Title', 'Price', 'Original Price', 'Discount',
+                 'Vendidas', 'Calificación', 'Start Date', 'End Date'}
+
+
+class HistoryStore:
+    def __init__(self, db_path):
+        # Historial de solo inserción: una foto de todas las filas de cada corrida, por fuente
+        # y fecha de scraping. Al insertar cada foto se actualiza el último estado de cada carro
+        # y sub-oferta, así los cambios de precio, el tiempo publicado y las ventas entre
+        # corridas quedan calculados y las consultas son lecturas por índice.
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                scraped_at REAL NOT NULL,
+                UNIQUE (source, scraped_at)
+            );
+            CREATE TABLE IF NOT EXISTS car_snapshots (
+                run_id INTEGER NOT NULL REFERENCES runs (run_id),
+                source TEXT NOT NULL,
+                scraped_at REAL NOT NULL,
+                car_id TEXT NOT NULL,
+                version TEXT,
+                year INTEGER,
+                price_usd REAL,
+                mileage_km INTEGER,
+                details TEXT
+            );
+            CREATE INDEX IF NOT EXISTS car_snapshots_car ON car_snapshots (car_id, source, scraped_at);
+            CREATE INDEX IF NOT EXISTS car_snapshots_version ON car_snapshots (version, scraped_at);
+            CREATE INDEX IF NOT EXISTS car_snapshots_date ON car_snapshots (scraped_at);
+            CREATE INDEX IF NOT EXISTS car_snapshots_run ON car_snapshots (run_id);
+            CREATE TABLE IF NOT EXISTS car_latest (
+                source TEXT NOT NULL,
+                car_id TEXT NOT NULL,
+                version TEXT,
+                price_usd REAL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                snapshots INTEGER NOT NULL,
+                PRIMARY KEY (source, car_id)
+            );
+            CREATE INDEX IF NOT EXISTS car_latest_last_seen ON car_latest (source, last_seen);
+            CREATE TABLE IF NOT EXISTS car_price_changes (
+                run_id INTEGER NOT NULL REFERENCES runs (run_id),
+                source TEXT NOT NULL,
+                scraped_at REAL NOT NULL,
+                car_id TEXT NOT NULL,
+                version TEXT,
+                previous_price REAL,
+                price REAL
+            );
+            CREATE INDEX IF NOT EXISTS car_price_changes_date ON car_price_changes (scraped_at);
+            CREATE INDEX IF NOT EXISTS car_price_changes_car ON car_price_changes (car_id, scraped_at);
+            CREATE INDEX IF NOT EXISTS car_price_changes_version ON car_price_changes (version, scraped_at);
+            CREATE INDEX IF NOT EXISTS car_price_changes_run ON car_price_changes (run_id);
+            CREATE TABLE IF NOT EXISTS offer_snapshots (
+                run_id INTEGER NOT NULL REFERENCES runs (run_id),
+                source TEXT NOT NULL,
+                scraped_at REAL NOT NULL,
+                campaign TEXT NOT NULL,
+                main_offer TEXT,
+                title TEXT,
+                price REAL,
+                original_price REAL,
+                discount REAL,
+                sold INTEGER,
+                sold_delta INTEGER,
+                days REAL,
+                details TEXT
+            );
+            CREATE INDEX IF NOT EXISTS offer_snapshots_campaign ON offer_snapshots (campaign, title, scraped_at);
+            CREATE INDEX IF NOT EXISTS offer_snapshots_main_offer ON offer_snapshots (main_offer, scraped_at);
+            CREATE INDEX IF NOT EXISTS offer_snapshots_date ON offer_snapshots (scraped_at);
+            CREATE INDEX IF NOT EXISTS offer_snapshots_run ON offer_snapshots (run_id);
+            CREATE TABLE IF NOT EXISTS offer_latest (
+                campaign TEXT NOT NULL,
+                title TEXT NOT NULL,
+                sold INTEGER,
+                scraped_at REAL NOT NULL,
+                PRIMARY KEY (campaign, title)
+            );
+        """)
+        self.conn.commit()
+
+    def begin_run(self, source, scraped_at=None):
+        # Registrar una corrida y devolver su run_id. Si la corrida ya existía (se está
+        # reanudando) se borra su foto parcial para volver a escribirla completa.
+        scraped_at = scraped_at if scraped_at is not None else time.time()
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO runs (source, scraped_at) VALUES (?, ?)",
+                              (source, scraped_at))
+            run_id = self.conn.execute("SELECT run_id FROM runs WHERE source = ? AND scraped_at = ?",
+                                       (source, scraped_at)).fetchone()[0]
+            partial = self.conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM car_snapshots WHERE run_id = ?) OR "
+                "EXISTS (SELECT 1 FROM offer_snapshots WHERE run_id = ?)", (run_id, run_id)).fetchone()[0]
+            if partial:
+                self.conn.execute("DELETE FROM car_snapshots WHERE run_id = ?", (run_id,))
+                self.conn.execute("DELETE FROM car_price_changes WHERE run_id = ?", (run_id,))
+                self.conn.execute("DELETE FROM offer_snapshots WHERE run_id = ?", (run_id,))
+                self._rebuild_latest(source)
+        return run_id
+
+    def _rebuild_latest(self, source):
+        # Recalcular el último estado desde las fotos (solo al reanudar una corrida)
+        self.conn.execute("DELETE FROM car_latest WHERE source = ?", (source,))
+        self.conn.execute("""
+            INSERT INTO car_latest (source, car_id, version, price_usd, first_seen, last_seen, snapshots)
+            SELECT source, car_id, version, price_usd, first_seen, scraped_at, snapshots FROM (
+                SELECT source, car_id, version, price_usd, scraped_at,
+                       MIN(scraped_at) OVER car AS first_seen,
+                       COUNT(*) OVER car AS snapshots,
+                       ROW_NUMBER() OVER (PARTITION BY car_id ORDER BY scraped_at DESC) AS position
+                FROM car_snapshots WHERE source = ?
+                WINDOW car AS (PARTITION BY car_id)
+            ) WHERE position = 1
+        """, (source,))
+        self.conn.execute("""
+            DELETE FROM offer_latest WHERE campaign IN (
+                SELECT DISTINCT campaign FROM offer_snapshots WHERE source = ?)
+        """, (source,))
+        self.conn.execute("""
+            INSERT OR REPLACE INTO offer_latest (campaign, title, sold, scraped_at)
+            SELECT campaign, title, sold, scraped_at FROM (
+                SELECT campaign, COALESCE(title, '') AS title, sold, scraped_at,
+                       ROW_NUMBER() OVER (PARTITION BY campaign, title ORDER BY scraped_at DESC) AS position
+                FROM offer_snapshots WHERE source = ?
+            ) WHERE position = 1
+        """, (source,))
+
+    def _run(self, run_id):
+        return self.conn.execute("SELECT source, scraped_at FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+
+    @staticmethod
+    def _extra(row, known_columns):
+        extra = {key: value for key, value in row.items() if key not in known_columns}
+        return json.dumps(extra, ensure_ascii=False, default=str) if extra else None
+
+    def record_cars(self, run_id, rows):
+        # Guardar la foto de los carros de una corrida (filas con las columnas de siempre)
+        for _ in self.record_car_stream(run_id, rows):
+            pass
+
+    def record_car_stream(self, run_id, rows):
+        # Guardar cada fila y pasarla enseguida al siguiente paso; las inserciones comparten
+        # una transacción que se confirma cada COMMIT_INTERVAL filas
+        source, scraped_at = self._run(run_id)
+        for count, row in enumerate(rows, 1):
+            car_id, version, price = str(row['Car ID']), row.get('Version'), row.get('Precio')
+            self.conn.execute("""
+                INSERT INTO car_snapshots (run_id, source, scraped_at, car_id, version, year, price_usd,
+                                           mileage_km, details)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (run_id, source, scraped_at, car_id, version, row.get('Año'), price, row.get('Kilometraje'),
+                  self._extra(row, CAR_COLUMNS)))
+            # Cambio de precio respecto a la última foto de ese carro
+            self.conn.execute("""
+                INSERT INTO car_price_changes (run_id, source, scraped_at, car_id, version, previous_price, price)
+                SELECT ?, source, ?, car_id, ?, price_usd, ? FROM car_latest
+                WHERE source = ? AND car_id = ? AND last_seen < ?
+                  AND price_usd IS NOT NULL AND ? IS NOT NULL AND price_usd != ?
+            """, (run_id, scraped_at, version, price, source, car_id, scraped_at, price, price))
+            self.conn.execute("""
+                INSERT INTO car_latest (source, car_id, version, price_usd, first_seen, last_seen, snapshots)
+                VALUES (?, ?, ?, ?, ?, ?, 1)
+                ON CONFLICT (source, car_id) DO UPDATE SET
+                    version = excluded.version, price_usd = excluded.price_usd,
+                    last_seen = excluded.last_seen, snapshots = snapshots + 1
+                WHERE excluded.last_seen > last_seen
+            """, (source, car_id, version, price, scraped_at, scraped_at))
+            if count % COMMIT_INTERVAL == 0:
+                self.conn.commit()
+            yield row
+        self.conn.commit()
+
+    def record_offer_stream(self, run_id, rows):
+        # Guardar la foto de las sub-ofertas de Yuplon y pasar cada lote al siguiente paso ya
+        # confirmado; la campaña se identifica por su URL o, si no viene (modo API), por el
+        # título de la oferta principal
+        source, scraped_at = self._run(run_id)
+        for batch in batched(rows, INSERT_BATCH_SIZE):
+            with self.conn:
+                values = [(row.get('Campaign URL') or row.get('Main Offer') or '', row.get('Main Offer'),
+                           row.get('Sub Offer Title') or '', row.get('Price'), row.get('Original Price'),
+                           row.get('Discount'), row.get('Vendidas'), self._extra(row, OFFER_COLUMNS))
+                          for row in batch]
+                # Vendidas desde la foto anterior de la misma sub-oferta y días transcurridos
+                self.conn.executemany(f"""
+                    INSERT INTO offer_snapshots (run_id, source, scraped_at, campaign, main_offer, title, price,
+                                                 original_price, discount, sold, sold_delta, days, details)
+                    SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                           ? - latest.sold, (? - latest.scraped_at) / {DAY_SECONDS}, ?
+                    FROM (SELECT 1) LEFT JOIN offer_latest latest
+                        ON latest.campaign = ? AND latest.title = ? AND latest.scraped_at < ?
+                """, [(run_id, source, scraped_at, campaign, main_offer, title, price, original_price, discount,
+                       sold, sold, scraped_at, details, campaign, title, scraped_at)
+                      for campaign, main_offer, title, price, original_price, discount, sold, details in values])
+                self.conn.executemany("""
+                    INSERT INTO offer_latest (campaign, title, sold, scraped_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (campaign, title) DO UPDATE SET
+                        sold = excluded.sold, scraped_at = excluded.scraped_at
+                    WHERE excluded.scraped_at > scraped_at
+                """, [(value[0], value[2], value[6], scraped_at) for value in values])
+            yield from batch
+
+    def _query(self, sql, params=()):
+        # pandas solo hace falta para consultar, no para guardar las fotos de cada corrida
+        import pandas as pd
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    @staticmethod
+    def _filters(source=None, since=None, table=None):
+        # Con table las columnas van calificadas, para consultas con JOIN
+        prefix = f"{table}." if table else ""
+        clauses, params = [], []
+        if source is not None:
+            clauses.append(f"{prefix}source = ?")
+            params.append(source)
+        if since is not None:
+            clauses.append(f"{prefix}scraped_at >= ?")
+            params.append(since)
+        return (" AND ".join(clauses) or "1 = 1"), params
+
+    def price_history(self, car_id, source=None):
+        # Precio de un carro en cada corrida
+        where, params = self._filters(source)
+        return self._query(f"""
+            SELECT source, scraped_at, version, year, price_usd, mileage_km FROM car_snapshots
+            WHERE car_id = ? AND {where}
+            ORDER BY scraped_at
+        """, [str(car_id)] + params)
+
+    def price_changes(self, source=None, since=None, car_id=None, version=None):
+        # Cambios de precio de cada carro respecto a su foto anterior
+        where, params = self._filters(source, since)
+        if car_id is not None:
+            where += " AND car_id = ?"
+            params.append(str(car_id))
+        if version is not None:
+            where += " AND version = ?"
+            params.append(version)
+        return self._query(f"""
+            SELECT source, car_id, version, scraped_at, previous_price, price,
+                   price - previous_price AS delta
+            FROM car_price_changes
+            WHERE {where}
+            ORDER BY scraped_at, source, car_id
+        """, params)
+
+    def time_on_market(self, source=None):
+        # Primera y última corrida en que apareció cada carro, días publicado y si sigue
+        # en la corrida más reciente de su fuente
+        where, params = self._filters(source, table='car_latest')
+        df = self._query(f"""
+            SELECT car_latest.source, car_latest.car_id, car_latest.version, car_latest.price_usd,
+                   car_latest.first_seen, car_latest.last_seen, car_latest.snapshots,
+                   car_latest.last_seen = latest.scraped_at AS active
+            FROM car_latest
+            JOIN (SELECT source, MAX(scraped_at) AS scraped_at FROM runs GROUP BY source) latest
+                ON latest.source = car_latest.source
+            WHERE {where}
+        """, params)
+        df['days_on_market'] = (df['last_seen'] - df['first_seen']) / DAY_SECONDS
+        return df
+
+    def sold_velocity(self, since=None, campaign=None):
+        # Unidades vendidas por día de cada sub-oferta entre corridas consecutivas
+        where, params = self._filters(since=since)
+        if campaign is not None:
+            where += " AND campaign = ?"
+            params.append(campaign)
+        return self._query(f"""
+            SELECT campaign, main_offer, title, scraped_at, sold, sold_delta, days,
+                   sold_delta / days AS sold_per_day
+            FROM offer_snapshots
+            WHERE {where} AND sold_delta IS NOT NULL AND days > 0
+            ORDER BY scraped_at, campaign, title
+        """, params)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
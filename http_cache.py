@@ -0,0 +1,237 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+import requests
+import metrics
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+
+class CacheMiss(Exception):
+    # En modo offline la URL no está en la caché
+    pass
+
+
+class ResponseCache:
+    def __init__(self, cache_dir, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES,
+                 offline=False):
+        # Caché de respuestas en disco: un índice SQLite por URL y el contenido comprimido con
+        # zlib en blobs/<hash[:2]>/<hash>, nombrado por el sha256 del texto (páginas iguales
+        # se guardan una sola vez). Con offline=True nunca se sale a la red.
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.offline = offline
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_hash ON responses (content_hash)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                content_hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def _blob_path(self, content_hash):
+        return os.path.join(self.blob_dir, content_hash[:2], content_hash)
+
+    def _read_blob(self, content_hash):
+        try:
+            with open(self._blob_path(content_hash), 'rb') as f:
+                return zlib.decompress(f.read()).decode('utf-8')
+        except (OSError, zlib.error):
+            return None
+
+    def _write_blob(self, text):
+        data = text.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = zlib.compress(data, 6)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+            size = len(compressed)
+        else:
+            size = os.path.getsize(path)
+        return content_hash, size
+
+    def _lookup(self, url):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT content_hash, status, etag, last_modified, fetched_at FROM responses WHERE url = ?",
+                (url,)).fetchone()
+
+    def _touch(self, url, fetched=False):
+        now = time.time()
+        with self.lock:
+            if fetched:
+                self.conn.execute("UPDATE responses SET accessed_at = ?, fetched_at = ? WHERE url = ?",
+                                  (now, now, url))
+            else:
+                self.conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (now, url))
+            self.conn.commit()
+
+    def _store(self, url, response):
+        content_hash, size = self._write_blob(response.text)
+        now = time.time()
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO responses (url, content_hash, status, etag, last_modified, fetched_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    content_hash = excluded.content_hash, status = excluded.status, etag = excluded.etag,
+                    last_modified = excluded.last_modified, fetched_at = excluded.fetched_at,
+                    accessed_at = excluded.accessed_at
+            """, (url, content_hash, response.status_code, response.headers.get('ETag'),
+                  response.headers.get('Last-Modified'), now, now))
+            self.conn.execute("INSERT OR IGNORE INTO blobs (content_hash, size) VALUES (?, ?)",
+                              (content_hash, size))
+            self.conn.commit()
+        self._evict()
+
+    def _evict(self):
+        # Borrar las URLs usadas hace más tiempo hasta que los blobs quepan en max_bytes
+        with self.lock:
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            removed = []
+            rows = self.conn.execute("SELECT url, content_hash FROM responses ORDER BY accessed_at").fetchall()
+            for url, content_hash in rows:
+                self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                # El blob se borra cuando ninguna otra URL lo usa
+                if self.conn.execute("SELECT 1 FROM responses WHERE content_hash = ? LIMIT 1",
+                                     (content_hash,)).fetchone():
+                    continue
+                size = self.conn.execute("SELECT size FROM blobs WHERE content_hash = ?",
+                                         (content_hash,)).fetchone()
+                self.conn.execute("DELETE FROM blobs WHERE content_hash = ?", (content_hash,))
+                removed.append(content_hash)
+                total -= size[0] if size else 0
+                if total <= self.max_bytes:
+                    break
+            self.conn.commit()
+        for content_hash in removed:
+            try:
+                os.remove(self._blob_path(content_hash))
+            except OSError:
+                pass
+
+    def _count(self, result):
+        # Los contadores se actualizan bajo el lock porque varias descargas corren a la vez
+        with self.lock:
+            if result == 'hit':
+                self.hits += 1
+            elif result == 'revalidated':
+                self.revalidated += 1
+            else:
+                self.misses += 1
+        metrics.inc('http_cache_total', result=result)
+
+    def fetch(self, url, session):
+        # Devolver (código de estado, texto) de la URL. Se usa la copia guardada mientras no pase
+        # el TTL; después se revalida con If-None-Match / If-Modified-Since y un 304 la renueva.
+        # Si la red falla y hay copia vieja, se devuelve la copia.
+        entry = self._lookup(url)
+        text = self._read_blob(entry[0]) if entry else None
+        if text is None:
+            entry = None
+
+        if self.offline:
+            if entry is None:
+                self._count('miss')
+                raise CacheMiss(f"{url} no está en la caché")
+            self._count('hit')
+            self._touch(url)
+            return entry[1], text
+
+        if entry is not None and time.time() - entry[4] < self.ttl_seconds:
+            self._count('hit')
+            self._touch(url)
+            return entry[1], text
+
+        headers = {}
+        if entry is not None:
+            if entry[2]:
+                headers['If-None-Match'] = entry[2]
+            if entry[3]:
+                headers['If-Modified-Since'] = entry[3]
+        try:
+            response = session.get(url, headers=headers)
+        except requests.RequestException:
+            if entry is None:
+                raise
+            print(f"Fallo la revalidación de {url}, usando la copia en caché")
+            self._count('hit')
+            self._touch(url)
+            return entry[1], text
+
+        if response.status_code == 304 and entry is not None:
+            self._count('revalidated')
+            self._touch(url, fetched=True)
+            return entry[1], text
+        self._count('miss')
+        if response.status_code == 200:
+            self._store(url, response)
+        return response.status_code, response.text
+
+    def urls(self, prefix=''):
+        # URLs guardadas que empiezan con prefix (para repetir una corrida sin red)
+        with self.lock:
+            rows = self.conn.execute("SELECT url FROM responses WHERE url LIKE ? ESCAPE '\\' ORDER BY url",
+                                     (prefix.replace('%', r'\%').replace('_', r'\_') + '%',)).fetchall()
+        return [url for url, in rows]
+
+    def print_summary(self):
+        print(f"Caché HTTP: {self.hits} aciertos, {self.revalidated} revalidadas (304), "
+              f"{self.misses} descargas")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def configure_cache(cache_dir, **kwargs):
+    # Activar la caché compartida; sin llamar a esta función no se usa caché
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is not None:
+            _shared_cache.close()
+        _shared_cache = ResponseCache(cache_dir, **kwargs)
+    return _shared_cache
+
+
+def get_cache():
+    with _shared_cache_lock:
+        return _shared_cache
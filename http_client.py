@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+import metrics
+
+# Códigos de estado que vale la pena reintentar
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    def __init__(self, rate, capacity=None):
+        # Token bucket: `rate` peticiones por segundo con ráfagas de hasta `capacity`
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Bloquear hasta que haya un token disponible
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HttpSession:
+    def __init__(self, timeout=(5, 30), max_retries=3, backoff_factor=0.5, max_backoff=30,
+                 rate=None, burst=None, pool_size=16, headers=None):
+        # Sesión compartida con conexiones keep-alive reutilizables
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.rate_limiter = RateLimiter(rate, burst) if rate else None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def _backoff(self, attempt, retry_after=None):
+        # Calcular la espera exponencial con jitter, respetando Retry-After si viene
+        if retry_after is not None:
+            try:
+                return min(self.max_backoff, float(retry_after))
+            except ValueError:
+                pass
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        return random.uniform(0, delay)
+
+    def request(self, method, url, **kwargs):
+        # Hacer una petición reintentando errores de red, 429 y 5xx
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                with metrics.timer('rate_limit_wait_seconds', host=host):
+                    self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.observe('http_request_seconds', time.perf_counter() - start, host=host, method=method)
+                metrics.inc('http_requests_total', host=host, method=method, status='error')
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                metrics.inc('http_retries_total', host=host, reason='network')
+                print(f"Error de red en {url} ({e}). Reintentando en {delay:.1f}s")
+            else:
+                metrics.observe('http_request_seconds', time.perf_counter() - start, host=host, method=method)
+                metrics.inc('http_requests_total', host=host, method=method, status=response.status_code)
+                metrics.inc('http_response_bytes_total', len(response.content), host=host)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                metrics.inc('http_retries_total', host=host, reason=response.status_code)
+                print(f"Código de estado {response.status_code} en {url}. Reintentando en {delay:.1f}s")
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        # Cerrar las conexiones del pool
+        self.session.close()
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def configure_session(**kwargs):
+    # Reemplazar la sesión compartida con una nueva configuración
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is not None:
+            _shared_session.close()
+        _shared_session = HttpSession(**kwargs)
+    return _shared_session
+
+
+def get_session():
+    # Obtener la sesión compartida, creándola con valores por defecto si hace falta
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = HttpSession()
+        return _shared_session
@@ -0,0 +1,204 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Límites (segundos) de los buckets de los histogramas de latencia, como en Prometheus
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRIC_PREFIX = 'scraper_'
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # Una cuenta por bucket más la de los valores mayores que el último límite (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q):
+        # Aproximación del cuantil con el límite superior del bucket donde cae
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        # Contadores e histogramas por (nombre, etiquetas), compartidos entre hilos.
+        # Registrar una medición es un lock y una suma; nada se escribe hasta export().
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        # Medir la duración del bloque en el histograma `name` (también si termina con error)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        # Decorador: mide cada llamada con la etiqueta step=<nombre de la función>
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, step=func.__name__, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def drain(self):
+        # Devolver lo registrado hasta ahora y empezar de cero (para pasarlo entre procesos)
+        with self.lock:
+            state = (self.counters, self.histograms)
+            self.counters, self.histograms = {}, {}
+        return state
+
+    def merge(self, state):
+        counters, histograms = state
+        with self.lock:
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, histogram in histograms.items():
+                if key in self.histograms:
+                    self.histograms[key].merge(histogram)
+                else:
+                    self.histograms[key] = histogram
+
+    def reset(self):
+        self.drain()
+
+    def samples(self):
+        # Filas con el estado actual: una por contador y una por histograma
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (list(h.counts), h.sum, h.count, h.quantile(0.5), h.quantile(0.95)))
+                                for key, h in self.histograms.items())
+        rows = [{'metric': name, 'type': 'counter', 'labels': dict(labels), 'value': value}
+                for (name, labels), value in counters]
+        for (name, labels), (counts, total, count, p50, p95) in histograms:
+            rows.append({
+                'metric': name, 'type': 'histogram', 'labels': dict(labels),
+                'count': count, 'sum': round(total, 6), 'p50': p50, 'p95': p95,
+                'buckets': dict(zip([str(bound) for bound in LATENCY_BUCKETS] + ['+Inf'], counts)),
+            })
+        return rows
+
+    def write_json_lines(self, path, **run_labels):
+        # Agregar una línea JSON por métrica, con la hora y las etiquetas de la corrida
+        timestamp = time.time()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for row in self.samples():
+                row = {'timestamp': timestamp, **row}
+                row['labels'] = {**run_labels, **row['labels']}
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def prometheus_text(self, **run_labels):
+        # Formato de texto de Prometheus (para el textfile collector de node_exporter)
+        def label_text(labels, **extra):
+            labels = {**run_labels, **labels, **extra}
+            if not labels:
+                return ''
+            escaped = (key + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+                       for key, value in labels.items())
+            return '{' + ','.join(escaped) + '}'
+
+        lines = []
+        declared = set()
+        for row in self.samples():
+            name = METRIC_PREFIX + row['metric']
+            if name not in declared:
+                lines.append(f"# TYPE {name} {row['type']}")
+                declared.add(name)
+            if row['type'] == 'counter':
+                lines.append(f"{name}{label_text(row['labels'])} {row['value']}")
+                continue
+            cumulative = 0
+            for bound, count in row['buckets'].items():
+                cumulative += count
+                lines.append(f"{name}_bucket{label_text(row['labels'], le=bound)} {cumulative}")
+            lines.append(f"{name}_sum{label_text(row['labels'])} {row['sum']}")
+            lines.append(f"{name}_count{label_text(row['labels'])} {row['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path, **run_labels):
+        # Se escribe a un temporal y se reemplaza para que nunca se lea un archivo a medias
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text(**run_labels))
+        os.replace(tmp_path, path)
+
+    def export(self, path, **run_labels):
+        # Prometheus si el archivo termina en .prom, JSON lines en cualquier otro caso
+        if path.endswith('.prom'):
+            self.write_prometheus(path, **run_labels)
+        else:
+            self.write_json_lines(path, **run_labels)
+        print(f"Métricas guardadas en {path}")
+
+    def print_summary(self):
+        # Tiempo total y p95 de cada etapa medida, de la que más tiempo tomó a la que menos
+        rows = [row for row in self.samples() if row['type'] == 'histogram']
+        for row in sorted(rows, key=lambda row: -row['sum']):
+            labels = ",".join(f"{key}={value}" for key, value in row['labels'].items())
+            print(f"{row['metric']}{{{labels}}}: {row['count']} veces, {row['sum']:.2f}s en total, "
+                  f"p95 <= {row['p95']}s")
+
+
+# Métricas compartidas por todo el proceso
+registry = MetricsRegistry()
+inc = registry.inc
+observe = registry.observe
+timer = registry.timer
+timed = registry.timed
+
+
+def call_collecting(func, *args, **kwargs):
+    # Llamar a func en un proceso hijo y devolver (resultado, métricas registradas); el padre
+    # las suma con registry.merge(). Se descarta lo heredado del padre al hacer fork.
+    registry.drain()
+    result = func(*args, **kwargs)
+    return result, registry.drain()
@@ -0,0 +1,93 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()
+
+
+def iter_in_thread(iterable, maxsize=100):
+    # Consumir un iterable en un hilo productor aparte. La cola acotada frena al
+    # productor cuando el consumidor se atrasa (backpressure). Si el consumidor termina
+    # antes (break o excepción) el productor cierra el generador de origen, así corren
+    # sus finally (p. ej. close_driver del scraper), y se espera a que termine.
+    items = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(entry):
+        # Esperar lugar en la cola, salvo que el consumidor ya no vaya a leer más
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        source = iter(iterable)
+        try:
+            for item in source:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_DONE, e))
+        finally:
+            # Un generador solo se puede cerrar desde el hilo que lo está recorriendo
+            close = getattr(source, 'close', None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def batched(items, size):
+    # Agrupar un iterable en listas de hasta `size` elementos
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_map(func, items, max_workers=4, max_pending=None, executor=None):
+    # Aplicar func en un pool de hilos (o en el executor dado, p. ej. de procesos)
+    # mientras llegan los items, entregando los resultados en el orden de entrada.
+    # Nunca hay más de max_pending tareas en vuelo, así que tampoco se leen más
+    # items de los que se pueden procesar.
+    max_pending = max_pending or max_workers * 2
+    if executor is not None:
+        yield from _stream_submit(executor, func, items, max_pending)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from _stream_submit(executor, func, items, max_pending)
+
+
+def _stream_submit(executor, func, items, max_pending):
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
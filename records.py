@@ -0,0 +1,170 @@
+import re
+from dataclasses import dataclass
+
+# Tipo de cambio usado para pasar precios en colones a dólares
+COLONES_PER_DOLLAR = 530
+KM_PER_MILE = 1.609344
+
+_DIGITS = re.compile(r'\d+')
+_NUMBER = re.compile(r'-?\d+(?:[.,]\d+)?')
+
+
+def parse_int(text):
+    # "2,024" / " 2024 " -> 2024; None si no hay dígitos
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return int(text)
+    digits = ''.join(_DIGITS.findall(str(text)))
+    return int(digits) if digits else None
+
+
+def parse_price_usd(text):
+    # "$ 14,667" -> 14667.0, "¢ 7,950,000" -> 15000.0, "$ND" -> None
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    text = str(text)
+    if '¢' in text:
+        amount = parse_int(text)
+        return float(amount // COLONES_PER_DOLLAR) if amount is not None else None
+    # Los centavos se descartan, igual que en el precio del encabezado de usados
+    amount = parse_int(text.split('.')[0])
+    return float(amount) if amount is not None else None
+
+
+def parse_mileage_km(text):
+    # "11,200  \n kms" -> 11200; las millas se convierten a kilómetros
+    value = parse_int(text)
+    if value is None or isinstance(text, (int, float)):
+        return value
+    if 'milla' in str(text).lower():
+        return int(round(value * KM_PER_MILE))
+    return value
+
+
+def parse_colones(text):
+    # "₡12 500,00" -> 12500.0 (espacio para miles, coma para decimales)
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    text = str(text).replace('₡', '').replace(' ', '').replace('\xa0', '').replace('.', '')
+    match = _NUMBER.search(text)
+    return float(match.group().replace(',', '.')) if match else None
+
+
+def parse_percent(text):
+    # "45%" -> 45.0
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = _NUMBER.search(str(text))
+    return float(match.group().replace(',', '.')) if match else None
+
+
+@dataclass
+class NewCarRecord:
+    __slots__ = ('car_id', 'version', 'year', 'price_usd', 'attributes')
+    car_id: int
+    version: str
+    year: int
+    price_usd: float
+    attributes: dict
+
+    @classmethod
+    def from_details(cls, car_id, car_details):
+        # Normalizar los detalles de la ficha técnica de un carro nuevo
+        attributes = dict(car_details)
+        return cls(
+            car_id=parse_int(car_id),
+            version=attributes.pop('Version', None),
+            year=parse_int(attributes.pop('Año', None)),
+            price_usd=parse_price_usd(attributes.pop('Precio', None)),
+            attributes=attributes,
+        )
+
+    def to_row(self):
+        # Fila con las columnas de siempre pero con números en Precio y Año
+        row = {'Precio': self.price_usd, 'Año': self.year}
+        row.update(self.attributes)
+        row['Version'] = self.version
+        row['Car ID'] = self.car_id
+        return row
+
+
+@dataclass
+class UsedCarRecord:
+    __slots__ = ('car_id', 'version', 'year', 'price_usd', 'mileage_km', 'attributes')
+    car_id: int
+    version: str
+    year: int
+    price_usd: float
+    mileage_km: int
+    attributes: dict
+
+    @classmethod
+    def from_details(cls, car_id, car_details):
+        # Normalizar los detalles de un carro usado
+        attributes = dict(car_details)
+        return cls(
+            car_id=parse_int(car_id),
+            version=attributes.pop('Version', None),
+            year=parse_int(attributes.pop('Año', None)),
+            price_usd=parse_price_usd(attributes.pop('Precio', None)),
+            mileage_km=parse_mileage_km(attributes.pop('Kilometraje', None)),
+            attributes=attributes,
+        )
+
+    def to_row(self):
+        row = {'Año': self.year, 'Version': self.version, 'Precio': self.price_usd}
+        row.update(self.attributes)
+        row['Kilometraje'] = self.mileage_km
+        row['Car ID'] = self.car_id
+        return row
+
+
+@dataclass
+class SubOfferRecord:
+    __slots__ = ('main_offer', 'title', 'price', 'original_price', 'discount', 'rating', 'sold',
+                 'start_date', 'end_date')
+    main_offer: str
+    title: str
+    price: float
+    original_price: float
+    discount: float
+    rating: str
+    sold: int
+    start_date: str
+    end_date: str
+
+    @classmethod
+    def from_strings(cls, main_offer, title, price, original_price, discount, rating, sold,
+                     start_date, end_date):
+        # Normalizar los textos de una sub-oferta de Yuplon
+        return cls(
+            main_offer=main_offer,
+            title=title,
+            price=parse_colones(price),
+            original_price=parse_colones(original_price),
+            discount=parse_percent(discount),
+            rating=rating,
+            sold=parse_int(sold),
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+    def to_row(self):
+        return {
+            'Main Offer': self.main_offer,
+            'Sub Offer Title': self.title,
+            'Price': self.price,
+            'Original Price': self.original_price,
+            'Discount': self.discount,
+            'Calificación': self.rating,
+            'Vendidas': self.sold,
+            'Start Date': self.start_date,
+            'End Date': self.end_date,
+        }
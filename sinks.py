@@ -0,0 +1,332 @@
+import array
+import csv
+import datetime
+import glob
+import math
+import os
+import shutil
+import metrics
+
+# pyarrow y pandas se importan dentro de lo que los usa: escribir CSV no carga ninguno de los dos
+# y escribir Parquet solo pyarrow, así "cli.py parse" no paga el import de pandas (~0.4 s).
+
+DEFAULT_BATCH_SIZE = 500
+# Columnas numéricas de los registros (records.py) con su tipo de Arrow; todas las demás se
+# guardan como texto para que todas las partes de una partición tengan el mismo esquema
+NUMERIC_COLUMNS = {
+    'Car ID': 'int64', 'Año': 'int64', 'Kilometraje': 'int64', 'Precio': 'float64',
+    'Price': 'float64', 'Original Price': 'float64', 'Discount': 'float64', 'Vendidas': 'int64',
+}
+
+
+def partition_dir(root, source, scrape_date):
+    # Carpeta de la partición: <root>/source=<fuente>/scrape_date=<AAAA-MM-DD>
+    return os.path.join(root, f"source={source}", f"scrape_date={scrape_date}")
+
+
+class RowSink:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.batch = []
+        self.rows_written = 0
+
+    def write(self, row):
+        # Acumular una fila y escribir el lote cuando se llena
+        self.batch.append(row)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write(row)
+        return self
+
+    def flush(self):
+        if self.batch:
+            with metrics.timer('sink_write_seconds', sink=type(self).__name__):
+                self._write_batch(self.batch)
+            metrics.inc('rows_written_total', len(self.batch), sink=type(self).__name__)
+            self.rows_written += len(self.batch)
+            self.batch = []
+
+    def _write_batch(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+    def abort(self):
+        # Cierre tras un error; por defecto se guarda lo acumulado igual que al cerrar
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _swap_in(tmp_path, path):
+    # Reemplazar la partición anterior por la recién escrita; la anterior se borra al final
+    old_path = None
+    if os.path.exists(path):
+        old_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.old")
+        _remove(old_path)
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    if old_path:
+        _remove(old_path)
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _column_type(column):
+    import pyarrow as pa
+    return getattr(pa, NUMERIC_COLUMNS.get(column, 'string'))()
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _to_number(value, integer):
+    # Número de la columna o None si no se puede convertir (como pd.to_numeric con errors='coerce')
+    if _is_missing(value):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(number):
+        return None
+    if integer:
+        return int(number) if number.is_integer() else None
+    return number
+
+
+def _validity(values):
+    # Mapa de bits de Arrow con los valores presentes (bit i = fila i)
+    bitmap = bytearray((len(values) + 7) // 8)
+    for index, value in enumerate(values):
+        if value is not None:
+            bitmap[index >> 3] |= 1 << (index & 7)
+    return bitmap
+
+
+def _to_arrow(values, arrow_type):
+    # El arreglo se arma desde sus buffers porque pa.array() con objetos de Python importa pandas
+    import pyarrow as pa
+    if pa.types.is_string(arrow_type):
+        # Las columnas de texto se guardan como texto aunque traigan valores mezclados
+        values = [None if _is_missing(value) else str(value).encode('utf-8') for value in values]
+        offsets = array.array('i', [0])
+        for value in values:
+            offsets.append(offsets[-1] + len(value or b''))
+        buffers = [_validity(values), offsets, b''.join(value for value in values if value)]
+    else:
+        integer = pa.types.is_integer(arrow_type)
+        values = [_to_number(value, integer) for value in values]
+        buffers = [_validity(values), array.array('q' if integer else 'd', [value or 0 for value in values])]
+    return pa.Array.from_buffers(arrow_type, len(values), [pa.py_buffer(buffer) for buffer in buffers],
+                                 null_count=values.count(None))
+
+
+class ParquetSink(RowSink):
+    def __init__(self, root, source, scrape_date=None, batch_size=DEFAULT_BATCH_SIZE, overwrite=True):
+        # Cada lote se escribe como un archivo part-NNNNN.parquet dentro de la partición; al
+        # cerrar todas quedan con el mismo esquema. Con overwrite la partición se escribe en una
+        # carpeta oculta y reemplaza a la anterior recién al cerrar sin errores.
+        super().__init__(batch_size)
+        scrape_date = scrape_date or datetime.date.today().isoformat()
+        self.path = partition_dir(root, source, scrape_date)
+        if overwrite:
+            self.write_path = os.path.join(os.path.dirname(self.path), f".{os.path.basename(self.path)}.tmp")
+            _remove(self.write_path)
+        else:
+            self.write_path = self.path
+        os.makedirs(self.write_path, exist_ok=True)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        parts = sorted(glob.glob(os.path.join(self.write_path, "part-*.parquet")))
+        self.part = len(parts)
+        self.schema = pq.read_schema(parts[0]) if parts else pa.schema([])
+        # Cantidad de columnas del esquema con que se escribió cada parte
+        self.part_widths = [len(self.schema)] * self.part
+
+    def _write_batch(self, rows):
+        # Las columnas se arman directo de los diccionarios, sin pasar por un DataFrame
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        columns = dict.fromkeys(column for row in rows for column in row)
+        for column in columns:
+            if column not in self.schema.names:
+                self.schema = self.schema.append(pa.field(column, _column_type(column)))
+        table = pa.Table.from_arrays(
+            [_to_arrow([row.get(field.name) for row in rows], field.type) for field in self.schema],
+            schema=self.schema)
+        pq.write_table(table, self._part_path(self.part))
+        self.part_widths.append(len(self.schema))
+        self.part += 1
+
+    def _part_path(self, part):
+        return os.path.join(self.write_path, f"part-{part:05d}.parquet")
+
+    def _unify_parts(self):
+        # Las columnas nuevas solo se agregan al final del esquema, así que las partes escritas
+        # antes de que aparecieran se completan con nulos una sola vez, al cerrar
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        for part, width in enumerate(self.part_widths):
+            if width == len(self.schema):
+                continue
+            table = pq.read_table(self._part_path(part))
+            table = pa.Table.from_arrays(
+                list(table.columns) + [pa.nulls(len(table), field.type) for field in list(self.schema)[width:]],
+                schema=self.schema)
+            pq.write_table(table, self._part_path(part))
+        self.part_widths = [len(self.schema)] * self.part
+
+    def close(self):
+        super().close()
+        self._unify_parts()
+        if self.write_path != self.path:
+            _swap_in(self.write_path, self.path)
+        print(f"{self.rows_written} filas guardadas en {self.path}")
+
+    def abort(self):
+        # Se guarda lo escrito en la carpeta temporal y la partición anterior queda intacta
+        self.flush()
+        self._unify_parts()
+        print(f"Corrida interrumpida: {self.rows_written} filas quedaron en {self.write_path}")
+
+
+class CsvSink(RowSink):
+    def __init__(self, root, source, scrape_date=None, batch_size=DEFAULT_BATCH_SIZE, overwrite=True):
+        # Un solo archivo data.csv por partición al que se le agregan los lotes. Con overwrite se
+        # escribe a un archivo oculto que reemplaza al anterior recién al cerrar sin errores.
+        super().__init__(batch_size)
+        scrape_date = scrape_date or datetime.date.today().isoformat()
+        self.path = os.path.join(partition_dir(root, source, scrape_date), "data.csv")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.columns = []
+        if overwrite:
+            self.write_path = os.path.join(os.path.dirname(self.path), ".data.csv.tmp")
+            _remove(self.write_path)
+        else:
+            self.write_path = self.path
+            if os.path.exists(self.path):
+                with open(self.path, newline='', encoding='utf-8') as f:
+                    self.columns = next(csv.reader(f), [])
+
+    def _write_batch(self, rows):
+        new_columns = [column for row in rows for column in row if column not in self.columns]
+        if new_columns:
+            self._extend_columns(list(dict.fromkeys(new_columns)))
+        with open(self.write_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns)
+            if f.tell() == 0:
+                writer.writeheader()
+            writer.writerows(rows)
+
+    def _extend_columns(self, new_columns):
+        # Si aparecen columnas nuevas hay que reescribir el encabezado (pasa pocas veces)
+        old_columns = self.columns
+        self.columns = old_columns + new_columns
+        if not old_columns or not os.path.exists(self.write_path):
+            return
+        tmp_path = self.write_path + ".columns"
+        with open(self.write_path, newline='', encoding='utf-8') as src, \
+                open(tmp_path, 'w', newline='', encoding='utf-8') as dst:
+            writer = csv.DictWriter(dst, fieldnames=self.columns)
+            writer.writeheader()
+            writer.writerows(csv.DictReader(src))
+        os.replace(tmp_path, self.write_path)
+
+    def close(self):
+        super().close()
+        if self.write_path != self.path:
+            if os.path.exists(self.write_path):
+                os.replace(self.write_path, self.path)
+            else:
+                # Corrida sin filas: la partición queda vacía igual que antes
+                _remove(self.path)
+        print(f"{self.rows_written} filas guardadas en {self.path}")
+
+    def abort(self):
+        self.flush()
+        print(f"Corrida interrumpida: {self.rows_written} filas quedaron en {self.write_path}")
+
+
+class ExcelSink(RowSink):
+    def __init__(self, filename):
+        # Exportación opcional a Excel: openpyxl no puede agregar por lotes, se escribe al cerrar
+        super().__init__(batch_size=float('inf'))
+        self.filename = filename
+
+    def close(self):
+        import pandas as pd
+        with metrics.timer('sink_write_seconds', sink=type(self).__name__):
+            pd.DataFrame(self.batch).to_excel(self.filename, index=False)
+        metrics.inc('rows_written_total', len(self.batch), sink=type(self).__name__)
+        self.rows_written = len(self.batch)
+        self.batch = []
+        print(f"Datos guardados exitosamente en {self.filename}")
+
+
+def open_sink(output_format, root, source, scrape_date=None, **kwargs):
+    # Crear el sink para el formato pedido: 'parquet' o 'csv'
+    if output_format == 'parquet':
+        return ParquetSink(root, source, scrape_date, **kwargs)
+    if output_format == 'csv':
+        return CsvSink(root, source, scrape_date, **kwargs)
+    raise ValueError(f"Formato de salida desconocido: {output_format}")
+
+
+def export_excel(root, sources, filename, scrape_date='latest'):
+    # Exportar a Excel la última fecha de las fuentes dadas desde la salida particionada
+    df = read_dataset(root, source=sources, scrape_date=scrape_date)
+    df = df.drop(columns=['source', 'scrape_date'], errors='ignore')
+    with ExcelSink(filename) as sink:
+        sink.write_rows(df.to_dict('records'))
+
+
+def read_dataset(root, source=None, scrape_date='latest'):
+    # Leer la salida particionada (Parquet o CSV). Por defecto se toma la fecha más reciente
+    # de cada fuente; scrape_date=None lee todas las fechas.
+    import pandas as pd
+    frames = []
+    sources = [source] if isinstance(source, str) else source
+    for source_dir in sorted(glob.glob(os.path.join(root, "source=*"))):
+        source_name = os.path.basename(source_dir).split("=", 1)[1]
+        if sources and source_name not in sources:
+            continue
+        date_dirs = sorted(glob.glob(os.path.join(source_dir, "scrape_date=*")))
+        if scrape_date == 'latest':
+            date_dirs = date_dirs[-1:]
+        elif scrape_date is not None:
+            date_dirs = [d for d in date_dirs if d.endswith(f"={scrape_date}")]
+
+        for date_dir in date_dirs:
+            date_value = os.path.basename(date_dir).split("=", 1)[1]
+            for file in sorted(glob.glob(os.path.join(date_dir, "*"))):
+                if file.endswith(".parquet"):
+                    df = pd.read_parquet(file)
+                elif file.endswith(".csv"):
+                    df = pd.read_csv(file)
+                else:
+                    continue
+                df['source'] = source_name
+                df['scrape_date'] = date_value
+                frames.append(df)
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True, sort=False)
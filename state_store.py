@@ -0,0 +1,140 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+# Tiempo por defecto antes de volver a revisar un carro ya descargado
+DEFAULT_TTL_HOURS = 24
+
+
+class CarStateStore:
+    def __init__(self, db_path, ttl_hours=DEFAULT_TTL_HOURS):
+        # Abrir (o crear) la base de datos de estado por ID de carro
+        self.ttl_seconds = ttl_hours * 3600
+        self.run_started_at = time.time()
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS car_state (
+                kind TEXT NOT NULL,
+                car_id TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                last_fetched REAL,
+                content_hash TEXT,
+                details TEXT,
+                status TEXT NOT NULL DEFAULT 'active',
+                delisted_at REAL,
+                PRIMARY KEY (kind, car_id)
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def content_hash(car_details):
+        # Hash estable de los detalles parseados de un carro
+        payload = json.dumps(car_details, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def begin_run(self, now=None):
+        # Fijar la marca de tiempo de la corrida actual
+        self.run_started_at = now if now is not None else time.time()
+
+    def mark_seen(self, kind, car_id):
+        # Registrar un ID visto en la corrida y decir si hay que descargarlo: es nuevo,
+        # nunca se descargó bien o pasó el TTL
+        now = self.run_started_at
+        car_id = str(car_id)
+        self.conn.execute("""
+            INSERT INTO car_state (kind, car_id, first_seen, last_seen)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (kind, car_id) DO UPDATE SET
+                last_seen = excluded.last_seen,
+                status = 'active',
+                delisted_at = NULL
+        """, (kind, car_id, now, now))
+        row = self.conn.execute(
+            "SELECT last_fetched FROM car_state WHERE kind = ? AND car_id = ?",
+            (kind, car_id)).fetchone()
+        return row[0] is None or row[0] < now - self.ttl_seconds
+
+    def filter_ids(self, kind, car_ids):
+        # Generar solo los IDs que hay que descargar, registrando todos los vistos
+        seen = to_fetch = 0
+        for car_id in car_ids:
+            seen += 1
+            if self.mark_seen(kind, car_id):
+                to_fetch += 1
+                yield str(car_id)
+        self.conn.commit()
+        print(f"Estado incremental ({kind}): {seen} vistos, {to_fetch} por descargar, "
+              f"{seen - to_fetch} sin cambios")
+
+    def delist_missing(self, kind):
+        # Marcar como retirados los IDs activos que no aparecieron en esta corrida.
+        # Un listado vacío casi siempre es un fallo del scraping, no retirar nada en ese caso.
+        now = self.run_started_at
+        with self.conn:
+            seen = self.conn.execute(
+                "SELECT COUNT(*) FROM car_state WHERE kind = ? AND last_seen = ?",
+                (kind, now)).fetchone()[0]
+            if not seen:
+                return 0
+            cursor = self.conn.execute("""
+                UPDATE car_state SET status = 'delisted', delisted_at = ?
+                WHERE kind = ? AND status = 'active' AND last_seen < ?
+            """, (now, kind, now))
+        return cursor.rowcount
+
+    def record_details(self, kind, car_details_list, now=None):
+        # Guardar los detalles descargados y devolver cuántos cambiaron de contenido
+        changed = 0
+        with self.conn:
+            for car_details in car_details_list:
+                changed += self._record(kind, car_details, now)
+        return changed
+
+    def record_stream(self, kind, car_details_iter, now=None):
+        # Guardar cada detalle a medida que llega y dejarlo pasar al siguiente paso
+        for car_details in car_details_iter:
+            self._record(kind, car_details, now)
+            yield car_details
+        self.conn.commit()
+
+    def _record(self, kind, car_details, now=None):
+        now = now if now is not None else time.time()
+        car_id = str(car_details['Car ID'])
+        new_hash = self.content_hash(car_details)
+        row = self.conn.execute(
+            "SELECT content_hash FROM car_state WHERE kind = ? AND car_id = ?",
+            (kind, car_id)).fetchone()
+        self.conn.execute("""
+            UPDATE car_state
+            SET last_fetched = ?, content_hash = ?, details = ?
+            WHERE kind = ? AND car_id = ?
+        """, (now, new_hash, json.dumps(car_details, ensure_ascii=False, default=str),
+              kind, car_id))
+        return int(row is None or row[0] != new_hash)
+
+    def iter_active_details(self, kind, fetched_before=None):
+        # Generar los detalles más recientes de los carros activos, en orden de aparición.
+        # Con fetched_before solo los que no se descargaron desde ese momento.
+        query = """
+            SELECT details FROM car_state
+            WHERE kind = ? AND status = 'active' AND details IS NOT NULL
+        """
+        params = [kind]
+        if fetched_before is not None:
+            query += " AND last_fetched < ?"
+            params.append(fetched_before)
+        for row in self.conn.execute(query + " ORDER BY first_seen, rowid", params):
+            yield json.loads(row[0])
+
+    def delisted_ids(self, kind):
+        # IDs de carros que ya no aparecen en los listados
+        rows = self.conn.execute(
+            "SELECT car_id FROM car_state WHERE kind = ? AND status = 'delisted' ORDER BY delisted_at",
+            (kind,)).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        self.conn.close()
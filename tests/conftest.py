@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Los módulos compartidos están en la raíz y los scrapers en sus carpetas, como en los benchmarks
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'crautos'), os.path.join(ROOT, 'yuplon'), os.path.join(ROOT, 'benchmarks')]
@@ -0,0 +1,118 @@
+import threading
+import time
+import types
+
+from selenium.common.exceptions import WebDriverException
+
+import corpus
+import drivers
+import metrics
+import yuplon
+from campaign_parser import CampaignPageParser
+from waits import Waiter, WaitMetrics
+
+BASE_URL = 'https://www.yuplon.com/campaign/'
+
+
+class FakeCampaignDriver:
+    # Navegador que sirve las campañas guardadas en benchmarks/fixtures; con crash=True Chrome
+    # muere en la primera página y deja de responder
+    def __init__(self, pages, crash=False):
+        self.pages = pages
+        self.crash = crash
+        self.alive = True
+        self.page_source = ''
+        self.quit_called = False
+
+    def get(self, url):
+        if self.crash:
+            self.alive = False
+        if not self.alive:
+            raise WebDriverException("chrome not reachable")
+        self.page_source = self.pages[url[len(BASE_URL):]]
+
+    def find_element(self, by, value):
+        return object()
+
+    def execute_script(self, script, *args):
+        if not self.alive:
+            raise WebDriverException("chrome not reachable")
+        return ['complete', 0]
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_pool_retries_restarts_dead_drivers_and_keeps_link_order(monkeypatch):
+    pages = {name.rsplit('.', 1)[0]: html_content
+             for name, html_content in corpus.load_corpus(kinds=('yuplon_campaign',))['yuplon_campaign']}
+    links = [f"{BASE_URL}{name}" for name in sorted(pages)]
+    created = []
+    lock = threading.Lock()
+
+    def create_driver(driver_path, config):
+        # El primer navegador que se abre se cae; los siguientes funcionan
+        with lock:
+            driver = FakeCampaignDriver(pages, crash=not created)
+            created.append(driver)
+        return driver
+
+    monkeypatch.setattr(drivers, 'create_driver', create_driver)
+    failed_once = set()
+
+    def extract(scraper):
+        # La tercera campaña falla una vez con el navegador vivo: se reintenta sin reiniciarlo
+        if scraper.driver.page_source == pages['campaign2'] and 'campaign2' not in failed_once:
+            failed_once.add('campaign2')
+            raise ValueError("página a medias")
+        return scraper.extract_campaign_details()
+
+    completed = []
+    metrics.registry.reset()
+    pool = yuplon.CampaignScraperPool(driver_path=None, workers=2, extract=extract)
+    rows = pool.scrape(links, on_complete=lambda link, sub_offers: completed.append((link, len(sub_offers))))
+
+    parsed = {link: CampaignPageParser.parse(pages[link[len(BASE_URL):]]) for link in links}
+    assert all(parsed.values())
+    assert rows == [dict(row, **{'Campaign URL': link}) for link in links for row in parsed[link]]
+    assert sorted(completed) == [(link, len(parsed[link])) for link in links]
+    # El navegador caído se cerró y se abrió otro; todos quedan cerrados al terminar
+    assert len(created) == 3
+    assert all(driver.quit_called for driver in created)
+    counters = metrics.registry.counters
+    assert counters[('campaign_retries_total', ())] == 2
+    assert counters[('campaigns_total', (('result', 'ok'),))] == len(links)
+    metrics.registry.reset()
+
+
+class ScrollingDriver:
+    # Listado de campañas que carga 10 enlaces más en cada scroll hasta llegar a `total`
+    def __init__(self, total):
+        self.total = total
+        self.loaded = 10
+
+    def execute_script(self, script, *args):
+        if script.startswith("window.scrollTo"):
+            self.loaded = min(self.total, self.loaded + 10)
+            return None
+        return [self.loaded * 100, self.loaded // 10]
+
+    def find_elements(self, by, value):
+        return [types.SimpleNamespace(get_attribute=lambda name, n=n: f"{BASE_URL}{n}") for n in range(self.loaded)]
+
+
+def test_scroll_to_load_more_stops_without_waiting_out_the_timeout(monkeypatch):
+    monkeypatch.setattr(drivers, 'create_driver', lambda driver_path, config: ScrollingDriver(total=35))
+    monkeypatch.setattr(yuplon, 'SCROLL_STABLE_SECONDS', 0.05)
+    wait_metrics = WaitMetrics()
+    scraper = yuplon.CampaignScraper(driver_path=None)
+    scraper.waiter = Waiter(scraper.driver, wait_metrics=wait_metrics, poll_interval=0.01)
+
+    start = time.monotonic()
+    links = scraper.scroll_to_load_more()
+
+    assert links == {f"{BASE_URL}{n}" for n in range(35)}
+    # Tres scrolls que cargaron más y uno final sin cambios; ninguno llegó al timeout
+    stats = wait_metrics.summary()['scroll_load_more']
+    assert (stats['count'], stats['timeouts']) == (4, 0)
+    assert time.monotonic() - start < 2
@@ -0,0 +1,59 @@
+import pytest
+
+import corpus
+import cr_autos
+import http_cache
+import http_client
+import metrics
+from replay_server import ReplayServer
+
+MISSING_ID = '404404'
+# Página que llega pero no se puede parsear (falta la pestaña con la ficha)
+BROKEN_ID = '500500'
+BROKEN_PAGE = '<html><body><div class="tab-content"><div id="tab-2"></div></div></body></html>'
+
+
+@pytest.fixture
+def detail_server(monkeypatch):
+    # Las páginas de detalle de carros usados se sirven por ID; MISSING_ID responde 404
+    monkeypatch.setattr(http_cache, '_shared_cache', None)
+    http_client.configure_session(pool_size=8)
+    metrics.registry.reset()
+    pages = corpus.load_corpus(corpus.FIXTURES_DIR, kinds=('crautos_used',))
+    car_ids = [name.rsplit('.', 1)[0] for name, _ in pages['crautos_used']]
+    pages['crautos_used'].append((f"{BROKEN_ID}.html", BROKEN_PAGE))
+    with ReplayServer(pages, latency=0.05, not_found=(MISSING_ID,)) as server:
+        yield server, car_ids
+    metrics.registry.reset()
+
+
+def counter(metric):
+    return sum(value for (name, _), value in metrics.registry.counters.items() if name == metric)
+
+
+@pytest.mark.parametrize('max_workers, parse_processes', [(1, 0), (6, 0), (4, 1)])
+def test_stream_car_details_keeps_order_and_skips_failed_pages(detail_server, max_workers, parse_processes):
+    server, car_ids = detail_server
+    requested = car_ids[:3] + [MISSING_ID] + car_ids[3:5] + [BROKEN_ID] + car_ids[5:]
+
+    rows = list(cr_autos.CarDetailsFetcher.stream_car_details(
+        iter(requested), server.base_url('crautos_used'), is_used=True, max_workers=max_workers, max_per_host=2,
+        parse_processes=parse_processes, parse_batch_size=3))
+
+    assert [str(row['Car ID']) for row in rows] == car_ids
+    # El 404 y la página rota se cuentan y la corrida sigue (también desde los procesos de parseo)
+    assert counter('fetch_failures_total') == 1
+    assert counter('parse_failures_total') == 1
+    assert len(server.log) == len(requested)
+    assert server.max_in_flight <= (2 if max_workers > 1 else 1)
+
+
+def test_host_semaphore_caps_in_flight_requests(detail_server):
+    server, car_ids = detail_server
+
+    rows = cr_autos.CarDetailsFetcher.fetch_car_details(
+        car_ids * 2, server.base_url('crautos_used'), is_used=True, max_workers=8, max_per_host=3)
+
+    assert len(rows) == len(car_ids) * 2
+    # Con 8 hilos y latencia se llega al límite por host, pero nunca se pasa
+    assert server.max_in_flight == 3
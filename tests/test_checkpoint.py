@@ -0,0 +1,60 @@
+from checkpoint import RunJournal
+
+
+def interrupted_run(path):
+    # Corrida que descubrió 4 IDs y terminó 2 antes de morir (sin finish)
+    journal = RunJournal(str(path))
+    assert list(journal.discover(lambda: ['1', '2', '3', '4'])) == ['1', '2', '3', '4']
+    journal.complete('1', [{'Car ID': 1, 'Precio': 1500.5}])
+    journal.complete('3', [{'Car ID': 3, 'Precio': None}])
+    journal.close()
+    return journal
+
+
+def test_resume_continues_only_the_pending_items(tmp_path):
+    path = tmp_path / 'crautos_used.jsonl'
+    started_at = interrupted_run(path).started_at
+
+    journal = RunJournal(str(path), resume=True)
+    assert journal.resumed
+    assert journal.started_at == started_at
+    # La lista descubierta se reutiliza sin volver a llamar al descubrimiento
+    keys = list(journal.discover(lambda: ['no', 'se', 'usa']))
+    assert list(journal.pending(keys)) == ['2', '4']
+    assert journal.previous_rows == [{'Car ID': 1, 'Precio': 1500.5}, {'Car ID': 3, 'Precio': None}]
+
+    # Lo terminado al reanudar se agrega al mismo journal
+    journal.complete('2', [{'Car ID': 2, 'Precio': 900.0}])
+    journal.close()
+    journal = RunJournal(str(path), resume=True)
+    assert list(journal.pending(journal.discovered)) == ['4']
+    assert len(journal.previous_rows) == 3
+    journal.close()
+
+
+def test_resume_ignores_a_truncated_last_line(tmp_path):
+    path = tmp_path / 'yuplon.jsonl'
+    interrupted_run(path)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "completed", "key": "4", "ro')
+
+    journal = RunJournal(str(path), resume=True)
+    assert list(journal.pending(journal.discovered)) == ['2', '4']
+    journal.close()
+
+
+def test_finished_run_starts_fresh(tmp_path):
+    path = tmp_path / 'crautos_used.jsonl'
+    interrupted_run(path)
+    with RunJournal(str(path), resume=True) as journal:
+        journal.complete('2', [])
+        journal.complete('4', [])
+
+    journal = RunJournal(str(path), resume=True)
+    assert not journal.resumed
+    assert (journal.discovered, journal.completed, journal.previous_rows) == ([], set(), [])
+    assert list(journal.discover(lambda: ['5'])) == ['5']
+    journal.close()
+    # El archivo se reescribió desde cero
+    with open(path, encoding='utf-8') as f:
+        assert '"key": "1"' not in f.read()
@@ -0,0 +1,40 @@
+from history_store import HistoryStore
+
+
+def car(car_id, price):
+    return {'Car ID': car_id, 'Version': 'Modelo', 'Año': 2020, 'Precio': price, 'Kilometraje': 1000}
+
+
+def test_record_car_stream_yields_each_row_before_reading_the_next(tmp_path):
+    history = HistoryStore(str(tmp_path / 'history.db'))
+    run_id = history.begin_run('crautos_used', 1_700_000_000)
+    consumed = []
+
+    def rows():
+        for car_id in range(3):
+            consumed.append(car_id)
+            yield car(car_id, 5000)
+
+    stream = history.record_car_stream(run_id, rows())
+    assert next(stream)['Car ID'] == 0
+    assert consumed == [0]
+    assert list(stream) == [car(1, 5000), car(2, 5000)]
+    history.close()
+
+
+def test_price_change_between_runs(tmp_path):
+    with HistoryStore(str(tmp_path / 'history.db')) as history:
+        history.record_cars(history.begin_run('crautos_used', 1_700_000_000), [car(7, 5000)])
+        history.record_cars(history.begin_run('crautos_used', 1_700_086_400), [car(7, 4500)])
+        changes = history.price_changes(source='crautos_used')
+    assert changes[['car_id', 'previous_price', 'price']].values.tolist() == [['7', 5000.0, 4500.0]]
+
+
+def test_time_on_market_filters_by_source(tmp_path):
+    with HistoryStore(str(tmp_path / 'history.db')) as history:
+        history.record_cars(history.begin_run('crautos_used', 1_700_000_000), [car(7, 5000), car(8, 6000)])
+        history.record_cars(history.begin_run('crautos_used', 1_700_172_800), [car(7, 4500)])
+        history.record_cars(history.begin_run('crautos_new', 1_700_172_800), [car(7, 30000)])
+        market = history.time_on_market(source='crautos_used').sort_values('car_id')
+    assert market[['source', 'car_id', 'days_on_market', 'active']].values.tolist() == [
+        ['crautos_used', '7', 2.0, 1], ['crautos_used', '8', 0.0, 0]]
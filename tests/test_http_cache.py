@@ -0,0 +1,114 @@
+import os
+import types
+
+import pytest
+
+import http_cache
+
+
+class FakeResponse:
+    def __init__(self, status_code, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class FakeSession:
+    # Responde con las respuestas dadas en orden y guarda los encabezados de cada petición
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append((url, dict(headers or {})))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Reloj manual para el TTL y el orden de acceso del LRU
+    now = [1000.0]
+    monkeypatch.setattr(http_cache, 'time', types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def page(size=4000):
+    # Texto que zlib casi no comprime, para controlar el tamaño de los blobs
+    return os.urandom(size // 2).hex()
+
+
+def test_hit_within_ttl_then_revalidates_with_304(tmp_path, clock):
+    cache = http_cache.ResponseCache(str(tmp_path), ttl_seconds=60)
+    session = FakeSession(
+        FakeResponse(200, 'v1', {'ETag': '"abc"', 'Last-Modified': 'Sat, 17 Oct 2026 10:00:00 GMT'}),
+        FakeResponse(304))
+
+    assert cache.fetch('http://x/1', session) == (200, 'v1')
+    clock[0] += 30
+    assert cache.fetch('http://x/1', session) == (200, 'v1')
+    assert len(session.requests) == 1
+
+    # Pasado el TTL se pregunta con los validadores y el 304 devuelve la copia
+    clock[0] += 60
+    assert cache.fetch('http://x/1', session) == (200, 'v1')
+    assert session.requests[1][1] == {'If-None-Match': '"abc"',
+                                      'If-Modified-Since': 'Sat, 17 Oct 2026 10:00:00 GMT'}
+    assert (cache.hits, cache.revalidated, cache.misses) == (1, 1, 1)
+
+    # El 304 renovó fetched_at: vuelve a ser un acierto sin red
+    clock[0] += 30
+    assert cache.fetch('http://x/1', session) == (200, 'v1')
+    assert len(session.requests) == 2
+    cache.close()
+
+
+def test_expired_entry_is_replaced_by_new_200(tmp_path, clock):
+    cache = http_cache.ResponseCache(str(tmp_path), ttl_seconds=60)
+    session = FakeSession(FakeResponse(200, 'v1'), FakeResponse(200, 'v2'))
+
+    cache.fetch('http://x/1', session)
+    clock[0] += 61
+    assert cache.fetch('http://x/1', session) == (200, 'v2')
+    # Sin ETag ni Last-Modified no hay validadores que mandar
+    assert session.requests[1][1] == {}
+    clock[0] += 1
+    assert cache.fetch('http://x/1', session) == (200, 'v2')
+    assert len(session.requests) == 2
+    cache.close()
+
+
+def test_evicts_least_recently_used_by_size(tmp_path, clock):
+    cache = http_cache.ResponseCache(str(tmp_path), max_bytes=5000)
+    pages = {name: page() for name in 'abc'}
+    session = FakeSession(*(FakeResponse(200, pages[name]) for name in 'abc'))
+
+    cache.fetch('http://x/a', session)
+    clock[0] += 1
+    cache.fetch('http://x/b', session)
+    clock[0] += 1
+    # Leer "a" la deja como la más reciente; al entrar "c" sale "b"
+    cache.fetch('http://x/a', session)
+    clock[0] += 1
+    cache.fetch('http://x/c', session)
+
+    assert cache.urls('http://x/') == ['http://x/a', 'http://x/c']
+    blobs = [name for _, _, files in os.walk(cache.blob_dir) for name in files]
+    assert len(blobs) == 2
+    cache.close()
+
+
+def test_offline_serves_cache_and_raises_cache_miss(tmp_path, clock):
+    cache = http_cache.ResponseCache(str(tmp_path), ttl_seconds=60)
+    cache.fetch('http://x/1', FakeSession(FakeResponse(200, 'v1')))
+    cache.close()
+
+    offline = http_cache.ResponseCache(str(tmp_path), ttl_seconds=60, offline=True)
+    session = FakeSession()
+    clock[0] += 3600
+    # Offline la copia vencida se usa igual y nunca se sale a la red
+    assert offline.fetch('http://x/1', session) == (200, 'v1')
+    with pytest.raises(http_cache.CacheMiss):
+        offline.fetch('http://x/2', session)
+    assert session.requests == []
+    assert (offline.hits, offline.misses) == (1, 1)
+    offline.close()
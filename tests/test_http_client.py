@@ -0,0 +1,106 @@
+import time
+import types
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+import http_client
+
+
+class FakeAdapter(BaseAdapter):
+    # Responde en orden con lo dado: un código de estado (con encabezados) o una excepción
+    def __init__(self, *replies):
+        super().__init__()
+        self.replies = list(replies)
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        status_code, headers = reply
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers)
+        response._content = b'ok' if status_code == 200 else b''
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Registrar las esperas sin dormir y fijar el jitter en el máximo
+    calls = []
+    monkeypatch.setattr(http_client, 'time', types.SimpleNamespace(
+        sleep=calls.append, perf_counter=time.perf_counter, monotonic=time.monotonic))
+    monkeypatch.setattr(http_client.random, 'uniform', lambda low, high: high)
+    return calls
+
+
+def session_with(*replies, **kwargs):
+    session = http_client.HttpSession(**kwargs)
+    adapter = FakeAdapter(*replies)
+    session.session.mount('http://', adapter)
+    return session, adapter
+
+
+def test_retries_429_with_retry_after_and_network_errors(sleeps):
+    session, adapter = session_with((429, {'Retry-After': '7'}), requests.ConnectionError("reset"), (200, {}),
+                                    backoff_factor=0.5)
+
+    response = session.get('http://crautos.test/autosusados/cardetail.cfm?c=1')
+
+    assert response.status_code == 200
+    assert adapter.calls == 3
+    # Retry-After manda en el 429; el error de red usa el backoff exponencial del segundo intento
+    assert sleeps == [7.0, 1.0]
+
+
+def test_gives_up_after_max_retries(sleeps):
+    session, adapter = session_with(*[(503, {})] * 3, max_retries=2, backoff_factor=1, max_backoff=3)
+
+    assert session.get('http://crautos.test/').status_code == 503
+    assert adapter.calls == 3
+    assert sleeps == [1, 2]
+
+    session, adapter = session_with(*[requests.ConnectionError("down")] * 2, max_retries=1)
+    with pytest.raises(requests.ConnectionError):
+        session.get('http://crautos.test/')
+    assert adapter.calls == 2
+
+
+def test_retry_after_is_capped_and_non_retryable_status_returns_at_once(sleeps):
+    session, adapter = session_with((429, {'Retry-After': '600'}), (404, {}), max_backoff=30)
+
+    assert session.get('http://crautos.test/').status_code == 404
+    assert adapter.calls == 2
+    assert sleeps == [30.0]
+
+
+def test_rate_limiter_allows_burst_then_rate_per_second(monkeypatch):
+    clock = [0.0]
+
+    def sleep(seconds):
+        # Como time.sleep, siempre duerme un poco más de lo pedido
+        clock[0] += seconds + 1e-4
+
+    monkeypatch.setattr(http_client, 'time', types.SimpleNamespace(sleep=sleep, monotonic=lambda: clock[0]))
+    limiter = http_client.RateLimiter(rate=5, capacity=5)
+
+    times = []
+    for _ in range(20):
+        limiter.acquire()
+        times.append(clock[0])
+
+    # La ráfaga sale sin esperar y después nunca pasan más de `rate` peticiones por segundo
+    assert times[:5] == [0.0] * 5
+    after_burst = times[5:]
+    for start in after_burst:
+        assert sum(1 for t in after_burst if start <= t < start + 1 - 1e-9) <= 5
+    assert after_burst[-1] == pytest.approx(3.0, abs=0.01)
@@ -0,0 +1,76 @@
+import re
+
+import pytest
+
+import corpus
+import cr_autos
+from car_parsers import ListingPageParser, ListingParseError
+from replay_server import ReplayServer
+
+RESULTS_URL = 'https://crautos.com/autosusados/resultados.cfm'
+
+
+@pytest.fixture(scope='module')
+def listing_corpus():
+    return corpus.load_corpus(corpus.FIXTURES_DIR, kinds=('crautos_listing',))
+
+
+def expected_ids(listing_corpus):
+    # IDs de los enlaces de cada página de resultados, en el orden de las páginas y sin repetidos
+    pages = sorted((name, html_content) for name, html_content in listing_corpus['crautos_listing']
+                   if name.startswith('page'))
+    return list(dict.fromkeys(car_id for _, html_content in pages
+                              for car_id in re.findall(r'cardetail\.cfm\?c=(\d+)&ref=list', html_content)))
+
+
+@pytest.mark.parametrize('listing_workers', [1, 4])
+def test_fetch_car_ids_http_from_saved_listing(listing_corpus, listing_workers):
+    with ReplayServer(listing_corpus) as server:
+        scraper = cr_autos.UsedCarScraper(driver_path=None, listing_url=server.base_url('crautos_listing', 'search'),
+                                          listing_workers=listing_workers)
+        car_ids = scraper.fetch_car_ids_http()
+        log = list(server.log)
+
+    assert car_ids == expected_ids(listing_corpus)
+    assert len(car_ids) > 40
+    # El formulario se envía con año desde, orden por "Año" y "Solo usados", una vez por página
+    submissions = [params for method, _, params in log if method == 'POST']
+    assert sorted(params['p'] for params in submissions) == ['1', '2', '3']
+    for params in submissions:
+        assert (params['yearfrom'], params['orderby'], params['newused']) == (cr_autos.FROM_YEAR, '2', '2')
+
+
+def test_parse_results_page_reads_ids_total_and_next_page(listing_corpus):
+    pages = dict(listing_corpus['crautos_listing'])
+    first = ListingPageParser.parse_results_page(pages['page1.html'], RESULTS_URL)
+    assert first.car_ids == re.findall(r'cardetail\.cfm\?c=(\d+)&ref=list', pages['page1.html'])
+    # "siguiente" es un javascript:goPage(2): se reenvía el formulario con p=2
+    assert (first.total_pages, first.next_url, first.next_page_number) == (3, None, 2)
+    last = ListingPageParser.parse_results_page(pages['page3.html'], RESULTS_URL)
+    assert (last.total_pages, last.next_url, last.next_page_number) == (3, None, None)
+
+    html_content = '<ul><li class="page-item page-next"><a href="?p=4">&raquo;</a></li></ul>'
+    page = ListingPageParser.parse_results_page(html_content, f"{RESULTS_URL}?p=3")
+    assert (page.car_ids, page.total_pages, page.next_url) == ([], 1, f"{RESULTS_URL}?p=4")
+
+
+def test_listing_parse_error_falls_back_to_selenium(listing_corpus, monkeypatch):
+    # Una página sin el formulario de búsqueda es un ListingParseError y se usa Selenium
+    with ReplayServer(listing_corpus) as server:
+        scraper = cr_autos.UsedCarScraper(driver_path=None, listing_url=server.base_url('crautos_listing', 'page1'))
+        monkeypatch.setattr(scraper, 'fetch_car_ids_selenium', lambda: ['7', '8', '7'])
+        with pytest.raises(ListingParseError):
+            scraper.fetch_car_ids_http()
+        assert list(scraper.iter_car_ids()) == ['7', '8']
+
+
+def test_unexpected_errors_are_not_hidden_by_the_fallback(listing_corpus, monkeypatch):
+    def broken(*args):
+        raise TypeError("bug en el parser")
+
+    monkeypatch.setattr(ListingPageParser, 'parse_results_page', broken)
+    with ReplayServer(listing_corpus) as server:
+        scraper = cr_autos.UsedCarScraper(driver_path=None, listing_url=server.base_url('crautos_listing', 'search'))
+        monkeypatch.setattr(scraper, 'fetch_car_ids_selenium', lambda: pytest.fail("no debía usar Selenium"))
+        with pytest.raises(TypeError):
+            list(scraper.iter_car_ids())
@@ -0,0 +1,66 @@
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+import cr_autos
+import waits
+
+
+class FakeElement:
+    def __init__(self, href=None):
+        self.href = href
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def click(self):
+        pass
+
+    def get_attribute(self, name):
+        return self.href
+
+
+class FakeDriver:
+    # Página de carros nuevos con el botón de buscar y los resultados dados
+    title = "Autos nuevos"
+
+    def __init__(self, car_ids):
+        self.results = [FakeElement(f"cardetail.cfm?c={car_id}") for car_id in car_ids]
+        self.closed = False
+
+    def get(self, url):
+        pass
+
+    def execute_script(self, script, *args):
+        return "complete"
+
+    def find_element(self, by, value):
+        if by == By.CLASS_NAME and not self.results:
+            raise NoSuchElementException(value)
+        return self.results[0] if by == By.CLASS_NAME else FakeElement()
+
+    def find_elements(self, by, value):
+        return list(self.results) if by == By.CLASS_NAME else [FakeElement()]
+
+    def quit(self):
+        self.closed = True
+
+
+def scraper_with(driver, monkeypatch):
+    # Esperas cortas para que la búsqueda sin resultados no tarde el timeout completo
+    monkeypatch.setattr(waits.wait_metrics, 'adaptive_timeout', lambda name, default=None: 0.3)
+    scraper = cr_autos.NewCarScraper(driver_path=None)
+    scraper._driver = driver
+    return scraper
+
+
+def test_empty_listing_returns_no_ids(monkeypatch):
+    driver = FakeDriver([])
+    assert scraper_with(driver, monkeypatch).fetch_car_ids() == []
+    assert driver.closed
+
+
+def test_listing_ids(monkeypatch):
+    assert scraper_with(FakeDriver(['101', '102']), monkeypatch).fetch_car_ids() == ['101', '102']
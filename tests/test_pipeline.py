@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from pipeline import batched, iter_in_thread, stream_map
+
+
+def tracked_source(count, closed, fail_at=None):
+    # Generador como scraper.iter_car_ids: su finally cierra el navegador
+    try:
+        for item in range(count):
+            if item == fail_at:
+                raise RuntimeError("listado roto")
+            yield item
+    finally:
+        closed.set()
+
+
+def test_iter_in_thread_closes_source_when_consumer_stops_early():
+    closed = threading.Event()
+    results = iter_in_thread(tracked_source(1000, closed), maxsize=2)
+    assert [next(results), next(results)] == [0, 1]
+    results.close()
+    assert closed.is_set()
+
+
+def test_iter_in_thread_closes_source_when_consumer_raises():
+    closed = threading.Event()
+    with pytest.raises(ValueError):
+        for item in iter_in_thread(tracked_source(1000, closed), maxsize=2):
+            if item == 3:
+                raise ValueError("fallo al guardar")
+    assert closed.is_set()
+
+
+def test_iter_in_thread_yields_everything_and_reraises_source_errors():
+    closed = threading.Event()
+    assert list(iter_in_thread(tracked_source(250, closed), maxsize=10)) == list(range(250))
+    assert closed.is_set()
+
+    closed = threading.Event()
+    results = iter_in_thread(tracked_source(10, closed, fail_at=5))
+    with pytest.raises(RuntimeError):
+        list(results)
+    assert closed.is_set()
+
+
+def test_stream_map_keeps_order_and_batched_splits():
+    assert list(stream_map(lambda x: x * x, iter(range(20)), max_workers=4)) == [x * x for x in range(20)]
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
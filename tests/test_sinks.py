@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import sinks
+
+
+def test_parquet_parts_share_one_schema(tmp_path):
+    # Una columna toda nula en un lote y otra que aparece recién en el segundo lote
+    with sinks.ParquetSink(str(tmp_path), 'crautos_used', '2026-01-01', batch_size=2) as sink:
+        sink.write_rows([{'Car ID': 1, 'Precio': 5000.0, 'Color': None},
+                         {'Car ID': 2, 'Precio': None, 'Color': None},
+                         {'Car ID': 3, 'Precio': 7000.0, 'Color': 'Rojo', 'Autonomía': '400 km'}])
+
+    df = pd.read_parquet(sinks.partition_dir(str(tmp_path), 'crautos_used', '2026-01-01'))
+    assert df['Car ID'].tolist() == [1, 2, 3]
+    assert df['Color'].tolist() == [None, None, 'Rojo']
+    assert df['Autonomía'].tolist() == [None, None, '400 km']
+    assert sinks.read_dataset(str(tmp_path), 'crautos_used')['Autonomía'].tolist() == [None, None, '400 km']
+
+
+
+def test_new_columns_rewrite_each_earlier_part_once(tmp_path, monkeypatch):
+    # Cada lote trae una columna nueva: las partes anteriores se completan una sola vez al cerrar
+    writes = []
+    write_table = pq.write_table
+    monkeypatch.setattr(pq, 'write_table', lambda table, path: (writes.append(path), write_table(table, path)))
+    with sinks.ParquetSink(str(tmp_path), 'yuplon', '2026-01-01', batch_size=1) as sink:
+        sink.write_rows({'Car ID': n, f"Extra {n}": str(n)} for n in range(4))
+
+    # 4 partes escritas y 3 completadas al final (antes eran 4 + 1 + 2 + 3)
+    assert len(writes) == 7
+    table = pq.read_table(sinks.partition_dir(str(tmp_path), 'yuplon', '2026-01-01'))
+    assert table.column_names == ['Car ID', 'Extra 0', 'Extra 1', 'Extra 2', 'Extra 3']
+    assert table.column('Extra 3').to_pylist() == [None, None, None, '3']
+
+@pytest.mark.parametrize('output_format', ['parquet', 'csv'])
+def test_failed_run_keeps_previous_partition(tmp_path, output_format):
+    root = str(tmp_path)
+    with sinks.open_sink(output_format, root, 'yuplon', '2026-01-01') as sink:
+        sink.write_rows([{'Main Offer': 'Anterior', 'Price': 1000.0}])
+
+    with pytest.raises(RuntimeError):
+        with sinks.open_sink(output_format, root, 'yuplon', '2026-01-01', batch_size=1) as sink:
+            sink.write({'Main Offer': 'Nueva', 'Price': 2000.0})
+            raise RuntimeError("falla a mitad de la corrida")
+    assert sinks.read_dataset(root, 'yuplon')['Main Offer'].tolist() == ['Anterior']
+
+    with sinks.open_sink(output_format, root, 'yuplon', '2026-01-01') as sink:
+        sink.write({'Main Offer': 'Nueva', 'Price': 2000.0})
+    assert sinks.read_dataset(root, 'yuplon')['Main Offer'].tolist() == ['Nueva']
+    assert not [name for name in os.listdir(os.path.join(root, 'source=yuplon')) if name.startswith('.')]
+
+
+def test_values_are_coerced_to_the_column_types(tmp_path):
+    with sinks.ParquetSink(str(tmp_path), 'crautos_used', '2026-01-01') as sink:
+        sink.write_rows([{'Car ID': '10', 'Año': 2020.0, 'Precio': 'n/d', 'Kilometraje': float('nan'), 'Placa': 123},
+                         {'Car ID': 11, 'Año': 2021.5, 'Precio': 9500, 'Kilometraje': 30000, 'Placa': 'Ñ ámbar'}])
+
+    table = pq.read_table(sinks.partition_dir(str(tmp_path), 'crautos_used', '2026-01-01'))
+    columns = table.select(['Car ID', 'Año', 'Precio', 'Kilometraje', 'Placa']).to_pydict()
+    assert columns == {'Car ID': [10, 11], 'Año': [2020, None], 'Precio': [None, 9500.0],
+                       'Kilometraje': [None, 30000], 'Placa': ['123', 'Ñ ámbar']}
+
+
+def test_parquet_sink_does_not_import_pandas(tmp_path):
+    # "cli.py parse" escribe con los sinks y no debe pagar el import de pandas
+    code = (f"import sys, sinks\n"
+            f"with sinks.ParquetSink({str(tmp_path)!r}, 'yuplon') as sink:\n"
+            f"    sink.write_rows([{{'Main Offer': 'Spa', 'Price': 1000.0}}])\n"
+            f"assert 'pandas' not in sys.modules, 'pandas importado'\n")
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    subprocess.run([sys.executable, '-c', code], cwd=root, check=True)
@@ -0,0 +1,79 @@
+from state_store import CarStateStore
+
+HOUR = 3600
+
+
+def details(car_id, price):
+    return {'Car ID': car_id, 'Precio': price}
+
+
+def test_filter_ids_only_returns_new_and_expired_cars(tmp_path):
+    store = CarStateStore(str(tmp_path / 'state.db'), ttl_hours=24)
+    store.begin_run(now=1000.0)
+    assert list(store.filter_ids('crautos_used', [1, 2, 3])) == ['1', '2', '3']
+    store.record_details('crautos_used', [details(1, 100), details(2, 200)], now=1000.0)
+
+    # Dentro del TTL solo falta el que nunca se descargó
+    store.begin_run(now=1000.0 + 23 * HOUR)
+    assert list(store.filter_ids('crautos_used', [1, 2, 3])) == ['3']
+    # Pasado el TTL se vuelven a descargar todos
+    store.begin_run(now=1000.0 + 25 * HOUR)
+    assert list(store.filter_ids('crautos_used', [3, 1, 2])) == ['3', '1', '2']
+    # El estado es por tipo de listado
+    assert store.mark_seen('crautos_new', 1)
+    store.close()
+
+
+def test_delist_missing_and_relist(tmp_path):
+    store = CarStateStore(str(tmp_path / 'state.db'))
+    store.begin_run(now=1000.0)
+    list(store.filter_ids('crautos_used', [1, 2, 3]))
+
+    # Un listado vacío no retira nada
+    store.begin_run(now=2000.0)
+    list(store.filter_ids('crautos_used', []))
+    assert store.delist_missing('crautos_used') == 0
+    assert store.delisted_ids('crautos_used') == []
+
+    store.begin_run(now=3000.0)
+    list(store.filter_ids('crautos_used', [2]))
+    assert store.delist_missing('crautos_used') == 2
+    assert store.delisted_ids('crautos_used') == ['1', '3']
+    # Los carros nuevos no se tocan
+    assert store.delist_missing('crautos_new') == 0
+
+    # Si el carro vuelve a aparecer queda activo otra vez
+    store.begin_run(now=4000.0)
+    list(store.filter_ids('crautos_used', [1, 2]))
+    assert store.delist_missing('crautos_used') == 0
+    assert store.delisted_ids('crautos_used') == ['3']
+    store.close()
+
+
+def test_iter_active_details_fetched_before(tmp_path):
+    path = str(tmp_path / 'state.db')
+    store = CarStateStore(path)
+    store.begin_run(now=1000.0)
+    list(store.filter_ids('crautos_used', [1, 2, 3]))
+    assert store.record_details('crautos_used', [details(1, 100), details(2, 200), details(3, 300)],
+                                now=1000.0) == 3
+
+    store.begin_run(now=5000.0)
+    list(store.filter_ids('crautos_used', [1, 2]))
+    store.delist_missing('crautos_used')
+    # Solo cambió el precio del 2; el 1 se volvió a descargar igual
+    assert list(store.record_stream('crautos_used', [details(1, 100), details(2, 250)], now=5000.0)) == \
+        [details(1, 100), details(2, 250)]
+    store.close()
+
+    store = CarStateStore(path)
+    assert list(store.iter_active_details('crautos_used')) == [details(1, 100), details(2, 250)]
+    assert list(store.iter_active_details('crautos_used', fetched_before=5000.0)) == []
+    assert list(store.iter_active_details('crautos_used', fetched_before=5001.0)) == \
+        [details(1, 100), details(2, 250)]
+    store.begin_run(now=9000.0)
+    list(store.filter_ids('crautos_used', [1, 2]))
+    store.record_details('crautos_used', [details(2, 250)], now=9000.0)
+    # Los que no se volvieron a descargar en esta corrida salen de la copia guardada
+    assert list(store.iter_active_details('crautos_used', fetched_before=9000.0)) == [details(1, 100)]
+    store.close()
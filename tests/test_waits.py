@@ -0,0 +1,47 @@
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+import metrics
+from waits import Waiter, WaitMetrics, wait_metrics
+
+
+class FakeDriver:
+    # Driver mínimo: WebDriverWait solo le pasa el driver a la condición
+    def __init__(self, ready_after=0):
+        self.calls = 0
+        self.ready_after = ready_after
+
+    def execute_script(self, script):
+        self.calls += 1
+        return "complete" if self.calls > self.ready_after else "loading"
+
+
+def test_until_returns_condition_result_and_records_metrics():
+    metrics.registry.reset()
+    waiter = Waiter(FakeDriver(ready_after=1), wait_metrics=WaitMetrics(), poll_interval=0.01)
+
+    assert waiter.for_document_ready(timeout=2) is True
+
+    assert waiter.wait_metrics.summary()['document_ready']['count'] == 1
+    rows = [row for row in metrics.registry.samples() if row['metric'] == 'browser_wait_seconds']
+    assert rows and rows[0]['labels'] == {'wait': 'document_ready'} and rows[0]['count'] == 1
+
+
+def test_until_timeout_records_timeout():
+    metrics.registry.reset()
+    waiter = Waiter(FakeDriver(), wait_metrics=WaitMetrics(), poll_interval=0.01)
+
+    with pytest.raises(TimeoutException):
+        waiter.until("never", lambda driver: False, timeout=0.05)
+    assert waiter.until("never", lambda driver: False, timeout=0.05, raise_on_timeout=False) is None
+
+    assert waiter.wait_metrics.summary()['never']['timeouts'] == 2
+    counters = {(row['metric'], tuple(row['labels'].items())): row['value']
+                for row in metrics.registry.samples() if row['type'] == 'counter'}
+    assert counters[('browser_wait_timeouts_total', (('wait', 'never'),))] == 2
+
+
+def test_shared_wait_metrics_instance():
+    # cr_autos y yuplon importan la instancia compartida como wait_metrics
+    assert isinstance(wait_metrics, WaitMetrics)
+    assert Waiter(FakeDriver()).wait_metrics is wait_metrics
@@ -0,0 +1,88 @@
+import json
+import os
+
+from yuplon import ApiCapture, YuplonApiClient
+
+# Log de rendimiento de Chrome (performance) con las respuestas del API y sus cuerpos
+PERFORMANCE_LOG = os.path.join(os.path.dirname(__file__), 'fixtures', 'yuplon_performance_log.json')
+
+CONFIG = {
+    'campaign_fields': {'main_offer': 'title', 'rating': 'rating', 'sold': 'sold',
+                        'start_date': 'starts', 'end_date': 'ends'},
+    'sub_offers_path': 'options',
+    'sub_offer_fields': {'title': 'name', 'price': 'price', 'original_price': 'regular_price',
+                         'discount': 'discount'},
+}
+
+
+def campaign(*options):
+    return {'title': 'Spa', 'rating': '4.5', 'sold': '12', 'starts': '01/01/2026', 'ends': '31/01/2026',
+            'options': list(options)}
+
+
+def test_discount_is_computed_when_the_api_omits_it():
+    rows = YuplonApiClient(CONFIG).campaign_sub_offers(
+        campaign({'name': 'Masaje', 'price': 6000, 'regular_price': 10000, 'discount': None}))
+    assert rows[0]['Discount'] == 40.0
+
+
+def test_missing_prices_leave_the_discount_empty():
+    rows = YuplonApiClient(CONFIG).campaign_sub_offers(campaign(
+        {'name': 'Sin precio', 'price': None, 'regular_price': 10000, 'discount': None},
+        {'name': 'Sin original', 'price': 6000, 'regular_price': None, 'discount': None},
+        {'name': 'Texto', 'price': 'Gratis', 'regular_price': '₡0', 'discount': None}))
+    assert [row['Discount'] for row in rows] == [None, None, None]
+
+
+def test_api_resume_skips_campaigns_already_in_the_journal():
+    items = [dict(campaign({'name': name, 'price': 6000, 'regular_price': 10000}), id=campaign_id)
+             for campaign_id, name in ((7, 'A'), (8, 'B'))]
+    pages = {'https://api/campaigns?page=1': {'data': items}}
+    client = YuplonApiClient(dict(CONFIG, list_url='https://api/campaigns?page={page}'), fetch_json=pages.get)
+    completed = []
+
+    rows = client.fetch_sub_offers(skip_ids={'7'}, on_complete=lambda key, rows: completed.append((key, rows)))
+
+    assert [row['Sub Offer Title'] for row in rows] == ['B']
+    assert completed == [(8, rows)]
+
+
+class RecordedDriver:
+    # Devuelve el log de rendimiento grabado y los cuerpos de Network.getResponseBody
+    def __init__(self, path):
+        with open(path, encoding='utf-8') as f:
+            recording = json.load(f)
+        self.log = recording['log']
+        self.bodies = recording['bodies']
+
+    def get_log(self, log_type):
+        assert log_type == 'performance'
+        return self.log
+
+    def execute_cdp_cmd(self, command, params):
+        assert command == 'Network.getResponseBody'
+        return self.bodies[params['requestId']]
+
+
+def test_from_capture_replays_recorded_api_responses(tmp_path):
+    capture_path = str(tmp_path / 'yuplon_capture.json')
+    ApiCapture().collect(RecordedDriver(PERFORMANCE_LOG)).save(capture_path)
+    # Solo se guardan las respuestas JSON (la imagen del log se descarta)
+    assert sorted(ApiCapture.load(capture_path)) == ['https://api.yuplon.com/v1/campaigns/501',
+                                                     'https://api.yuplon.com/v1/campaigns/502',
+                                                     'https://api.yuplon.com/v1/campaigns?page=1']
+
+    client = YuplonApiClient.from_capture({
+        'list_url': 'https://api.yuplon.com/v1/campaigns?page={page}',
+        'detail_url': 'https://api.yuplon.com/v1/campaigns/{id}',
+        'detail_path': 'data',
+    }, capture_path)
+    rows = client.fetch_sub_offers()
+
+    assert [(row['Main Offer'], row['Sub Offer Title'], row['Price'], row['Original Price'], row['Discount'])
+            for row in rows] == [
+        ('Spa en Escazú', 'Masaje 60 min', 18000.0, 30000.0, 40.0),
+        ('Spa en Escazú', 'Masaje 90 min', 25500.0, 51000.0, 50.0),
+        ('Cena para dos', 'Menú degustación', 45000.0, 60000.0, 25.0),
+    ]
+    assert rows[0]['Vendidas'] == 1204
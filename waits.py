@@ -0,0 +1,151 @@
+import threading
+import time
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+import metrics
+
+DEFAULT_TIMEOUT = 10
+MIN_TIMEOUT = 2
+MAX_TIMEOUT = 30
+POLL_INTERVAL = 0.25
+# El timeout adaptativo es TIMEOUT_FACTOR veces la duración típica observada de cada espera
+TIMEOUT_FACTOR = 3
+EWMA_ALPHA = 0.3
+
+
+class WaitMetrics:
+    def __init__(self):
+        # Duraciones por tipo de espera, compartidas entre hilos
+        self.lock = threading.Lock()
+        self.durations = {}
+        self.timeouts = {}
+        self.typical = {}
+
+    def record(self, name, seconds, timed_out=False):
+        metrics.observe('browser_wait_seconds', seconds, wait=name)
+        if timed_out:
+            metrics.inc('browser_wait_timeouts_total', wait=name)
+        with self.lock:
+            self.durations.setdefault(name, []).append(seconds)
+            if timed_out:
+                self.timeouts[name] = self.timeouts.get(name, 0) + 1
+            else:
+                previous = self.typical.get(name)
+                self.typical[name] = seconds if previous is None else \
+                    EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * previous
+
+    def adaptive_timeout(self, name, default=DEFAULT_TIMEOUT):
+        # Timeout según lo que suele tardar esta espera, acotado entre MIN_TIMEOUT y MAX_TIMEOUT
+        with self.lock:
+            typical = self.typical.get(name)
+        if typical is None:
+            return default
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, typical * TIMEOUT_FACTOR))
+
+    def summary(self):
+        # Resumen por espera: cantidad, total, promedio, máximo y timeouts
+        with self.lock:
+            return {
+                name: {
+                    'count': len(values),
+                    'total_s': round(sum(values), 3),
+                    'mean_s': round(sum(values) / len(values), 3),
+                    'max_s': round(max(values), 3),
+                    'timeouts': self.timeouts.get(name, 0),
+                }
+                for name, values in self.durations.items()
+            }
+
+    def print_summary(self):
+        for name, stats in sorted(self.summary().items()):
+            print(f"Espera {name}: {stats['count']} veces, {stats['total_s']}s en total, "
+                  f"{stats['mean_s']}s en promedio, {stats['timeouts']} timeouts")
+
+
+# Métricas compartidas por todos los scrapers (el registro de la corrida es el módulo metrics)
+wait_metrics = WaitMetrics()
+
+
+class Waiter:
+    def __init__(self, driver, wait_metrics=wait_metrics, poll_interval=POLL_INTERVAL):
+        # Por defecto las esperas se registran en la instancia compartida wait_metrics
+        self.driver = driver
+        self.wait_metrics = wait_metrics
+        self.poll_interval = poll_interval
+
+    def until(self, name, condition, timeout=None, raise_on_timeout=True):
+        # Esperar a que condition(driver) devuelva algo verdadero, midiendo cuánto tardó
+        timeout = timeout if timeout is not None else self.wait_metrics.adaptive_timeout(name)
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, timeout, poll_frequency=self.poll_interval).until(condition)
+        except TimeoutException:
+            self.wait_metrics.record(name, time.monotonic() - start, timed_out=True)
+            if raise_on_timeout:
+                raise
+            return None
+        self.wait_metrics.record(name, time.monotonic() - start)
+        return result
+
+    def for_element(self, by, value, timeout=None, clickable=False, raise_on_timeout=True):
+        # Esperar a que un elemento esté presente (o se pueda hacer clic); con
+        # raise_on_timeout=False devuelve None si no aparece
+        if clickable:
+            return self.until(f"clickable:{value}", EC.element_to_be_clickable((by, value)), timeout,
+                              raise_on_timeout)
+        return self.until(f"element:{value}", EC.presence_of_element_located((by, value)), timeout,
+                          raise_on_timeout)
+
+    def for_staleness(self, element, timeout=None):
+        # Esperar a que un elemento desaparezca del DOM (p. ej. al cambiar de página)
+        return self.until("staleness", EC.staleness_of(element), timeout)
+
+    def for_document_ready(self, timeout=None):
+        return self.until("document_ready",
+                          lambda driver: driver.execute_script("return document.readyState") == "complete",
+                          timeout)
+
+    def for_stable_value(self, name, read_value, stable_for=1.0, timeout=None, require_change_from=None):
+        # Esperar a que read_value(driver) deje de cambiar durante stable_for segundos.
+        # Con require_change_from, además debe ser distinto de ese valor inicial.
+        # Si se acaba el tiempo no es un error: se devuelve el último valor leído.
+        state = {'value': None, 'since': None}
+
+        def condition(driver):
+            value = read_value(driver)
+            now = time.monotonic()
+            if value != state['value'] or state['since'] is None:
+                state['value'], state['since'] = value, now
+                return False
+            if require_change_from is not None and value == require_change_from:
+                return False
+            return now - state['since'] >= stable_for
+
+        self.until(name, condition, timeout, raise_on_timeout=False)
+        return state['value']
+
+    def for_network_idle(self, idle_for=0.5, timeout=None):
+        # Esperar a que el documento esté completo y no se pidan más recursos durante idle_for segundos
+        return self.for_stable_value(
+            "network_idle",
+            lambda driver: driver.execute_script(
+                "return [document.readyState, performance.getEntriesByType('resource').length]"),
+            stable_for=idle_for, timeout=timeout)
+
+    def for_stable_height(self, stable_for=1.0, timeout=None, previous_height=None):
+        # Esperar a que la altura del documento deje de crecer
+        return self.for_stable_value(
+            "stable_height",
+            lambda driver: driver.execute_script("return document.body.scrollHeight"),
+            stable_for=stable_for, timeout=timeout, require_change_from=previous_height)
+
+    def for_count_stable(self, by, value, stable_for=1.5, timeout=None, previous_count=None):
+        # Esperar a que la cantidad de elementos que cumplen el selector deje de crecer
+        def count(driver):
+            try:
+                return len(driver.find_elements(by, value))
+            except WebDriverException:
+                return None
+        return self.for_stable_value(f"count_stable:{value}", count, stable_for=stable_for,
+                                     timeout=timeout, require_change_from=previous_count)
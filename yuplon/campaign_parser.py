@@ -0,0 +1,95 @@
+import re
+from bs4 import BeautifulSoup
+import metrics
+from records import SubOfferRecord
+
+# Parseo de las páginas de campaña de Yuplon sin Selenium ni pandas: lo usan yuplon.py
+# y "cli.py parse", que así no carga el navegador.
+
+# Selectores de la página de una campaña
+MAIN_OFFER_SELECTOR = "span.text-3xl"
+CALIFICACION_XPATH = "//*[@id='root']/div[4]/section/div[1]/div[1]/div[1]/div[2]/div[1]/div[1]/span"
+VENDIDAS_XPATH = "//*[@id='root']/div[4]/section/div[1]/div[1]/div[1]/div[2]/div[2]/div[1]/span"
+VALIDEZ_XPATH = "//*[@id='root']/div[4]/section/div[1]/div[3]/div[3]/div/ol/li[1]"
+SUB_OFFER_SELECTOR = "div.pb-10"
+SUB_OFFER_TITLE_SELECTOR = "span.pb-2"
+SUB_OFFER_PRICE_SELECTOR = "span.font-medium.text-2xl"
+SUB_OFFER_ORIGINAL_PRICE_SELECTOR = "span.line-through"
+SUB_OFFER_DISCOUNT_SELECTOR = "span.font-medium.text-2xl.text-yuplon-black.dark\\:text-dark-text-primary.ml-auto.w-\\[48px\\]"
+
+
+def parse_validity_dates(valido_para_redimir_text):
+    # Manejo de diferentes formatos de fecha
+    if "del " in valido_para_redimir_text and " al " in valido_para_redimir_text:
+        start_date = valido_para_redimir_text.split("del ")[1].split(" al ")[0].strip()
+        end_date = valido_para_redimir_text.split(" al ")[1].split(".")[0].strip()
+    elif " al " in valido_para_redimir_text:
+        start_date = valido_para_redimir_text.split(" ")[2].split(" al ")[0].strip()
+        end_date = valido_para_redimir_text.split(" al ")[1].split(".")[0].strip()
+    elif "únicamente el día del evento:" in valido_para_redimir_text:
+        date = valido_para_redimir_text.split("el día del evento:")[1].strip().split(".")[0]
+        start_date = end_date = date
+    else:
+        # Manejar otro formato de fecha
+        start_date = end_date = valido_para_redimir_text.split(" ")[-1].strip().split(".")[0]
+    return start_date, end_date
+
+
+class CampaignPageParser:
+    @staticmethod
+    def _text(element):
+        # Texto visible aproximado al de Selenium: espacios colapsados
+        return " ".join(element.get_text().split())
+
+    @staticmethod
+    def _select_first(element, selector):
+        found = element.select_one(selector)
+        if found is None:
+            raise ValueError(f"No se encontró el elemento {selector}")
+        return found
+
+    @staticmethod
+    def _xpath_first(soup, xpath):
+        # Evaluar los XPaths absolutos del tipo //*[@id='x']/div[4]/section/... sobre el árbol local
+        match = re.match(r"//\*\[@id='([^']+)'\]((?:/\w+(?:\[\d+\])?)*)$", xpath)
+        if match is None:
+            raise ValueError(f"XPath no soportado: {xpath}")
+        nodes = [node for node in [soup.find(id=match.group(1))] if node is not None]
+        for step in re.findall(r"/(\w+)(?:\[(\d+)\])?", match.group(2)):
+            tag, position = step
+            next_nodes = []
+            for node in nodes:
+                children = node.find_all(tag, recursive=False)
+                if position:
+                    if len(children) >= int(position):
+                        next_nodes.append(children[int(position) - 1])
+                else:
+                    next_nodes.extend(children)
+            nodes = next_nodes
+        if not nodes:
+            raise ValueError(f"No se encontró el elemento {xpath}")
+        return nodes[0]
+
+    @staticmethod
+    def parse(html_content):
+        # Extraer la oferta principal y sus sub-ofertas de un HTML ya cargado (vivo o guardado)
+        soup = BeautifulSoup(html_content, 'html.parser')
+        text = CampaignPageParser._text
+        main_offer = text(CampaignPageParser._select_first(soup, MAIN_OFFER_SELECTOR))
+        calificacion = text(CampaignPageParser._xpath_first(soup, CALIFICACION_XPATH))
+        vendidas = text(CampaignPageParser._xpath_first(soup, VENDIDAS_XPATH))
+        start_date, end_date = parse_validity_dates(text(CampaignPageParser._xpath_first(soup, VALIDEZ_XPATH)))
+
+        sub_offers = []
+        for sub_offer_element in soup.select(SUB_OFFER_SELECTOR):
+            try:
+                fields = [text(CampaignPageParser._select_first(sub_offer_element, selector))
+                          for selector in (SUB_OFFER_TITLE_SELECTOR, SUB_OFFER_PRICE_SELECTOR,
+                                           SUB_OFFER_ORIGINAL_PRICE_SELECTOR, SUB_OFFER_DISCOUNT_SELECTOR)]
+                sub_offers.append(SubOfferRecord.from_strings(
+                    main_offer, *fields, calificacion, vendidas, start_date, end_date).to_row())
+            except ValueError as e:
+                metrics.inc('parse_failures_total', page='yuplon_sub_offer')
+                print(f"Error extracting sub-offer details: {e}")
+
+        return sub_offers
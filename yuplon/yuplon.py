@@ -1,171 +1,513 @@
+import argparse
+import json
 import os
-from selenium import webdriver
+import queue
+import threading
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
-import pandas as pd
-import data_analysis as da
+import datetime
+import itertools
+from dataclasses import replace
+from checkpoint import RunJournal
+from history_store import HistoryStore
+import drivers
+import metrics
+from waits import Waiter, wait_metrics
+import sinks
+import http_client
+from records import SubOfferRecord, parse_colones
+from campaign_parser import (
+    CALIFICACION_XPATH, MAIN_OFFER_SELECTOR, SUB_OFFER_DISCOUNT_SELECTOR, SUB_OFFER_ORIGINAL_PRICE_SELECTOR,
+    SUB_OFFER_PRICE_SELECTOR, SUB_OFFER_SELECTOR, SUB_OFFER_TITLE_SELECTOR, VALIDEZ_XPATH, VENDIDAS_XPATH,
+    CampaignPageParser, parse_validity_dates)
+
+# Salida principal: 'parquet' o 'csv', particionada por fuente y fecha dentro de OUTPUT_DIR
+OUTPUT_FORMAT = 'parquet'
+OUTPUT_DIR = 'output'
+SOURCE = 'yuplon'
+# Exportar también campaign_data.xlsx
+EXPORT_EXCEL = True
+YUPLON_URL = "https://www.yuplon.com/"
+DETAILS_LINK_XPATH = "//a[contains(text(), 'Ver Detalles')]"
+# Segundos sin cambios (ni en la página ni en los recursos pedidos) para dar por cargado un scroll
+SCROLL_STABLE_SECONDS = 1.0
+# 'page_source': una sola lectura del HTML y parseo local; 'webdriver': un find_element por campo
+EXTRACTION_MODE = 'page_source'
+# 'browser': renderizar el sitio en Chrome; 'api': leer directamente los endpoints JSON
+INGESTION_MODE = 'browser'
+# Configuración de los endpoints JSON para el modo 'api'
+API_CONFIG_PATH = 'yuplon_api.json'
+# Grabar las respuestas JSON que pide el sitio durante una corrida con navegador
+CAPTURE_API = False
+API_CAPTURE_PATH = 'yuplon_capture.json'
+# Navegadores en paralelo para visitar las campañas
+CAMPAIGN_WORKERS = 4
+# Intentos por campaña antes de darla por perdida
+CAMPAIGN_MAX_ATTEMPTS = 3
+# Historial con una foto de las sub-ofertas de cada corrida (ventas entre corridas)
+HISTORY_DB_PATH = 'history.db'
+# Journal de cada corrida para poder reanudarla con --resume
+CHECKPOINT_DIR = 'checkpoints'
+# Métricas de la corrida: JSON lines, o texto de Prometheus si el archivo termina en .prom
+METRICS_PATH = 'metrics/yuplon_metrics.jsonl'
+# Chrome sin ventana, sin imágenes/fuentes/anuncios y con un perfil reutilizable entre corridas
+DRIVER_CONFIG = drivers.DriverConfig(headless=True, profile_dir='chrome_profile/yuplon')
 
 class CampaignScraper:
-    def __init__(self, driver_path):
+    def __init__(self, driver_path, capture_network=False, driver_config=None):
         self.driver_path = driver_path
+        self.capture_network = capture_network
+        self.driver_config = driver_config or DRIVER_CONFIG
         self.driver = self._initialize_driver()
+        self.waiter = Waiter(self.driver)
 
     def _initialize_driver(self):
-        # Inicializar el WebDriver con binario de Chrome personalizado
-        service = ChromeService(executable_path=self.driver_path)
-        driver = webdriver.Chrome(service=service)
-        return driver
+        # Inicializar el WebDriver con binario de Chrome personalizado.
+        # Con capture_network se guardan los eventos de red en el log de rendimiento para ApiCapture
+        config = self.driver_config
+        if self.capture_network:
+            config = replace(config, capture_network=True)
+        return drivers.create_driver(self.driver_path, config)
 
     def open_website(self, url):
         # Abrir el sitio web de Yuplon
-        self.driver.get(url)
+        with metrics.timer('browser_navigation_seconds', scraper=type(self).__name__):
+            self.driver.get(url)
 
-    def wait_for_element(self, by, value, timeout=10):
+    def wait_for_element(self, by, value, timeout=None):
         # Esperar a que la página cargue
-        WebDriverWait(self.driver, timeout).until(
-            EC.presence_of_element_located((by, value))
-        )
+        return self.waiter.for_element(by, value, timeout)
 
     def scroll_to_load_more(self):
         # Desplazarse para cargar más elementos si es necesario
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
+        def page_state(driver):
+            # Altura, enlaces 'Ver Detalles' y recursos pedidos: mientras el sitio carga más
+            # ofertas alguno de los tres sigue cambiando
+            return driver.execute_script(
+                "return [document.body.scrollHeight, performance.getEntriesByType('resource').length]"
+            ) + [len(driver.find_elements(By.XPATH, DETAILS_LINK_XPATH))]
+
+        last_state = page_state(self.driver)
         details_links = set()
 
         while True:
             # Desplazarse hasta el final
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(5)  # Ajustar esto si es necesario para que el sitio cargue más elementos
+            # Esperar a que la página se quede quieta. En el último scroll no cambia nada y eso
+            # es el final de la lista, no un timeout: la espera termina tras SCROLL_STABLE_SECONDS
+            new_state = self.waiter.for_stable_value("scroll_load_more", page_state,
+                                                     stable_for=SCROLL_STABLE_SECONDS)
 
             # Encontrar todos los enlaces 'Ver Detalles'
-            details_elements = self.driver.find_elements(By.XPATH,
-                                                         "//a[contains(text(), 'Ver Detalles')]")
+            details_elements = self.driver.find_elements(By.XPATH, DETAILS_LINK_XPATH)
             for element in details_elements:
                 details_links.add(element.get_attribute('href'))
 
-            # Calcular nueva altura de desplazamiento y comparar con la última altura
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
+            # Si no creció la altura ni aparecieron enlaces ya se llegó al final
+            if new_state is None or (new_state[0], new_state[2]) == (last_state[0], last_state[2]):
                 break
-            last_height = new_height
+            last_state = new_state
 
         return details_links
 
-    def extract_campaign_details(self):
+    def extract_campaign_details(self, mode=None):
+        # Extraer los detalles de la campaña abierta. En modo 'page_source' se hace una sola
+        # lectura del HTML y todo se parsea localmente.
+        mode = mode or EXTRACTION_MODE
+        with metrics.timer('parse_seconds', page=f'yuplon_campaign_{mode}'):
+            if mode == 'page_source':
+                return CampaignPageParser.parse(self.driver.page_source)
+            return self._extract_campaign_details_webdriver()
+
+    def _extract_campaign_details_webdriver(self):
         # Extraer el título de la oferta principal
-        main_offer = self.driver.find_element(By.CSS_SELECTOR, "span.text-3xl").text
+        main_offer = self.driver.find_element(By.CSS_SELECTOR, MAIN_OFFER_SELECTOR).text
 
         # Extraer detalles adicionales usando los XPaths proporcionados
-        calificacion = self.driver.find_element(By.XPATH,
-                                                "//*[@id='root']/div[4]/section/div[1]/div[1]/div[1]/div[2]/div[1]/div[1]/span").text
-        vendidas = self.driver.find_element(By.XPATH,
-                                            "//*[@id='root']/div[4]/section/div[1]/div[1]/div[1]/div[2]/div[2]/div[1]/span").text
-
-        valido_para_redimir_text = self.driver.find_element(By.XPATH,
-                                                            "//*[@id='root']/div[4]/section/div[1]/div[3]/div[3]/div/ol/li[1]").text
-        # Manejo de diferentes formatos de fecha
-        if "del " in valido_para_redimir_text and " al " in valido_para_redimir_text:
-            start_date = valido_para_redimir_text.split("del ")[1].split(" al ")[0].strip()
-            end_date = valido_para_redimir_text.split(" al ")[1].split(".")[0].strip()
-        elif " al " in valido_para_redimir_text:
-            start_date = valido_para_redimir_text.split(" ")[2].split(" al ")[0].strip()
-            end_date = valido_para_redimir_text.split(" al ")[1].split(".")[0].strip()
-        elif "únicamente el día del evento:" in valido_para_redimir_text:
-            date = valido_para_redimir_text.split("el día del evento:")[1].strip().split(".")[0]
-            start_date = end_date = date
-        else:
-            # Manejar otro formato de fecha
-            start_date = end_date = valido_para_redimir_text.split(" ")[-1].strip().split(".")[0]
+        calificacion = self.driver.find_element(By.XPATH, CALIFICACION_XPATH).text
+        vendidas = self.driver.find_element(By.XPATH, VENDIDAS_XPATH).text
+
+        valido_para_redimir_text = self.driver.find_element(By.XPATH, VALIDEZ_XPATH).text
+        start_date, end_date = parse_validity_dates(valido_para_redimir_text)
 
         # Extraer detalles de la sub-oferta
-        sub_offers_elements = self.driver.find_elements(By.CSS_SELECTOR, "div.pb-10")
+        sub_offers_elements = self.driver.find_elements(By.CSS_SELECTOR, SUB_OFFER_SELECTOR)
         sub_offers = []
 
         for sub_offer_element in sub_offers_elements:
             try:
-                sub_offer_title = sub_offer_element.find_element(By.CSS_SELECTOR, "span.pb-2").text
+                sub_offer_title = sub_offer_element.find_element(By.CSS_SELECTOR, SUB_OFFER_TITLE_SELECTOR).text
                 sub_offer_price = sub_offer_element.find_element(By.CSS_SELECTOR,
-                                                                 "span.font-medium.text-2xl").text
+                                                                 SUB_OFFER_PRICE_SELECTOR).text
                 sub_offer_original_price = sub_offer_element.find_element(By.CSS_SELECTOR,
-                                                                          "span.line-through").text
+                                                                          SUB_OFFER_ORIGINAL_PRICE_SELECTOR).text
                 sub_offer_discount = sub_offer_element.find_element(By.CSS_SELECTOR,
-                                                                    "span.font-medium.text-2xl.text-yuplon-black.dark\:text-dark-text-primary.ml-auto.w-\[48px\]").text
-                sub_offers.append({
-                    'Main Offer': main_offer,
-                    'Sub Offer Title': sub_offer_title,
-                    'Price': sub_offer_price,
-                    'Original Price': sub_offer_original_price,
-                    'Discount': sub_offer_discount,
-                    'Calificación': calificacion,
-                    'Vendidas': vendidas,
-                    'Start Date': start_date,
-                    'End Date': end_date,
-                })
+                                                                    SUB_OFFER_DISCOUNT_SELECTOR).text
+                # Los precios, el descuento y las vendidas se normalizan a números aquí
+                sub_offers.append(SubOfferRecord.from_strings(
+                    main_offer, sub_offer_title, sub_offer_price, sub_offer_original_price,
+                    sub_offer_discount, calificacion, vendidas, start_date, end_date).to_row())
             except Exception as e:
+                metrics.inc('parse_failures_total', page='yuplon_sub_offer')
                 print(f"Error extracting sub-offer details: {e}")
 
         return sub_offers
 
+    def capture_page(self):
+        # HTML de la campaña abierta, para parsearlo después sin navegador (cli.py fetch)
+        return [{'HTML': self.driver.page_source}]
+
+    def load_campaign(self, link):
+        # Abrir la página de una campaña y esperar a que cargue
+        with metrics.timer('browser_navigation_seconds', scraper=type(self).__name__):
+            self.driver.get(link)
+            # Esperar al título de la oferta y a que la página deje de pedir recursos
+            self.waiter.for_element(By.CSS_SELECTOR, MAIN_OFFER_SELECTOR)
+            self.waiter.for_network_idle()
+
+    def is_alive(self):
+        # Revisar si el navegador sigue respondiendo
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except WebDriverException:
+            return False
+
     def close_driver(self):
         # Cerrar el WebDriver
         self.driver.quit()
 
 
-class DataManager:
-    def __init__(self, file_name):
-        self.file_name = file_name
+class CampaignScraperPool:
+    def __init__(self, driver_path, workers=CAMPAIGN_WORKERS, scraper_factory=None,
+                 max_attempts=CAMPAIGN_MAX_ATTEMPTS, driver_config=None, extract=None):
+        # Pool de navegadores: cada hilo tiene su propio CampaignScraper y toma enlaces de una cola.
+        # scraper_factory recibe el número de trabajador (cada navegador usa su propio perfil).
+        # extract(scraper) devuelve las filas de la campaña abierta (por defecto sus sub-ofertas)
+        self.workers = workers
+        self.extract = extract or (lambda scraper: scraper.extract_campaign_details())
+        driver_config = driver_config or DRIVER_CONFIG
+        self.scraper_factory = scraper_factory or (lambda worker: CampaignScraper(
+            driver_path=driver_path, driver_config=driver_config.for_worker(worker)))
+        self.max_attempts = max_attempts
+
+    def scrape(self, links, on_complete=None):
+        # Visitar todas las campañas en paralelo y devolver las sub-ofertas en el orden de los enlaces.
+        # on_complete(link, sub_offers) se llama desde el hilo del trabajador al terminar cada campaña
+        links = list(links)
+        pending = queue.Queue()
+        for index, link in enumerate(links):
+            pending.put((index, link, 1))
+        results = {}
+
+        threads = [threading.Thread(target=self._worker, args=(worker, pending, results, on_complete),
+                                    daemon=True)
+                   for worker in range(min(self.workers, len(links)))]
+        for thread in threads:
+            thread.start()
+        pending.join()
+
+        return [sub_offer for index in range(len(links)) for sub_offer in results.get(index, [])]
+
+    def _worker(self, worker, pending, results, on_complete=None):
+        scraper = None
+        while True:
+            try:
+                index, link, attempt = pending.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if scraper is None:
+                    scraper = self.scraper_factory(worker)
+                print(f"Obteniendo detalles de oferta: {link}")
+                scraper.load_campaign(link)
+                results[index] = self.extract(scraper)
+                for sub_offer in results[index]:
+                    sub_offer['Campaign URL'] = link
+                metrics.inc('campaigns_total', result='ok')
+                if on_complete is not None:
+                    on_complete(link, results[index])
+            except Exception as e:
+                print(f"Error en la campaña {link} (intento {attempt}): {e}")
+                # Si el navegador se cayó, reiniciarlo antes de seguir
+                if scraper is not None and not scraper.is_alive():
+                    print("El navegador dejó de responder, reiniciándolo")
+                    self._close_quietly(scraper)
+                    scraper = None
+                if attempt < self.max_attempts:
+                    metrics.inc('campaign_retries_total')
+                    pending.put((index, link, attempt + 1))
+                else:
+                    metrics.inc('campaigns_total', result='failed')
+            finally:
+                pending.task_done()
+
+        if scraper is not None:
+            self._close_quietly(scraper)
+
+    @staticmethod
+    def _close_quietly(scraper):
+        try:
+            scraper.close_driver()
+        except WebDriverException:
+            pass
+
+
+class ApiCapture:
+    def __init__(self):
+        # Respuestas JSON grabadas: {url: {'status', 'mime_type', 'body'}}
+        self.responses = {}
+
+    def collect(self, driver):
+        # Leer el log de rendimiento de Chrome y guardar las respuestas JSON (XHR/fetch)
+        for entry in driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            if message.get('method') != 'Network.responseReceived':
+                continue
+            response = message['params']['response']
+            if 'json' not in response.get('mimeType', ''):
+                continue
+            try:
+                body = driver.execute_cdp_cmd('Network.getResponseBody',
+                                              {'requestId': message['params']['requestId']})
+                data = json.loads(body['body'])
+            except (WebDriverException, ValueError):
+                data = None
+            self.responses[response['url']] = {
+                'status': response.get('status'),
+                'mime_type': response.get('mimeType'),
+                'body': data,
+            }
+        return self
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.responses, f, ensure_ascii=False, indent=2)
+        print(f"{len(self.responses)} respuestas JSON grabadas en {path}")
+
+    @staticmethod
+    def load(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+
+class YuplonApiClient:
+    # Configuración por defecto; los endpoints reales salen de una captura con ApiCapture.
+    # Las rutas son "a.b.0.c" dentro del JSON.
+    DEFAULT_CONFIG = {
+        'list_url': None,              # p. ej. "https://.../campaigns?page={page}"
+        'first_page': 1,
+        'max_pages': 100,
+        'items_path': 'data',          # lista de campañas en cada página
+        'detail_url': None,            # "https://.../campaigns/{id}" si las sub-ofertas no vienen en la lista
+        'detail_path': None,           # objeto de la campaña dentro de la respuesta de detalle
+        'id_path': 'id',
+        'sub_offers_path': 'options',  # lista de sub-ofertas dentro de la campaña
+        'campaign_fields': {
+            'main_offer': 'title',
+            'rating': 'rating',
+            'sold': 'sold',
+            'start_date': 'valid_from',
+            'end_date': 'valid_until',
+        },
+        'sub_offer_fields': {
+            'title': 'title',
+            'price': 'price',
+            'original_price': 'original_price',
+            'discount': 'discount',
+        },
+    }
+
+    def __init__(self, config, fetch_json=None):
+        self.config = dict(self.DEFAULT_CONFIG, **config)
+        self.fetch_json = fetch_json or self._fetch_json_http
+
+    @classmethod
+    def from_file(cls, path, fetch_json=None):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f), fetch_json)
+
+    @classmethod
+    def from_capture(cls, config, capture_path):
+        # Reproducir una captura grabada sin tocar la red (para pruebas y desarrollo)
+        responses = ApiCapture.load(capture_path)
+
+        def fetch_json(url):
+            if url not in responses:
+                return None
+            return responses[url]['body']
+        return cls(config, fetch_json)
+
+    @staticmethod
+    def _fetch_json_http(url):
+        response = http_client.get_session().get(url, headers={'Accept': 'application/json'})
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def get_path(data, path):
+        # Seguir una ruta "a.b.0.c" dentro del JSON; None si no existe
+        if not path:
+            return data
+        for key in path.split('.'):
+            if isinstance(data, list) and key.isdigit() and int(key) < len(data):
+                data = data[int(key)]
+            elif isinstance(data, dict) and key in data:
+                data = data[key]
+            else:
+                return None
+        return data
+
+    def iter_campaigns(self, skip_ids=()):
+        # Generar (ID, campaña) recorriendo las páginas del listado hasta que una venga vacía. Las
+        # campañas con ID en skip_ids (ya terminadas en una corrida anterior) se saltan sin pedir
+        # su detalle.
+        config = self.config
+        if not config['list_url']:
+            raise ValueError("Falta 'list_url' en la configuración del API de Yuplon")
+        for page in range(config['first_page'], config['first_page'] + config['max_pages']):
+            data = self.fetch_json(config['list_url'].format(page=page))
+            items = self.get_path(data, config['items_path']) if data is not None else None
+            if not items:
+                break
+            print(f"Página {page} del API: {len(items)} campañas")
+            for campaign in items:
+                campaign_id = self.get_path(campaign, config['id_path'])
+                if campaign_id is not None and str(campaign_id) in skip_ids:
+                    continue
+                if config['detail_url']:
+                    detail = self.fetch_json(config['detail_url'].format(id=campaign_id))
+                    campaign = self.get_path(detail, config['detail_path']) if detail is not None else campaign
+                yield campaign_id, campaign
+            if '{page}' not in config['list_url']:
+                break
 
-    def save_to_excel(self, data):
-        # Guardar los datos de la campaña en un archivo Excel
-        df = pd.DataFrame(data)
-        df.to_excel(self.file_name, index=False)
-        print(f"Detalles de la campaña guardados en {self.file_name}")
+    def campaign_sub_offers(self, campaign):
+        # Convertir una campaña del JSON a las mismas filas que extract_campaign_details
+        fields = {name: self.get_path(campaign, path)
+                  for name, path in self.config['campaign_fields'].items()}
+        sub_offers = []
+        for sub_offer in self.get_path(campaign, self.config['sub_offers_path']) or []:
+            values = {name: self.get_path(sub_offer, path)
+                      for name, path in self.config['sub_offer_fields'].items()}
+            discount = values['discount']
+            price, original_price = parse_colones(values['price']), parse_colones(values['original_price'])
+            if discount is None and price is not None and original_price:
+                # Calcular el descuento si el API no lo trae (sin precio o precio original queda vacío)
+                discount = round((1 - price / original_price) * 100)
+            sub_offers.append(SubOfferRecord.from_strings(
+                fields['main_offer'], values['title'], values['price'], values['original_price'],
+                discount, fields['rating'], fields['sold'], fields['start_date'],
+                fields['end_date']).to_row())
+        return sub_offers
 
-    def analyze_data(self):
-        # Graficar tendencias
-        campaign_data = da.load_data(self.file_name)
-        campaign_data = da.clean_data_yuplon(campaign_data)
-        da.plot_most_discount_offers(campaign_data)
-        da.plot_relation_price_vendidas_discount(campaign_data)
-        da.plot_least_discount_offers(campaign_data)
-        da.plot_most_expensive_offers(campaign_data)
-        da.plot_least_expensive_offers(campaign_data)
+    def iter_sub_offers(self, skip_ids=(), on_complete=None):
+        # Generar las sub-ofertas campaña por campaña a medida que se piden.
+        # on_complete(id, filas) recibe cada campaña terminada, como en CampaignScraperPool.scrape
+        count = 0
+        for campaign_id, campaign in self.iter_campaigns(skip_ids):
+            sub_offers = self.campaign_sub_offers(campaign)
+            if on_complete is not None and campaign_id is not None:
+                on_complete(campaign_id, sub_offers)
+            count += len(sub_offers)
+            yield from sub_offers
+        print(f"{count} sub-ofertas obtenidas del API")
 
+    def fetch_sub_offers(self, skip_ids=(), on_complete=None):
+        return list(self.iter_sub_offers(skip_ids, on_complete))
 
-def main():
-    # Obtener el directorio actual del script
-    current_dir = os.path.dirname(os.path.abspath(__file__))
 
-    # Construir la ruta relativa al ejecutable de ChromeDriver
-    chromedriver_path = os.path.join(current_dir, "../chromedriver-mac-arm64/chromedriver")
+class DataManager:
+    def __init__(self, file_name, output_dir=OUTPUT_DIR, output_format=OUTPUT_FORMAT, source=SOURCE):
+        self.file_name = file_name
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.source = source
+
+    def save(self, rows, scrape_date=None):
+        # Escribir las filas por lotes en la salida particionada a medida que llegan y, si se
+        # pide, exportar a Excel desde lo ya escrito
+        scrape_date = scrape_date or datetime.date.today().isoformat()
+        with sinks.open_sink(self.output_format, self.output_dir, self.source, scrape_date) as sink:
+            sink.write_rows(rows)
+        if EXPORT_EXCEL:
+            sinks.export_excel(self.output_dir, self.source, self.file_name, scrape_date)
 
-    # Imprimir rutas para depuración
-    print(f"Using ChromeDriver path: {chromedriver_path}")
+    def analyze_data(self):
+        # Graficar tendencias; data_analysis se carga recién aquí
+        import data_analysis as da
+        campaign_data = da.load_data(self.output_dir, source=self.source)
+        campaign_data = da.clean_data_yuplon(campaign_data)
+        # Los gráficos se dibujan en paralelo y los que no cambiaron no se vuelven a dibujar
+        da.plot_offer_trends(campaign_data)
 
-    scraper = CampaignScraper(driver_path=chromedriver_path)
-    scraper.open_website("https://www.yuplon.com/")
+
+def discover_campaign_links(chromedriver_path):
+    scraper = CampaignScraper(driver_path=chromedriver_path, capture_network=CAPTURE_API)
+    scraper.open_website(YUPLON_URL)
     scraper.wait_for_element(By.CLASS_NAME, "grid-cols-1")
 
     details_links = scraper.scroll_to_load_more()
+    if CAPTURE_API:
+        # Grabar los endpoints JSON del listado y de una campaña para configurar el modo 'api'
+        if details_links:
+            scraper.load_campaign(sorted(details_links)[0])
+        ApiCapture().collect(scraper.driver).save(API_CAPTURE_PATH)
+    scraper.close_driver()
+    return sorted(details_links)
+
+
+def scrape_with_browser(chromedriver_path, journal):
+    # Los enlaces y cada campaña terminada quedan en el journal; al reanudar solo se visitan
+    # las campañas que faltaban
+    details_links = list(journal.discover(lambda: discover_campaign_links(chromedriver_path)))
 
     print(f"Número de enlaces 'Ver Detalles' encontrados: {len(details_links)}")
     print(details_links)
 
-    all_campaign_data = []
-    for link in details_links:
-        print(f"Obteniendo detalles de oferta: {link}")
-        scraper.driver.get(link)
-        time.sleep(5)  # Esperar a que la página cargue completamente
-        campaign_data = scraper.extract_campaign_details()
-        all_campaign_data.extend(campaign_data)
+    # Visitar las campañas con varios navegadores a la vez
+    pool = CampaignScraperPool(driver_path=chromedriver_path, workers=CAMPAIGN_WORKERS)
+    sub_offers = pool.scrape(journal.pending(details_links), on_complete=journal.complete)
+    wait_metrics.print_summary()
+    return itertools.chain(journal.previous_rows, sub_offers)
 
-    scraper.close_driver()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scraper de campañas de Yuplon")
+    parser.add_argument('--resume', action='store_true',
+                        help="continuar la última corrida desde su checkpoint sin repetir lo terminado")
+    args = parser.parse_args(argv)
+
+    # ChromeDriver del proyecto para este sistema operativo (o el que resuelva Selenium)
+    chromedriver_path = drivers.default_driver_path()
+
+    # Imprimir rutas para depuración
+    print(f"Using ChromeDriver path: {chromedriver_path or 'Selenium Manager'}")
 
     data_manager = DataManager('campaign_data.xlsx')
-    data_manager.save_to_excel(all_campaign_data)
-    data_manager.analyze_data()
+    with RunJournal(os.path.join(CHECKPOINT_DIR, f'{SOURCE}.jsonl'), resume=args.resume) as journal, \
+            HistoryStore(HISTORY_DB_PATH) as history:
+        if INGESTION_MODE == 'api':
+            # Sin navegador: paginar directamente los endpoints JSON configurados. Las sub-ofertas
+            # pasan por el historial a la salida a medida que llegan, así que la etapa incluye las
+            # descargas. Cada campaña terminada queda en el journal y al reanudar no se vuelve a pedir.
+            client = YuplonApiClient.from_file(API_CONFIG_PATH)
+            all_campaign_data = itertools.chain(journal.previous_rows, client.iter_sub_offers(
+                skip_ids=journal.completed, on_complete=journal.complete))
+        else:
+            with metrics.timer('stage_seconds', stage='scrape_browser'):
+                all_campaign_data = scrape_with_browser(chromedriver_path, journal)
+
+        with metrics.timer('stage_seconds', stage='scrape_api' if INGESTION_MODE == 'api' else 'save'):
+            data_manager.save(history.record_offer_stream(history.begin_run(SOURCE, journal.started_at),
+                                                          all_campaign_data))
+    with metrics.timer('stage_seconds', stage='analyze'):
+        data_manager.analyze_data()
+
+    metrics.registry.print_summary()
+    metrics.registry.export(METRICS_PATH, run=SOURCE)
 
 
 if __name__ == "__main__":